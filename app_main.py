@@ -1,30 +1,51 @@
+import importlib
 import sys
-from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QPushButton, QStackedWidget, QLabel
-from PySide6.QtUiTools import QUiLoader
-from PySide6.QtCore import QFile, Qt
+import time
+from PySide6.QtWidgets import QApplication, QMainWindow, QMessageBox, QPushButton, QStackedWidget, QLabel, QToolBar
+from PySide6.QtGui import QKeySequence, QShortcut
 
-from report_dashboard import DashboardReport
-from crud_pages import UsersPage, DriversPage, AdminPage, OrdersPage, PaymentsPage
+from query_worker import executor
+from quick_search import QuickSearch
+from trigram_index import quick_index
+from ui_cache import load_ui
 
 
-def load_ui(path: str, parent=None):
-    loader = QUiLoader()
-    f = QFile(path)
-    if not f.open(QFile.ReadOnly):
-        raise RuntimeError(f"Gagal buka UI: {path}")
-    w = loader.load(f, parent)
-    f.close()
-    if w is None:
-        raise RuntimeError(f"Gagal load UI: {path}")
-    return w
+class StartupTimer:
+    """Catat durasi tiap tahap startup (ms), ditampilkan dengan --startup-timing."""
+    def __init__(self):
+        self.t0 = time.perf_counter()
+        self.last = self.t0
+        self.steps = []
+
+    def mark(self, name: str):
+        now = time.perf_counter()
+        self.steps.append((name, (now - self.last) * 1000))
+        self.last = now
+
+    def report(self) -> str:
+        lines = [f"  {name:<28}{ms:9.1f} ms" for name, ms in self.steps]
+        lines.append(f"  {'TOTAL':<28}{(self.last - self.t0) * 1000:9.1f} ms")
+        return "Startup timing:\n" + "\n".join(lines)
+
+
+def lazy_page(module: str, name: str):
+    """
+    Factory halaman yang baru mengimport modulnya saat halaman pertama dibuka
+    (report_dashboard menarik pandas, crud_pages menarik import/export, dst.).
+    """
+    def factory():
+        return getattr(importlib.import_module(module), name)()
+    return factory
 
 
 class AppWindow(QMainWindow):
-    def __init__(self):
+    def __init__(self, timer: StartupTimer = None):
         super().__init__()
+        self.timer = timer or StartupTimer()
 
         # Load dashboard shell
         root = load_ui("Dashboard_form.ui", self)
+        self.timer.mark("load_ui Dashboard_form")
         self.setCentralWidget(root)
         self.setWindowTitle("Aplikasi Ojek Online")
 
@@ -60,26 +81,17 @@ class AppWindow(QMainWindow):
             self.stacked.removeWidget(w)
             w.deleteLater()
 
-        # halaman-halaman
-        self.pageReport = DashboardReport()
-
-        self.pageUsers = UsersPage()
-        self.pageDrivers = DriversPage()
-        self.pageAdmin = AdminPage()
-        self.pageOrders = OrdersPage()
-        self.pagePayments = PaymentsPage()
-
-        # tambahkan ke stacked
-        self.pages = {
-            "Report": self.pageReport,
-            "User": self.pageUsers,
-            "Driver": self.pageDrivers,
-            "Admin": self.pageAdmin,
-            "Pesanan": self.pageOrders,
-            "Pembayaran": self.pagePayments,
+        # halaman-halaman: dibuat (dan query datanya) baru saat pertama dibuka
+        self.page_factories = {
+            "Report": lazy_page("report_dashboard", "DashboardReport"),
+            "User": lazy_page("crud_pages", "UsersPage"),
+            "Driver": lazy_page("crud_pages", "DriversPage"),
+            "Admin": lazy_page("crud_pages", "AdminPage"),
+            "Pesanan": lazy_page("crud_pages", "OrdersPage"),
+            "Pembayaran": lazy_page("crud_pages", "PaymentsPage"),
+            "Diagnostics": lazy_page("diagnostics_page", "DiagnosticsPage"),
         }
-        for name in ["Report", "User", "Driver", "Admin", "Pembayaran", "Pesanan"]:
-            self.stacked.addWidget(self.pages[name])
+        self.pages = {}
 
         # hubungkan sidebar utama
         self.btnUser.clicked.connect(lambda: self.show_page("User"))
@@ -89,26 +101,83 @@ class AppWindow(QMainWindow):
         self.btnPesanan.clicked.connect(lambda: self.show_page("Pesanan"))
         self.btnReport.clicked.connect(lambda: self.show_page("Report"))  # INI yang dipakai
 
+        # quick search global (indeks trigram dibangun di background)
+        self.quickSearch = QuickSearch(self)
+        bar = QToolBar("Cari", self)
+        bar.setMovable(False)
+        bar.addWidget(self.quickSearch)
+        # latensi query per halaman (query_stats)
+        bar.addAction("Diagnostics", lambda: self.show_page("Diagnostics"))
+        self.addToolBar(bar)
+        QShortcut(QKeySequence("Ctrl+K"), self, activated=self.quickSearch.focus)
+        self.quickSearch.activated.connect(self._open_search_hit)
+        self._build_quick_index()
+
         # tampilkan report dulu
         self.show_page("Report")
+        self.timer.mark("halaman pertama (Report)")
+
+    def _build_quick_index(self):
+        self.quickSearch.set_status("membangun indeks...")
+        executor().submit(
+            "quick_index",
+            lambda conn: quick_index().build(conn),
+            lambda n: self.quickSearch.set_status(f"{n} data terindeks"),
+            lambda msg: self.quickSearch.set_status(f"indeks gagal: {msg}"),
+            read_only=True,
+        )
+
+    def _open_search_hit(self, hit):
+        # buka halaman yang sesuai lalu saring tabelnya dengan teks hasil
+        page = {"users": "User", "drivers": "Driver", "places": "Pesanan"}.get(hit["kind"])
+        if page is None:
+            return
+        self.show_page(page)
+        self.pages[page].search(hit["text"])
 
-    def show_page(self, name: str):
+    @property
+    def pageReport(self):
+        return self.pages.get("Report")
+
+    def _get_page(self, name: str):
+        """Ambil halaman; dibuat dan dimasukkan ke stacked saat pertama dipakai."""
         w = self.pages.get(name)
+        if w is None:
+            factory = self.page_factories.get(name)
+            if factory is None:
+                return None, False
+            w = factory()
+            self.pages[name] = w
+            self.stacked.addWidget(w)
+            return w, True
+        return w, False
+
+    def show_page(self, name: str):
+        w, created = self._get_page(name)
         if not w:
             return
         self.stacked.setCurrentWidget(w)
         self.titleLabel.setText(name)
 
         # kalau masuk report, auto refresh biar update
-        if name == "Report":
+        # (halaman yang baru dibuat sudah memuat datanya sendiri)
+        if name == "Report" and not created:
             try:
-                self.pageReport.refresh_all()
+                self.pageReport.refresh_visible()
             except Exception as e:
                 QMessageBox.warning(self, "Warning", f"Gagal refresh report:\n{e}")
 
 
 if __name__ == "__main__":
+    timer = StartupTimer()
     app = QApplication(sys.argv)
-    win = AppWindow()
+    timer.mark("QApplication")
+    win = AppWindow(timer)
     win.show()
+    timer.mark("window.show")
+    if "--startup-timing" in sys.argv:
+        print(timer.report())
+    if "--import-timing" in sys.argv:
+        from import_timing import report
+        print(report(set(sys.modules)))
     sys.exit(app.exec())
@@ -0,0 +1,283 @@
+"""
+Benchmark lapisan data & tampilan, jalan tanpa layar (Qt platform offscreen).
+Isi DB dulu dengan gen_data.py supaya angkanya berarti.
+
+Yang diukur (median dari --repeat kali):
+- select_rows       : query langsung lewat pool (db.select_rows)
+- crud.<Halaman>    : CrudPage.load_data sampai halaman pertama tampil
+- dashboard.<report>: setiap query di report_dashboard.REPORTS
+- model.data        : DataFrameModel.data() untuk semua sel (scroll penuh)
+- view.scroll       : QTableView digulir & digambar ulang per layar
+- pdf.orders        : export_query_pdf pesanan ke file sementara
+
+Hasil ditulis ke JSON (beserta commit git) supaya bisa dibandingkan antar commit.
+
+Pemakaian:
+    python benchmark.py                              # -> benchmark.json
+    python benchmark.py --out hasil.json --repeat 5
+    python benchmark.py --only crud,dashboard        # hanya grup tertentu
+    python benchmark.py --compare lama.json baru.json
+"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from PySide6 import __version__ as PYSIDE_VERSION
+from PySide6.QtCore import QEventLoop
+from PySide6.QtWidgets import QApplication, QTableView
+
+from db import connection, query_rows, select_rows
+
+GROUPS = ("select", "crud", "dashboard", "model", "pdf")
+
+SELECT_QUERIES = [
+    ("select_rows.orders_page", """
+        SELECT pesanan_id, pelanggan_id, driver_id, titik_awal, titik_tujuan, jarak, biaya
+        FROM orders ORDER BY pesanan_id DESC LIMIT 200
+    """),
+    ("select_rows.user_by_pk", "SELECT * FROM users WHERE user_id = (SELECT MAX(user_id) FROM users)"),
+    ("select_rows.orders_by_pelanggan", """
+        SELECT o.* FROM orders o
+        WHERE o.pelanggan_id = (SELECT pelanggan_id FROM orders ORDER BY pesanan_id LIMIT 1)
+        ORDER BY o.pesanan_id DESC LIMIT 200
+    """),
+    ("select_rows.count_orders", "SELECT COUNT(*) AS n FROM orders"),
+]
+
+MODEL_ROWS = 100_000   # baris pesanan untuk benchmark model/view
+PDF_ROWS = 5_000
+
+
+def measure(fn, repeat):
+    """Jalankan fn repeat kali; fn boleh mengembalikan jumlah baris."""
+    runs, rows = [], None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        out = fn()
+        runs.append(time.perf_counter() - t0)
+        if isinstance(out, int):
+            rows = out
+    result = {
+        "median": statistics.median(runs),
+        "min": min(runs),
+        "max": max(runs),
+        "runs": runs,
+    }
+    if rows is not None:
+        result["rows"] = rows
+    return result
+
+
+def _wait_loaded(model, timeout=600):
+    """Proses event Qt sampai model selesai memuat (hasil executor masuk lewat signal)."""
+    app = QApplication.instance()
+    deadline = time.monotonic() + timeout
+    while model.is_loading():
+        if time.monotonic() > deadline:
+            raise RuntimeError("Timeout menunggu data")
+        app.processEvents(QEventLoop.AllEvents, 20)
+    return model.rowCount()
+
+
+# ---------- grup benchmark ----------
+def bench_select(repeat):
+    return {name: measure(lambda q=q: len(select_rows(q)), repeat) for name, q in SELECT_QUERIES}
+
+
+def bench_crud(repeat):
+    import crud_pages
+
+    out = {}
+    for cls in (crud_pages.UsersPage, crud_pages.DriversPage, crud_pages.AdminPage,
+                crud_pages.OrdersPage, crud_pages.PaymentsPage):
+        page = cls()   # konstruktor sudah memanggil load_data; tunggu supaya tidak tumpang tindih
+        _wait_loaded(page.model)
+
+        def run(page=page):
+            page.load_data()
+            return _wait_loaded(page.model)
+
+        out[f"crud.{cls.__name__}"] = measure(run, repeat)
+        page.deleteLater()
+    return out
+
+
+def bench_dashboard(repeat):
+    from report_dashboard import REPORTS
+    from report_engine import engine
+
+    out = {}
+    with connection() as conn:
+        for title, q in REPORTS:
+            if callable(q):
+                def run(q=q):
+                    engine().invalidate()   # ukur join dasar juga, bukan cache
+                    return len(q(conn))
+            else:
+                def run(q=q):
+                    return len(query_rows(conn, q))
+            out[f"dashboard.{title}"] = measure(run, repeat)
+    return out
+
+
+def bench_model(repeat):
+    from report_windows import DataFrameModel, read_df
+    from report_engine import ID, CATEGORY
+
+    with connection() as conn:
+        df = read_df(conn, f"""
+            SELECT pesanan_id, pelanggan_id, driver_id, titik_awal, titik_tujuan, jarak, biaya
+            FROM orders ORDER BY pesanan_id DESC LIMIT {MODEL_ROWS}
+        """, dtypes={"pesanan_id": ID, "pelanggan_id": ID, "driver_id": ID,
+                     "titik_awal": CATEGORY, "titik_tujuan": CATEGORY})
+
+    model = DataFrameModel(df)
+    n_rows, n_cols = model.rowCount(), model.columnCount()
+
+    def scroll_data():
+        data, index = model.data, model.index
+        for r in range(n_rows):
+            for c in range(n_cols):
+                data(index(r, c))
+        return n_rows
+
+    view = QTableView()
+    view.resize(1000, 700)
+    view.setModel(model)
+    view.show()
+    QApplication.instance().processEvents()   # jendela harus ter-expose dulu, kalau tidak repaint tidak menggambar
+    bar = view.verticalScrollBar()
+
+    def scroll_view():
+        # satu layar per langkah, digambar ulang seperti saat user menggulir
+        bar.setValue(0)
+        step = max(1, bar.pageStep())
+        screens = 0
+        for value in range(0, bar.maximum() + 1, step):
+            bar.setValue(value)
+            view.viewport().repaint()
+            screens += 1
+        return screens
+
+    out = {
+        "model.format_frame": measure(lambda: DataFrameModel(df).rowCount(), repeat),
+        "model.data": measure(scroll_data, repeat),
+        "view.scroll": measure(scroll_view, repeat),
+    }
+    view.close()
+    return out
+
+
+def bench_pdf(repeat):
+    from pdf_export import export_query_pdf
+
+    path = os.path.join(tempfile.mkdtemp(), "bench.pdf")
+    query = f"""
+        SELECT pesanan_id, pelanggan_id, driver_id, titik_awal, titik_tujuan, jarak, biaya
+        FROM orders ORDER BY pesanan_id DESC LIMIT {PDF_ROWS}
+    """
+    try:
+        return {"pdf.orders": measure(lambda: export_query_pdf(path, "Benchmark", query), repeat)}
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+
+
+BENCHES = {
+    "select": bench_select,
+    "crud": bench_crud,
+    "dashboard": bench_dashboard,
+    "model": bench_model,
+    "pdf": bench_pdf,
+}
+
+
+# ---------- hasil ----------
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ""
+
+
+def _table_sizes():
+    sizes = {}
+    for table in ("users", "drivers", "orders", "payments"):
+        sizes[table] = select_rows(f"SELECT COUNT(*) AS n FROM `{table}`")[0]["n"]
+    return sizes
+
+
+def run(groups=GROUPS, repeat=3):
+    app = QApplication.instance() or QApplication(sys.argv)
+    results = {}
+    for group in groups:
+        print(f"== {group}")
+        try:
+            part = BENCHES[group](repeat)
+        except Exception as e:
+            # satu grup gagal (mis. tabel kosong) tidak menghentikan yang lain
+            print(f"   ERROR: {e}")
+            results[group] = {"error": str(e)}
+            continue
+        for name, r in part.items():
+            extra = f" ({r['rows']} baris)" if "rows" in r else ""
+            print(f"   {name}: {r['median'] * 1000:.1f} ms{extra}")
+        results.update(part)
+    app.processEvents()
+    return {
+        "commit": _git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "pyside": PYSIDE_VERSION,
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "tables": _table_sizes(),
+        "results": results,
+    }
+
+
+def compare(old_path, new_path):
+    """Cetak perubahan median per benchmark (negatif = lebih cepat)."""
+    with open(old_path, encoding="utf-8") as f:
+        old = json.load(f)
+    with open(new_path, encoding="utf-8") as f:
+        new = json.load(f)
+    print(f"{old.get('commit') or old_path} -> {new.get('commit') or new_path}")
+    for name in sorted(set(old["results"]) | set(new["results"])):
+        a, b = old["results"].get(name, {}), new["results"].get(name, {})
+        if "median" not in a or "median" not in b:
+            print(f"  {name}: hanya ada di salah satu hasil")
+            continue
+        change = (b["median"] - a["median"]) / a["median"] * 100 if a["median"] else 0.0
+        print(f"  {name}: {a['median'] * 1000:.1f} -> {b['median'] * 1000:.1f} ms ({change:+.1f}%)")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "-h" in args or "--help" in args:
+        print(__doc__)
+        sys.exit(0)
+    if "--compare" in args:
+        i = args.index("--compare")
+        compare(args[i + 1], args[i + 2])
+        sys.exit(0)
+    out = args[args.index("--out") + 1] if "--out" in args else "benchmark.json"
+    repeat = int(args[args.index("--repeat") + 1]) if "--repeat" in args else 3
+    groups = args[args.index("--only") + 1].split(",") if "--only" in args else GROUPS
+    unknown = [g for g in groups if g not in BENCHES]
+    if unknown:
+        print(f"Grup tidak dikenal: {', '.join(unknown)} (pilihan: {', '.join(GROUPS)})")
+        sys.exit(2)
+
+    report = run(groups, repeat)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, default=str)
+    print(f"Hasil ditulis ke {out}")
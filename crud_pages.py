@@ -1,37 +1,82 @@
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QMessageBox, QDialog, QFormLayout,
-    QLineEdit, QComboBox, QDoubleSpinBox
+    QTableView, QMessageBox, QDialog, QFormLayout,
+    QLineEdit, QComboBox, QDoubleSpinBox, QFileDialog, QInputDialog
 )
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, QTimer, Signal
 
-from db import select_rows, execute
+from db import select_rows, select_prepared, transaction, transaction_conn, run_prepared, in_chunks
+from rollup import apply_order_changes, apply_payment_changes, ensure_tables
+from trigram_index import INDEXED_TABLES, quick_index
+from csv_import import SPECS as IMPORT_SPECS
+from import_wizard import ImportDialog
+from paged_model import KeysetTableModel, search_where
+from data_export import FILE_FILTER, export_query, with_extension
+from query_worker import executor
 
 
 # ---------- helpers FK ----------
+USERS_OPTIONS_SQL = "SELECT user_id, nama, no_hp FROM users ORDER BY user_id;"
+
+DRIVERS_OPTIONS_SQL = """
+    SELECT d.driver_id, u.nama, u.no_hp, d.plat_nomor
+    FROM drivers d
+    JOIN users u ON u.user_id = d.user_id
+    ORDER BY d.driver_id;
+"""
+
+ORDERS_OPTIONS_SQL = """
+    SELECT o.pesanan_id, p.nama AS pelanggan, o.titik_awal, o.titik_tujuan, o.biaya
+    FROM orders o
+    JOIN users p ON p.user_id = o.pelanggan_id
+    ORDER BY o.pesanan_id DESC;
+"""
+
 def load_users_options():
-    rows = select_rows("SELECT user_id, nama, no_hp FROM users ORDER BY user_id;")
+    rows = select_rows(USERS_OPTIONS_SQL, read_only=True)
     return [(r["user_id"], f'{r["user_id"]} - {r["nama"]} ({r["no_hp"]})') for r in rows]
 
 def load_drivers_options():
-    rows = select_rows("""
-        SELECT d.driver_id, u.nama, u.no_hp, d.plat_nomor
-        FROM drivers d
-        JOIN users u ON u.user_id = d.user_id
-        ORDER BY d.driver_id;
-    """)
+    rows = select_rows(DRIVERS_OPTIONS_SQL, read_only=True)
     return [(r["driver_id"], f'{r["driver_id"]} - {r["nama"]} ({r["no_hp"]}) | {r["plat_nomor"]}') for r in rows]
 
 def load_orders_options():
-    rows = select_rows("""
-        SELECT o.pesanan_id, p.nama AS pelanggan, o.titik_awal, o.titik_tujuan, o.biaya
-        FROM orders o
-        JOIN users p ON p.user_id = o.pelanggan_id
-        ORDER BY o.pesanan_id DESC;
-    """)
+    rows = select_rows(ORDERS_OPTIONS_SQL, read_only=True)
     return [(r["pesanan_id"], f'{r["pesanan_id"]} - {r["pelanggan"]} | {r["titik_awal"]} -> {r["titik_tujuan"]} | Rp{r["biaya"]}') for r in rows]
 
 
+# ---------- cache opsi FK ----------
+# sumber opsi: nama -> (loader, tabel yang isinya dipakai di label)
+FK_SOURCES = {
+    "users": (load_users_options, ("users",)),
+    "drivers": (load_drivers_options, ("drivers", "users")),
+    "orders": (load_orders_options, ("orders", "users")),
+}
+
+# versi isi tiap tabel, dinaikkan setiap CrudPage menulis ke tabel itu
+_table_versions = {}
+_fk_cache = {}   # sumber -> (versi tabel saat dimuat, opsi)
+
+
+def table_version(table):
+    return _table_versions.get(table, 0)
+
+
+def bump_table_version(table):
+    _table_versions[table] = table_version(table) + 1
+
+
+def fk_options(source):
+    """Opsi FK dari cache; dimuat ulang hanya jika tabel sumbernya berubah."""
+    loader, tables = FK_SOURCES[source]
+    versions = tuple(table_version(t) for t in tables)
+    cached = _fk_cache.get(source)
+    if cached is None or cached[0] != versions:
+        cached = (versions, loader())
+        _fk_cache[source] = cached
+    return cached[1]
+
+
 # ---------- dialog input ----------
 class RecordDialog(QDialog):
     """
@@ -39,6 +84,7 @@ class RecordDialog(QDialog):
       - name, label
       - type: text | password | float | enum | fk
       - options: list untuk enum, atau list[(id,label)] untuk fk
+      - source : untuk fk, nama sumber di FK_SOURCES (opsi diisi dari cache)
     """
     def __init__(self, title, fields, initial=None, parent=None):
         super().__init__(parent)
@@ -121,42 +167,86 @@ class RecordDialog(QDialog):
 # ---------- base CRUD page ----------
 class CrudPage(QWidget):
     """
-    view_query: query tampil
+    view_query: query tampil (SELECT ... FROM ... JOIN ..., tanpa ORDER BY)
     view_cols : kolom hasil query (kolom pertama wajib PK)
+    key_col   : kolom PK di view_query, dipakai untuk ORDER BY ... DESC
+                dan keyset pagination (default: pk)
+    search_cols: kolom hasil yang dicari dengan kotak Cari (LIKE di server)
+    rollup    : callable(cur, [(old_row, new_row), ...]) untuk memperbarui tabel
+                rekap di transaksi yang sama dengan penulisan (lihat rollup.py)
     table     : tabel target
     pk        : primary key
     form_fields: field dialog (tanpa pk)
     insert_cols/update_cols: kolom insert/update
     """
+    page_size = 200
+    max_pages = 10
+    exportProgress = Signal(int)
+
     def __init__(self, title, view_query, view_cols, table, pk,
-                 form_fields, insert_cols, update_cols):
+                 form_fields, insert_cols, update_cols, key_col=None, rollup=None,
+                 search_cols=None):
         super().__init__()
         self.title = title
         self.view_query = view_query
         self.view_cols = view_cols
         self.table_name = table
         self.pk = pk
+        self.key_col = key_col or pk
         self.form_fields = form_fields
         self.insert_cols = insert_cols
         self.update_cols = update_cols
+        self.rollup = rollup
+        self.search_cols = search_cols or []
+        self.statements = self._build_statements()
 
-        self.tbl = QTableWidget()
-        self.tbl.setEditTriggers(QTableWidget.NoEditTriggers)
-        self.tbl.setSelectionBehavior(QTableWidget.SelectRows)
-        self.tbl.setSelectionMode(QTableWidget.SingleSelection)
+        self.model = KeysetTableModel(
+            view_query, self.key_col, view_cols,
+            page_size=self.page_size, max_pages=self.max_pages, parent=self
+        )
+        self.model.error.connect(lambda msg: QMessageBox.critical(self, "Error", msg))
+        self.model.loadingChanged.connect(self._on_loading)
+        self._resize_pending = False
+
+        self.tbl = QTableView()
+        self.tbl.setModel(self.model)
+        self.tbl.setEditTriggers(QTableView.NoEditTriggers)
+        self.tbl.setSelectionBehavior(QTableView.SelectRows)
+        # Ctrl/Shift+klik untuk pilih banyak baris (hapus / edit massal)
+        self.tbl.setSelectionMode(QTableView.ExtendedSelection)
+        # klik header = urutkan di server (model.sort); awal: PK terbaru dulu
+        self.tbl.horizontalHeader().setSortIndicator(0, Qt.DescendingOrder)
+        self.tbl.setSortingEnabled(True)
+
+        self.txt_search = QLineEdit()
+        self.txt_search.setPlaceholderText("Cari...")
+        self.txt_search.setClearButtonEnabled(True)
+        # query baru dikirim setelah user berhenti mengetik sebentar
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(300)
+        self._search_text = ""
 
         self.btn_add = QPushButton("Tambah")
         self.btn_edit = QPushButton("Edit")
         self.btn_del = QPushButton("Hapus")
         self.btn_refresh = QPushButton("Refresh")
+        self.btn_export = QPushButton("Export")
+        self.btn_import = QPushButton("Import CSV")
+        self.btn_import.setVisible(table in IMPORT_SPECS)
+        self.lbl_status = QLabel("")
 
         top = QHBoxLayout()
         top.addWidget(QLabel(title))
         top.addStretch()
+        top.addWidget(self.lbl_status)
+        top.addWidget(self.txt_search)
         top.addWidget(self.btn_add)
         top.addWidget(self.btn_edit)
         top.addWidget(self.btn_del)
         top.addWidget(self.btn_refresh)
+        top.addWidget(self.btn_export)
+        top.addWidget(self.btn_import)
 
         lay = QVBoxLayout(self)
         lay.addLayout(top)
@@ -166,110 +256,310 @@ class CrudPage(QWidget):
         self.btn_add.clicked.connect(self.add_record)
         self.btn_edit.clicked.connect(self.edit_record)
         self.btn_del.clicked.connect(self.delete_record)
+        self.btn_export.clicked.connect(self.export_data)
+        self.btn_import.clicked.connect(self.import_csv)
+        self.txt_search.textChanged.connect(self._search_timer.start)
+        self.txt_search.returnPressed.connect(self.apply_search)
+        self._search_timer.timeout.connect(self.apply_search)
+        self.exportProgress.connect(lambda n: self.lbl_status.setText(f"Export: {n} baris..."))
 
         self.load_data()
 
     def _refresh_fk(self):
+        # dipanggil tepat sebelum dialog dibuka, jadi opsi FK tidak dimuat
+        # saat halaman dibuat/refresh dan hanya dimuat ulang jika sumbernya berubah
         for f in self.form_fields:
             if f.get("type") == "fk":
-                if f["name"] in ("user_id", "pelanggan_id"):
-                    f["options"] = load_users_options()
-                elif f["name"] == "driver_id":
-                    f["options"] = load_drivers_options()
-                elif f["name"] == "pesanan_id":
-                    f["options"] = load_orders_options()
+                f["options"] = fk_options(f["source"])
 
     def load_data(self):
-        self._refresh_fk()
         try:
-            rows = select_rows(self.view_query)
-            self.tbl.setColumnCount(len(self.view_cols))
-            self.tbl.setHorizontalHeaderLabels(self.view_cols)
-            self.tbl.setRowCount(len(rows))
-
-            for r_idx, r in enumerate(rows):
-                for c_idx, col in enumerate(self.view_cols):
-                    val = r.get(col)
-                    self.tbl.setItem(r_idx, c_idx, QTableWidgetItem("" if val is None else str(val)))
-
-            self.tbl.resizeColumnsToContents()
+            # query jalan di background; klik Refresh lagi membatalkan yang lama
+            self._resize_pending = True
+            self.model.reset()
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def search(self, text):
+        """Isi kotak Cari lalu langsung jalankan (dipakai quick search global)."""
+        self.txt_search.setText(text)
+        self.apply_search()
+
+    def apply_search(self):
+        self._search_timer.stop()
+        text = self.txt_search.text().strip()
+        if text == self._search_text:
+            return
+        self._search_text = text
+        exprs = [self.model.exprs.get(c, c) for c in self.search_cols]
+        self._resize_pending = True
+        self.model.set_filter(*search_where(exprs, text, self.key_col))
+
+    def _on_loading(self, loading):
+        self.lbl_status.setText("Memuat..." if loading else "")
+        if not loading and self._resize_pending:
+            self._resize_pending = False
+            self.tbl.resizeColumnsToContents()
+
     def _selected_pk(self):
-        row = self.tbl.currentRow()
-        if row < 0:
+        idx = self.tbl.currentIndex()
+        if not idx.isValid():
             return None
-        item = self.tbl.item(row, 0)
-        return item.text() if item else None
+        return self.model.key_at(idx.row())
+
+    def _selected_pks(self):
+        rows = sorted({idx.row() for idx in self.tbl.selectionModel().selectedRows()})
+        return [k for k in (self.model.key_at(r) for r in rows) if k is not None]
+
+    def _build_statements(self):
+        """
+        SQL INSERT/UPDATE/DELETE/SELECT per PK dibuat sekali per halaman;
+        dijalankan sebagai prepared statement (db.run_prepared), jadi server
+        juga hanya mem-parse-nya sekali per koneksi pool.
+        """
+        t, pk = f"`{self.table_name}`", f"`{self.pk}`"
+        form_cols = ", ".join(f"`{f['name']}`" for f in self.form_fields)
+        insert_cols = ", ".join(f"`{c}`" for c in self.insert_cols)
+        sets = ", ".join(f"`{c}`=%s" for c in self.update_cols)
+        row = f"SELECT * FROM {t} WHERE {pk}=%s"
+        return {
+            "insert": f"INSERT INTO {t} ({insert_cols}) VALUES ({', '.join(['%s'] * len(self.insert_cols))})",
+            "update": f"UPDATE {t} SET {sets} WHERE {pk}=%s",
+            "delete": f"DELETE FROM {t} WHERE {pk}=%s",
+            "form_row": f"SELECT {form_cols} FROM {t} WHERE {pk}=%s",
+            "row": row,
+            "row_lock": row + " FOR UPDATE",
+        }
 
     def _fetch_row_by_pk(self, pk_val):
-        cols = [f["name"] for f in self.form_fields]
-        sql = f"SELECT {', '.join([f'`{c}`' for c in cols])} FROM `{self.table_name}` WHERE `{self.pk}`=%s;"
-        rows = select_rows(sql, (pk_val,))
+        rows = select_prepared(self.statements["form_row"], (pk_val,))
         return rows[0] if rows else {}
 
+    def _tracks_rows(self):
+        # baris sebelum/sesudah hanya perlu diambil kalau ada yang memakainya
+        return self.rollup is not None or self.table_name in INDEXED_TABLES
+
+    def _snapshot_row(self, conn, pk_val, lock=False):
+        if not self._tracks_rows():
+            return None
+        rows = run_prepared(conn, self.statements["row_lock" if lock else "row"], (pk_val,)).fetchall()
+        return rows[0] if rows else None
+
+    def _write(self, statement, params, pk_val=None):
+        """
+        Jalankan 1 statement dari self.statements ("insert"/"update"/"delete")
+        dalam satu transaksi; tabel rekap (jika ada rollup) ikut diperbarui
+        sebelum commit, indeks quick search sesudah commit.
+        pk_val None = insert. Return PK baris yang ditulis.
+        """
+        if self.rollup is not None:
+            ensure_tables()
+        with transaction_conn() as conn:
+            old = None if pk_val is None else self._snapshot_row(conn, pk_val, lock=True)
+            cur = run_prepared(conn, self.statements[statement], params)
+            if pk_val is None:
+                pk_val = cur.lastrowid
+            new = self._snapshot_row(conn, pk_val)
+            if self.rollup is not None:
+                rollup_cur = conn.cursor()
+                try:
+                    self.rollup(rollup_cur, [(old, new)])
+                finally:
+                    rollup_cur.close()
+        bump_table_version(self.table_name)
+        if self._tracks_rows():
+            quick_index().apply_change(self.table_name, old, new)
+        return pk_val
+
+    def _snapshot_rows(self, cur, pks, lock=False):
+        """{pk: baris} untuk banyak PK sekaligus (per potongan IN)."""
+        if not self._tracks_rows():
+            return {}
+        rows = {}
+        for ph, chunk in in_chunks(pks):
+            sql = f"SELECT * FROM `{self.table_name}` WHERE `{self.pk}` IN ({ph})"
+            cur.execute(sql + (" FOR UPDATE" if lock else ""), chunk)
+            rows.update((r[self.pk], r) for r in cur.fetchall())
+        return rows
+
+    def _write_many(self, sql, params, pks):
+        """
+        Jalankan sql + " WHERE pk IN (...)" untuk banyak PK dalam satu transaksi
+        (dipecah per potongan IN); tabel rekap & indeks ikut diperbarui seperti _write.
+        Return jumlah baris yang kena.
+        """
+        affected = 0
+        if self.rollup is not None:
+            ensure_tables()
+        with transaction() as cur:
+            old = self._snapshot_rows(cur, pks, lock=True)
+            for ph, chunk in in_chunks(pks):
+                cur.execute(f"{sql} WHERE `{self.pk}` IN ({ph})", tuple(params) + chunk)
+                affected += cur.rowcount
+            new = self._snapshot_rows(cur, pks)
+            changes = [(old.get(k), new.get(k)) for k in pks if k in old]
+            if self.rollup is not None:
+                self.rollup(cur, changes)
+        bump_table_version(self.table_name)
+        if self._tracks_rows():
+            for o, n in changes:
+                quick_index().apply_change(self.table_name, o, n)
+        return affected
+
+    def _apply_writes(self, pks):
+        """Versi banyak baris dari _apply_write: baris tampilan diambil per potongan IN."""
+        found = set()
+        for ph, chunk in in_chunks(pks):
+            sql, params = self.model.rows_query(ph, chunk)
+            for r in select_rows(sql, params):
+                values = tuple(r.get(c) for c in self.view_cols)
+                found.add(values[0])
+                self.model.upsert_row(values)
+        for k in pks:
+            if k not in found:
+                self.model.remove_key(k)
+
+    def _apply_write(self, pk_val):
+        """Ambil ulang 1 baris tampilan berdasarkan PK lalu sisipkan ke model."""
+        rows = select_prepared(*self.model.row_query(pk_val))
+        if rows:
+            self.model.upsert_row(tuple(rows[0].get(c) for c in self.view_cols))
+        else:
+            self.model.remove_key(pk_val)
+
     def add_record(self):
         try:
+            self._refresh_fk()
             dlg = RecordDialog(f"Tambah - {self.title}", self.form_fields, parent=self)
             if dlg.exec() != QDialog.Accepted:
                 return
             data = dlg.values()
 
-            cols = self.insert_cols
-            placeholders = ", ".join(["%s"] * len(cols))
-            col_sql = ", ".join([f"`{c}`" for c in cols])
-            sql = f"INSERT INTO `{self.table_name}` ({col_sql}) VALUES ({placeholders});"
-            execute(sql, tuple(data[c] for c in cols))
+            new_pk = self._write("insert", tuple(data[c] for c in self.insert_cols))
 
-            self.load_data()
+            self._apply_write(new_pk)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
     def edit_record(self):
         try:
-            pk_val = self._selected_pk()
-            if not pk_val:
-                QMessageBox.information(self, "Info", "Pilih 1 baris dulu.")
+            pks = self._selected_pks()
+            if not pks:
+                QMessageBox.information(self, "Info", "Pilih baris dulu.")
+                return
+            if len(pks) > 1:
+                self.batch_edit(pks)
                 return
+            pk_val = pks[0]
 
             initial = self._fetch_row_by_pk(pk_val)
+            self._refresh_fk()
             dlg = RecordDialog(f"Edit - {self.title}", self.form_fields, initial=initial, parent=self)
             if dlg.exec() != QDialog.Accepted:
                 return
             data = dlg.values()
 
-            sets = ", ".join([f"`{c}`=%s" for c in self.update_cols])
-            sql = f"UPDATE `{self.table_name}` SET {sets} WHERE `{self.pk}`=%s;"
-            execute(sql, tuple(data[c] for c in self.update_cols) + (pk_val,))
+            self._write("update", tuple(data[c] for c in self.update_cols) + (pk_val,), pk_val)
 
-            self.load_data()
+            self._apply_write(pk_val)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def batch_edit(self, pks):
+        """Ubah satu kolom (mis. driver_id, metode) untuk semua baris terpilih sekaligus."""
+        fields = [f for f in self.form_fields if f["name"] in self.update_cols]
+        labels = [f["label"] for f in fields]
+        label, ok = QInputDialog.getItem(
+            self, f"Edit {len(pks)} data", "Kolom yang diubah:", labels, 0, False
+        )
+        if not ok:
+            return
+        field = fields[labels.index(label)]
+
+        self._refresh_fk()
+        dlg = RecordDialog(f"Edit {len(pks)} data - {self.title}", [field], parent=self)
+        if dlg.exec() != QDialog.Accepted:
+            return
+        value = dlg.values()[field["name"]]
+
+        sql = f"UPDATE `{self.table_name}` SET `{field['name']}`=%s"
+        self._write_many(sql, (value,), pks)
+        self._apply_writes(pks)
+
     def delete_record(self):
         try:
-            pk_val = self._selected_pk()
-            if not pk_val:
-                QMessageBox.information(self, "Info", "Pilih 1 baris dulu.")
+            pks = self._selected_pks()
+            if not pks:
+                QMessageBox.information(self, "Info", "Pilih baris dulu.")
                 return
 
-            if QMessageBox.question(self, "Konfirmasi", f"Hapus data {self.pk}={pk_val}?") != QMessageBox.Yes:
+            msg = f"Hapus data {self.pk}={pks[0]}?" if len(pks) == 1 else f"Hapus {len(pks)} data terpilih?"
+            if QMessageBox.question(self, "Konfirmasi", msg) != QMessageBox.Yes:
                 return
 
-            sql = f"DELETE FROM `{self.table_name}` WHERE `{self.pk}`=%s;"
-            execute(sql, (pk_val,))
-            self.load_data()
+            if len(pks) == 1:
+                self._write("delete", (pks[0],), pks[0])
+            else:
+                self._write_many(f"DELETE FROM `{self.table_name}`", (), pks)
+            for pk_val in pks:
+                self.model.remove_key(pk_val)
         except Exception as e:
             QMessageBox.critical(self, "Error", str(e))
 
+    def export_data(self):
+        """
+        Export semua baris sesuai pencarian & urutan sekarang (bukan hanya
+        halaman yang dimuat) ke CSV/XLSX/Parquet.
+        """
+        path, selected = QFileDialog.getSaveFileName(self, f"Export {self.title}", self.title, FILE_FILTER)
+        if not path:
+            return
+        path = with_extension(path, selected)
+        sql, params = self.model.query_sql()
+
+        self.btn_export.setEnabled(False)
+        self.lbl_status.setText("Export...")
+        executor().submit(
+            (self, "export"),
+            lambda conn: export_query(path, sql, params, conn=conn, progress=self.exportProgress.emit),
+            lambda n: self._export_finished(f"Data tersimpan ({n} baris):\n{path}"),
+            lambda msg: self._export_finished(f"Gagal export:\n{msg}", error=True),
+            read_only=True,
+        )
+
+    def import_csv(self):
+        dlg = ImportDialog(self.table_name, parent=self)
+        dlg.finishedImport.connect(self._import_finished)
+        dlg.exec()
+
+    def _import_finished(self, table, inserted):
+        if not inserted:
+            return
+        bump_table_version(table)
+        if table == self.table_name:
+            self.load_data()
+
+    def _export_finished(self, msg, error=False):
+        self.btn_export.setEnabled(True)
+        self.lbl_status.setText("Memuat..." if self.model.is_loading() else "")
+        if error:
+            QMessageBox.critical(self, "Error", msg)
+        else:
+            QMessageBox.information(self, "Sukses", msg)
+
 
 # ---------- concrete pages ----------
 class UsersPage(CrudPage):
+    VIEW_QUERY = "SELECT user_id, nama, email, no_hp, password FROM users"
+    KEY_COL = "user_id"
+    SEARCH_COLS = ["nama", "email", "no_hp"]
+
     def __init__(self):
         super().__init__(
             "Users",
-            view_query="SELECT user_id, nama, email, no_hp, password FROM users ORDER BY user_id DESC;",
+            view_query=self.VIEW_QUERY,
+            key_col=self.KEY_COL,
+            search_cols=self.SEARCH_COLS,
             view_cols=["user_id", "nama", "email", "no_hp", "password"],
             table="users",
             pk="user_id",
@@ -284,20 +574,25 @@ class UsersPage(CrudPage):
         )
 
 class DriversPage(CrudPage):
+    VIEW_QUERY = """
+        SELECT d.driver_id, d.user_id, u.nama AS nama_driver, u.no_hp, d.plat_nomor, d.jenis_motor
+        FROM drivers d
+        JOIN users u ON u.user_id = d.user_id
+    """
+    KEY_COL = "d.driver_id"
+    SEARCH_COLS = ["nama_driver", "no_hp", "plat_nomor", "jenis_motor"]
+
     def __init__(self):
         super().__init__(
             "Drivers",
-            view_query="""
-                SELECT d.driver_id, d.user_id, u.nama AS nama_driver, u.no_hp, d.plat_nomor, d.jenis_motor
-                FROM drivers d
-                JOIN users u ON u.user_id = d.user_id
-                ORDER BY d.driver_id DESC;
-            """,
+            view_query=self.VIEW_QUERY,
+            key_col=self.KEY_COL,
+            search_cols=self.SEARCH_COLS,
             view_cols=["driver_id", "user_id", "nama_driver", "no_hp", "plat_nomor", "jenis_motor"],
             table="drivers",
             pk="driver_id",
             form_fields=[
-                {"name": "user_id", "label": "Pilih User (Driver)", "type": "fk", "options": load_users_options()},
+                {"name": "user_id", "label": "Pilih User (Driver)", "type": "fk", "source": "users"},
                 {"name": "plat_nomor", "label": "Plat Nomor", "type": "text"},
                 {"name": "jenis_motor", "label": "Jenis Motor", "type": "text"},
             ],
@@ -306,10 +601,16 @@ class DriversPage(CrudPage):
         )
 
 class AdminPage(CrudPage):
+    VIEW_QUERY = "SELECT admin_id, nama, email, no_hp, password FROM admin"
+    KEY_COL = "admin_id"
+    SEARCH_COLS = ["nama", "email", "no_hp"]
+
     def __init__(self):
         super().__init__(
             "Admin",
-            view_query="SELECT admin_id, nama, email, no_hp, password FROM admin ORDER BY admin_id DESC;",
+            view_query=self.VIEW_QUERY,
+            key_col=self.KEY_COL,
+            search_cols=self.SEARCH_COLS,
             view_cols=["admin_id", "nama", "email", "no_hp", "password"],
             table="admin",
             pk="admin_id",
@@ -324,31 +625,36 @@ class AdminPage(CrudPage):
         )
 
 class OrdersPage(CrudPage):
+    VIEW_QUERY = """
+        SELECT o.pesanan_id,
+               o.pelanggan_id,
+               p.nama AS pelanggan,
+               o.driver_id,
+               u.nama AS driver,
+               o.titik_awal,
+               o.titik_tujuan,
+               o.jarak,
+               o.biaya
+        FROM orders o
+        JOIN users p ON p.user_id = o.pelanggan_id
+        JOIN drivers d ON d.driver_id = o.driver_id
+        JOIN users u ON u.user_id = d.user_id
+    """
+    KEY_COL = "o.pesanan_id"
+    SEARCH_COLS = ["pelanggan", "driver", "titik_awal", "titik_tujuan"]
+
     def __init__(self):
         super().__init__(
             "Pesanan",
-            view_query="""
-                SELECT o.pesanan_id,
-                       o.pelanggan_id,
-                       p.nama AS pelanggan,
-                       o.driver_id,
-                       u.nama AS driver,
-                       o.titik_awal,
-                       o.titik_tujuan,
-                       o.jarak,
-                       o.biaya
-                FROM orders o
-                JOIN users p ON p.user_id = o.pelanggan_id
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u ON u.user_id = d.user_id
-                ORDER BY o.pesanan_id DESC;
-            """,
+            view_query=self.VIEW_QUERY,
+            key_col=self.KEY_COL,
+            search_cols=self.SEARCH_COLS,
             view_cols=["pesanan_id", "pelanggan_id", "pelanggan", "driver_id", "driver", "titik_awal", "titik_tujuan", "jarak", "biaya"],
             table="orders",
             pk="pesanan_id",
             form_fields=[
-                {"name": "pelanggan_id", "label": "Pilih Pelanggan", "type": "fk", "options": load_users_options()},
-                {"name": "driver_id", "label": "Pilih Driver", "type": "fk", "options": load_drivers_options()},
+                {"name": "pelanggan_id", "label": "Pilih Pelanggan", "type": "fk", "source": "users"},
+                {"name": "driver_id", "label": "Pilih Driver", "type": "fk", "source": "drivers"},
                 {"name": "titik_awal", "label": "Titik Awal", "type": "text"},
                 {"name": "titik_tujuan", "label": "Titik Tujuan", "type": "text"},
                 {"name": "jarak", "label": "Jarak (KM)", "type": "float"},
@@ -356,34 +662,41 @@ class OrdersPage(CrudPage):
             ],
             insert_cols=["pelanggan_id", "driver_id", "titik_awal", "titik_tujuan", "jarak", "biaya"],
             update_cols=["pelanggan_id", "driver_id", "titik_awal", "titik_tujuan", "jarak", "biaya"],
+            rollup=apply_order_changes,
         )
 
 class PaymentsPage(CrudPage):
+    VIEW_QUERY = """
+        SELECT pay.payment_id,
+               pay.pesanan_id,
+               p.nama AS pelanggan,
+               u.nama AS driver,
+               pay.metode,
+               pay.jumlah
+        FROM payments pay
+        JOIN orders o ON o.pesanan_id = pay.pesanan_id
+        JOIN users p ON p.user_id = o.pelanggan_id
+        JOIN drivers d ON d.driver_id = o.driver_id
+        JOIN users u ON u.user_id = d.user_id
+    """
+    KEY_COL = "pay.payment_id"
+    SEARCH_COLS = ["pelanggan", "driver", "metode"]
+
     def __init__(self):
         super().__init__(
             "Pembayaran",
-            view_query="""
-                SELECT pay.payment_id,
-                       pay.pesanan_id,
-                       p.nama AS pelanggan,
-                       u.nama AS driver,
-                       pay.metode,
-                       pay.jumlah
-                FROM payments pay
-                JOIN orders o ON o.pesanan_id = pay.pesanan_id
-                JOIN users p ON p.user_id = o.pelanggan_id
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u ON u.user_id = d.user_id
-                ORDER BY pay.payment_id DESC;
-            """,
+            view_query=self.VIEW_QUERY,
+            key_col=self.KEY_COL,
+            search_cols=self.SEARCH_COLS,
             view_cols=["payment_id", "pesanan_id", "pelanggan", "driver", "metode", "jumlah"],
             table="payments",
             pk="payment_id",
             form_fields=[
-                {"name": "pesanan_id", "label": "Pilih Pesanan", "type": "fk", "options": load_orders_options()},
+                {"name": "pesanan_id", "label": "Pilih Pesanan", "type": "fk", "source": "orders"},
                 {"name": "metode", "label": "Metode", "type": "enum", "options": ["cash", "e-wallet", "kartu"]},
                 {"name": "jumlah", "label": "Jumlah", "type": "float"},
             ],
             insert_cols=["pesanan_id", "metode", "jumlah"],
             update_cols=["pesanan_id", "metode", "jumlah"],
+            rollup=apply_payment_changes,
         )
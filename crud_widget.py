@@ -3,14 +3,15 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import Any, Dict, List, Optional, Tuple
 
-from PySide6.QtCore import Qt, QAbstractTableModel
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableView,
     QMessageBox, QDialog, QFormLayout, QLineEdit, QDialogButtonBox,
-    QSpacerItem, QSizePolicy, QLabel
+    QSpacerItem, QSizePolicy, QLabel, QInputDialog
 )
 
-from db import get_conn
+from db import connection, in_chunks, mark_write, run_prepared
+from schema_cache import schema_cache
 
 
 @dataclass
@@ -20,47 +21,67 @@ class ColumnInfo:
     is_auto: bool
     nullable: bool
     col_type: str
+    fk: Optional[Tuple[str, str]] = None   # (tabel, kolom) referensi
 
 
 def _fetch_columns(table: str) -> List[ColumnInfo]:
-    conn = get_conn()
-    try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(f"SHOW COLUMNS FROM `{table}`")
-        rows = cur.fetchall()
-
-        cols: List[ColumnInfo] = []
-        for r in rows:
-            name = r["Field"]
-            key = r["Key"]  # PRI
-            extra = r["Extra"]  # auto_increment
-            null = r["Null"]  # YES/NO
-            ctype = r["Type"]
-
-            cols.append(
-                ColumnInfo(
-                    name=name,
-                    is_pk=(key == "PRI"),
-                    is_auto=("auto_increment" in (extra or "")),
-                    nullable=(null == "YES"),
-                    col_type=ctype,
-                )
-            )
-        return cols
-    finally:
-        conn.close()
+    # metadata semua tabel dari satu query information_schema, di-cache ke disk
+    return [
+        ColumnInfo(
+            name=c["name"],
+            is_pk=c["is_pk"],
+            is_auto=c["is_auto"],
+            nullable=c["nullable"],
+            col_type=c["col_type"],
+            fk=tuple(c["fk"]) if c["fk"] else None,
+        )
+        for c in schema_cache().columns(table)
+    ]
+
+
+def _fetch_one(sql: str, pk_val: Any) -> Optional[List[Any]]:
+    """Satu baris lewat statement SELECT-per-PK yang sudah di-prepare."""
+    with connection() as conn:
+        rows = run_prepared(conn, sql, (pk_val,), dictionary=False).fetchall()
+        return list(rows[0]) if rows else None
+
+
+def _build_statements(table: str, columns: List[ColumnInfo], pk_col: Optional[ColumnInfo]) -> Dict[str, str]:
+    """SQL CRUD tabel ini, dibuat sekali per widget (lihat db.run_prepared)."""
+    t = f"`{table}`"
+    ins = [c.name for c in columns if not c.is_auto]
+    stmts = {
+        "insert": f"INSERT INTO {t} ({', '.join(f'`{c}`' for c in ins)}) VALUES ({', '.join(['%s'] * len(ins))})",
+    }
+    if pk_col:
+        pk = f"`{pk_col.name}`"
+        sets = ", ".join(f"`{c.name}`=%s" for c in columns if not (c.is_pk or c.is_auto))
+        stmts["update"] = f"UPDATE {t} SET {sets} WHERE {pk}=%s"
+        stmts["delete"] = f"DELETE FROM {t} WHERE {pk}=%s"
+        stmts["select_pk"] = f"SELECT * FROM {t} WHERE {pk}=%s"
+    return stmts
+
+
+def _fetch_many(table: str, pk: str, pk_vals: List[Any]) -> Dict[Any, List[Any]]:
+    """{pk: baris} untuk banyak PK, satu query per potongan IN."""
+    out: Dict[Any, List[Any]] = {}
+    with connection() as conn:
+        cur = conn.cursor()
+        for ph, chunk in in_chunks(pk_vals):
+            cur.execute(f"SELECT * FROM `{table}` WHERE `{pk}` IN ({ph})", chunk)
+            pk_i = [d[0] for d in cur.description].index(pk)
+            for r in cur.fetchall():
+                out[r[pk_i]] = list(r)
+        return out
 
 
 def _fetch_all(table: str) -> Tuple[List[str], List[List[Any]]]:
-    conn = get_conn()
-    try:
+    with connection(read_only=True) as conn:
         cur = conn.cursor()
         cur.execute(f"SELECT * FROM `{table}`")
         rows = cur.fetchall()
         headers = [d[0] for d in cur.description]
         return headers, [list(r) for r in rows]
-    finally:
-        conn.close()
 
 
 class TableModel(QAbstractTableModel):
@@ -90,6 +111,28 @@ class TableModel(QAbstractTableModel):
             return self.headers[section]
         return str(section + 1)
 
+    # ---------- perubahan lokal (tanpa query ulang seluruh tabel) ----------
+    def append_row(self, values: List[Any]):
+        pos = len(self.data_rows)
+        self.beginInsertRows(QModelIndex(), pos, pos)
+        self.data_rows.append(values)
+        self.endInsertRows()
+
+    def replace_row(self, row: int, values: List[Any]):
+        self.data_rows[row] = values
+        self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.headers) - 1))
+
+    def remove_row(self, row: int):
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.data_rows[row]
+        self.endRemoveRows()
+
+    def find_row(self, col: int, value: Any) -> Optional[int]:
+        for i, r in enumerate(self.data_rows):
+            if r[col] == value:
+                return i
+        return None
+
 
 class RecordDialog(QDialog):
     """
@@ -116,7 +159,7 @@ class RecordDialog(QDialog):
             if col.is_auto:
                 continue
             le = QLineEdit()
-            le.setPlaceholderText(col.col_type)
+            le.setPlaceholderText(col.col_type if not col.fk else f"{col.col_type} -> {col.fk[0]}.{col.fk[1]}")
             if col.name in self.initial and self.initial[col.name] is not None:
                 le.setText(str(self.initial[col.name]))
             self.inputs[col.name] = le
@@ -144,6 +187,7 @@ class CrudWidget(QWidget):
 
         self.columns = _fetch_columns(table)
         self.pk_col = next((c for c in self.columns if c.is_pk), None)
+        self.statements = _build_statements(table, self.columns, self.pk_col)
 
         root = QVBoxLayout(self)
 
@@ -166,7 +210,7 @@ class CrudWidget(QWidget):
 
         self.tableView = QTableView()
         self.tableView.setSelectionBehavior(QTableView.SelectRows)
-        self.tableView.setSelectionMode(QTableView.SingleSelection)
+        self.tableView.setSelectionMode(QTableView.ExtendedSelection)
         root.addWidget(self.tableView)
 
         # Bottom bar: Report di kanan bawah
@@ -205,32 +249,62 @@ class CrudWidget(QWidget):
             d[name] = self.model.data_rows[row][c]
         return d
 
+    def _selected_pk_vals(self) -> List[Any]:
+        pk_i = self.model.headers.index(self.pk_col.name)
+        rows = sorted({idx.row() for idx in self.tableView.selectionModel().selectedRows()})
+        return [self.model.data_rows[r][pk_i] for r in rows]
+
+    def _execute_prepared(self, statement: str, params: List[Any]) -> Tuple[Any, int]:
+        """
+        Jalankan self.statements[statement] lalu commit; return (lastrowid, rowcount).
+        Nilainya dibaca sebelum koneksi kembali ke pool: cursor prepared
+        milik cache koneksi dan bisa dipakai ulang pemanggil lain.
+        """
+        with connection() as conn:
+            try:
+                cur = run_prepared(conn, self.statements[statement], params, dictionary=False)
+                result = cur.lastrowid, cur.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+            mark_write()
+            return result
+
+    def _execute_in(self, sql: str, params: List[Any], pk_vals: List[Any]) -> int:
+        """sql + WHERE pk IN (...) dipecah per potongan, semuanya satu transaksi."""
+        affected = 0
+        with connection() as conn:
+            cur = conn.cursor()
+            try:
+                for ph, chunk in in_chunks(pk_vals):
+                    cur.execute(f"{sql} WHERE `{self.pk_col.name}` IN ({ph})", tuple(params) + chunk)
+                    affected += cur.rowcount
+                conn.commit()
+            except Exception:
+                conn.rollback()
+                raise
+        mark_write()
+        return affected
+
     def add_row(self):
         dlg = RecordDialog(f"Tambah {self.title}", self.columns, initial=None)
         if dlg.exec() != QDialog.Accepted:
             return
 
         vals = dlg.get_values()
-        cols = []
-        ph = []
-        params = []
-
-        for col in self.columns:
-            if col.is_auto:
-                continue
-            cols.append(f"`{col.name}`")
-            ph.append("%s")
-            params.append(vals.get(col.name))
-
-        q = f"INSERT INTO `{self.table}` ({', '.join(cols)}) VALUES ({', '.join(ph)})"
+        params = [vals.get(col.name) for col in self.columns if not col.is_auto]
 
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute(q, params)
-            conn.commit()
-            conn.close()
-            self.refresh()
+            new_id, _ = self._execute_prepared("insert", params)
+
+            if not self.pk_col:
+                self.refresh()
+                return
+            pk_val = new_id if self.pk_col.is_auto else vals.get(self.pk_col.name)
+            row = _fetch_one(self.statements["select_pk"], pk_val)
+            if row is not None:
+                self.model.append_row(row)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal tambah data:\n{e}")
 
@@ -239,6 +313,10 @@ class CrudWidget(QWidget):
             QMessageBox.warning(self, "Info", "Tabel ini tidak punya primary key. Edit otomatis tidak bisa.")
             return
 
+        if len(self.tableView.selectionModel().selectedRows()) > 1:
+            self.batch_edit()
+            return
+
         row = self._current_row_dict()
         if not row:
             QMessageBox.information(self, "Info", "Pilih 1 baris dulu.")
@@ -249,27 +327,50 @@ class CrudWidget(QWidget):
             return
 
         vals = dlg.get_values()
-
-        set_parts = []
-        params = []
-        for col in self.columns:
-            if col.is_pk or col.is_auto:
-                continue
-            set_parts.append(f"`{col.name}`=%s")
-            params.append(vals.get(col.name))
-
         pk_val = row.get(self.pk_col.name)
+        params = [vals.get(col.name) for col in self.columns if not (col.is_pk or col.is_auto)]
         params.append(pk_val)
 
-        q = f"UPDATE `{self.table}` SET {', '.join(set_parts)} WHERE `{self.pk_col.name}`=%s"
+        try:
+            self._execute_prepared("update", params)
+
+            row_idx = self.tableView.currentIndex().row()
+            fresh = _fetch_one(self.statements["select_pk"], pk_val)
+            if fresh is None:
+                self.model.remove_row(row_idx)
+            else:
+                self.model.replace_row(row_idx, fresh)
+        except Exception as e:
+            QMessageBox.critical(self, "Error", f"Gagal edit data:\n{e}")
+
+    def batch_edit(self):
+        """Ubah satu kolom untuk semua baris terpilih dalam satu transaksi."""
+        pk_vals = self._selected_pk_vals()
+        editable = [c for c in self.columns if not (c.is_pk or c.is_auto)]
+        name, ok = QInputDialog.getItem(
+            self, f"Edit {len(pk_vals)} data", "Kolom yang diubah:", [c.name for c in editable], 0, False
+        )
+        if not ok:
+            return
+        col = next(c for c in editable if c.name == name)
+
+        dlg = RecordDialog(f"Edit {len(pk_vals)} data {self.title}", [col])
+        if dlg.exec() != QDialog.Accepted:
+            return
+        value = dlg.get_values().get(col.name)
 
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute(q, params)
-            conn.commit()
-            conn.close()
-            self.refresh()
+            self._execute_in(f"UPDATE `{self.table}` SET `{col.name}`=%s", [value], pk_vals)
+            fresh = _fetch_many(self.table, self.pk_col.name, pk_vals)
+            pk_i = self.model.headers.index(self.pk_col.name)
+            for pk_val in pk_vals:
+                row_idx = self.model.find_row(pk_i, pk_val)
+                if row_idx is None:
+                    continue
+                if pk_val in fresh:
+                    self.model.replace_row(row_idx, fresh[pk_val])
+                else:
+                    self.model.remove_row(row_idx)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal edit data:\n{e}")
 
@@ -278,30 +379,30 @@ class CrudWidget(QWidget):
             QMessageBox.warning(self, "Info", "Tabel ini tidak punya primary key. Hapus otomatis tidak bisa.")
             return
 
-        row = self._current_row_dict()
-        if not row:
-            QMessageBox.information(self, "Info", "Pilih 1 baris dulu.")
+        pk_vals = self._selected_pk_vals()
+        if not pk_vals:
+            QMessageBox.information(self, "Info", "Pilih baris dulu.")
             return
 
-        pk_val = row.get(self.pk_col.name)
-
+        detail = f"{self.pk_col.name}={pk_vals[0]}" if len(pk_vals) == 1 else f"{len(pk_vals)} baris terpilih"
         ok = QMessageBox.question(
             self, "Konfirmasi",
-            f"Yakin hapus data {self.title}?\n{self.pk_col.name}={pk_val}",
+            f"Yakin hapus data {self.title}?\n{detail}",
             QMessageBox.Yes | QMessageBox.No
         )
         if ok != QMessageBox.Yes:
             return
 
-        q = f"DELETE FROM `{self.table}` WHERE `{self.pk_col.name}`=%s"
-
         try:
-            conn = get_conn()
-            cur = conn.cursor()
-            cur.execute(q, (pk_val,))
-            conn.commit()
-            conn.close()
-            self.refresh()
+            if len(pk_vals) == 1:
+                self._execute_prepared("delete", [pk_vals[0]])
+            else:
+                self._execute_in(f"DELETE FROM `{self.table}`", [], pk_vals)
+
+            pk_i = self.model.headers.index(self.pk_col.name)
+            for pk_val in pk_vals:
+                row_idx = self.model.find_row(pk_i, pk_val)
+                if row_idx is not None:
+                    self.model.remove_row(row_idx)
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Gagal hapus data:\n{e}")
-
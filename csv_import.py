@@ -0,0 +1,353 @@
+"""
+Import CSV massal untuk users, drivers, orders dan payments.
+
+- file dibaca baris per baris (tidak dimuat utuh ke memori)
+- referensi FK dicek ke set id yang sudah ada (satu query per tabel
+  referensi di awal, bukan satu query per baris)
+- baris valid di-insert dengan executemany per batch, satu transaksi per
+  batch; tabel rekap (rollup.py) ikut diperbarui di transaksi yang sama
+- baris yang tidak valid dilewati dan dicatat (nomor baris + pesan)
+- indeks quick search diperbarui dengan id asli tiap baris: berurutan dari
+  lastrowid hanya jika innodb_autoinc_lock_mode 0/1; di mode 2 (default
+  MySQL 8) id dibaca ulang lewat kolom unik (email), dan tabel tanpa kolom
+  unik membangun ulang indeks setelah import selesai
+
+Baris pertama CSV = header; kolom yang dibutuhkan lihat SPECS (kolom lain
+diabaikan, PK tidak diisi karena AUTO_INCREMENT).
+
+Pemakaian:
+    python csv_import.py users data_users.csv
+    python csv_import.py orders pesanan.csv --batch 2000 --errors gagal.csv
+"""
+import csv
+import io
+import sys
+import time
+from decimal import Decimal, InvalidOperation
+
+import mysql.connector
+
+from db import connection, in_chunks, mark_write, stream_query
+from rollup import apply_order_batch, apply_payment_batch, ensure_tables
+from trigram_index import INDEXED_TABLES, quick_index
+
+# kolom: (nama, tipe, batas) -> tipe "text" (batas = panjang maks),
+# "int", "decimal" (batas = nilai maks), "enum" (batas = pilihan)
+SPECS = {
+    "users": {
+        "pk": "user_id",
+        "columns": [("nama", "text", 100), ("email", "text", 100),
+                    ("no_hp", "text", 20), ("password", "text", 100)],
+        "unique": ["email"],
+    },
+    "drivers": {
+        "pk": "driver_id",
+        "columns": [("user_id", "int", None), ("plat_nomor", "text", 8),
+                    ("jenis_motor", "text", 50)],
+        "fk": {"user_id": ("users", "user_id")},
+    },
+    "orders": {
+        "pk": "pesanan_id",
+        "columns": [("pelanggan_id", "int", None), ("driver_id", "int", None),
+                    ("titik_awal", "text", 100), ("titik_tujuan", "text", 100),
+                    ("jarak", "decimal", Decimal("999.99")), ("biaya", "decimal", Decimal("99999999.99"))],
+        "fk": {"pelanggan_id": ("users", "user_id"), "driver_id": ("drivers", "driver_id")},
+        "rollup": apply_order_batch,
+    },
+    "payments": {
+        "pk": "payment_id",
+        "columns": [("pesanan_id", "int", None), ("metode", "enum", ("cash", "e-wallet", "kartu")),
+                    ("jumlah", "decimal", Decimal("99999999.99"))],
+        "fk": {"pesanan_id": ("orders", "pesanan_id")},
+        "rollup": apply_payment_batch,
+    },
+}
+
+MAX_KEPT_ERRORS = 1000   # pesan error yang disimpan di memori (sisanya hanya dihitung / ke file)
+
+
+class ImportStats:
+    def __init__(self, size=0):
+        self.t0 = time.perf_counter()
+        self.size = size          # ukuran file (byte), untuk persen
+        self.pos = 0              # byte yang sudah dibaca
+        self.read = 0
+        self.inserted = 0
+        self.failed = 0
+        self.errors = []          # (no baris, pesan), paling banyak MAX_KEPT_ERRORS
+        self.rebuild_index = False  # id batch tidak pasti -> indeks quick search dibangun ulang
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self.t0
+
+    @property
+    def rows_per_sec(self):
+        return self.read / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def percent(self):
+        return min(100, int(self.pos * 100 / self.size)) if self.size else 0
+
+    def summary(self):
+        return (f"{self.read} baris dibaca, {self.inserted} masuk, {self.failed} gagal "
+                f"({self.elapsed:.1f} dtk, {self.rows_per_sec:.0f} baris/dtk)")
+
+
+# ---------- validasi ----------
+def load_id_set(conn, table, column):
+    """Semua id yang sudah ada di table.column (dibaca streaming)."""
+    _, rows = stream_query(conn, f"SELECT `{column}` FROM `{table}`", batch=10000)
+    return {r[0] for r in rows}
+
+
+def _parse(value, kind, limit):
+    value = (value or "").strip()
+    if value == "":
+        raise ValueError("wajib diisi")
+    if kind == "int":
+        try:
+            return int(value)
+        except ValueError:
+            raise ValueError(f"bukan angka bulat: {value!r}")
+    if kind == "decimal":
+        try:
+            num = Decimal(value.replace(",", "."))
+        except InvalidOperation:
+            raise ValueError(f"bukan angka: {value!r}")
+        if num < 0 or num > limit:
+            raise ValueError(f"di luar batas 0..{limit}: {value}")
+        return num.quantize(Decimal("0.01"))
+    if kind == "enum":
+        if value not in limit:
+            raise ValueError(f"harus salah satu dari {', '.join(limit)}: {value!r}")
+        return value
+    if limit and len(value) > limit:
+        raise ValueError(f"lebih dari {limit} karakter")
+    return value
+
+
+class RowValidator:
+    def __init__(self, conn, table):
+        self.spec = SPECS[table]
+        # set id referensi dimuat sekali di awal
+        self.fk_ids = {col: load_id_set(conn, ref_table, ref_col)
+                       for col, (ref_table, ref_col) in self.spec.get("fk", {}).items()}
+        # kolom unik dibandingkan tanpa beda huruf besar/kecil (collation *_ci)
+        self.seen = {col: {str(v).lower() for v in load_id_set(conn, table, col)}
+                     for col in self.spec.get("unique", [])}
+
+    def __call__(self, raw):
+        """dict dari CSV -> dict bersih; ValueError berisi semua masalah baris."""
+        row, problems = {}, []
+        for name, kind, limit in self.spec["columns"]:
+            try:
+                row[name] = _parse(raw.get(name), kind, limit)
+            except ValueError as e:
+                problems.append(f"{name} {e}")
+        for col, ids in self.fk_ids.items():
+            if col in row and row[col] not in ids:
+                problems.append(f"{col}={row[col]} tidak ada")
+        for col, seen in self.seen.items():
+            if col in row and row[col].lower() in seen:
+                problems.append(f"{col} {row[col]!r} sudah dipakai")
+        if problems:
+            raise ValueError("; ".join(problems))
+        for col, seen in self.seen.items():
+            seen.add(row[col].lower())
+        return row
+
+
+# ---------- insert ----------
+def insert_sql(table):
+    cols = [c for c, _, _ in SPECS[table]["columns"]]
+    return (f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in cols)}) "
+            f"VALUES ({', '.join(['%s'] * len(cols))})")
+
+
+def autoinc_sequential(conn):
+    """
+    True jika satu INSERT multi-baris pasti dapat id AUTO_INCREMENT berurutan
+    (innodb_autoinc_lock_mode 0/1). Mode 2 (interleaved, default MySQL 8)
+    bisa menyelipkan id dari insert lain di tengahnya.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("SELECT @@innodb_autoinc_lock_mode")
+        return cur.fetchone()[0] in (0, 1)
+    except mysql.connector.Error:
+        return False
+    finally:
+        cur.close()
+
+
+def _read_back_ids(cur, table, rows, first_id):
+    """
+    Id tiap baris batch dibaca ulang lewat kolom unik (di transaksi yang
+    sama, sebelum commit). None jika tabel tidak punya kolom unik atau ada
+    baris yang tidak ketemu.
+    """
+    spec = SPECS[table]
+    if not spec.get("unique"):
+        return None
+    pk, col = spec["pk"], spec["unique"][0]
+    found = {}
+    for ph, chunk in in_chunks([r[col] for r in rows]):
+        cur.execute(f"SELECT `{pk}`, `{col}` FROM `{table}` WHERE `{pk}` >= %s AND `{col}` IN ({ph})",
+                    (first_id,) + chunk)
+        # collation *_ci: bandingkan tanpa beda huruf besar/kecil
+        found.update((str(v).casefold(), k) for k, v in cur.fetchall())
+    ids = [found.get(str(r[col]).casefold()) for r in rows]
+    return None if None in ids else ids
+
+
+def _insert_batch(conn, table, rows, sequential=False):
+    """
+    Satu transaksi: executemany + update rekap.
+    Return list id baris (urut sesuai rows), atau None jika tidak bisa dipastikan.
+    """
+    spec = SPECS[table]
+    cols = [c for c, _, _ in spec["columns"]]
+    cur = conn.cursor()
+    try:
+        cur.executemany(insert_sql(table), [tuple(r[c] for c in cols) for r in rows])
+        first_id = cur.lastrowid
+        if len(rows) == 1 or sequential:
+            ids = list(range(first_id, first_id + len(rows)))
+        else:
+            ids = _read_back_ids(cur, table, rows, first_id)
+        if "rollup" in spec:
+            spec["rollup"](cur, rows)
+        conn.commit()
+        mark_write()
+        return ids
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cur.close()
+
+
+def _index_in_use(table):
+    # hanya kalau indeks quick search dipakai di proses ini (aplikasi GUI)
+    index = quick_index()
+    return table in INDEXED_TABLES and (index.ready or index.building)
+
+
+def _update_index(table, rows, ids, stats):
+    if not _index_in_use(table):
+        return
+    if ids is None:
+        stats.rebuild_index = True   # dibangun ulang sekali di akhir import
+        return
+    pk = SPECS[table]["pk"]
+    for row, pk_val in zip(rows, ids):
+        quick_index().apply_change(table, None, dict(row, **{pk: pk_val}))
+
+
+def _flush(conn, table, batch, stats, on_error, sequential=False):
+    try:
+        rows = [r for _, r in batch]
+        ids = _insert_batch(conn, table, rows, sequential)
+        _update_index(table, rows, ids, stats)
+        stats.inserted += len(batch)
+    except mysql.connector.errors.IntegrityError:
+        # batch ditolak (mis. email dipakai proses lain saat import berjalan):
+        # ulangi per baris supaya hanya baris yang bermasalah yang gagal
+        for line_no, row in batch:
+            try:
+                ids = _insert_batch(conn, table, [row])
+                _update_index(table, [row], ids, stats)
+                stats.inserted += 1
+            except mysql.connector.errors.IntegrityError as e:
+                on_error(line_no, str(e))
+
+
+def import_csv(path, table, conn=None, batch_size=1000, progress=None, errors_path=None):
+    """
+    Import file CSV ke table. progress(stats) dipanggil setiap selesai satu batch.
+    errors_path: jika diisi, semua baris gagal ditulis ke CSV ini (baris, error).
+    Return ImportStats.
+    """
+    if table not in SPECS:
+        raise RuntimeError(f"Tabel tidak didukung untuk import: {table}")
+    if "rollup" in SPECS[table]:
+        ensure_tables()
+    if conn is None:
+        with connection() as own:
+            return import_csv(path, table, own, batch_size, progress, errors_path)
+
+    raw = open(path, "rb")
+    err_file = open(errors_path, "w", newline="", encoding="utf-8") if errors_path else None
+    try:
+        raw.seek(0, io.SEEK_END)
+        stats = ImportStats(raw.tell())
+        raw.seek(0)
+        reader = csv.DictReader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+
+        needed = [c for c, _, _ in SPECS[table]["columns"]]
+        missing = [c for c in needed if c not in (reader.fieldnames or [])]
+        if missing:
+            raise RuntimeError(f"Kolom CSV kurang: {', '.join(missing)}")
+
+        err_writer = csv.writer(err_file) if err_file else None
+        if err_writer:
+            err_writer.writerow(["baris", "error"])
+
+        def on_error(line_no, msg):
+            stats.failed += 1
+            if len(stats.errors) < MAX_KEPT_ERRORS:
+                stats.errors.append((line_no, msg))
+            if err_writer:
+                err_writer.writerow([line_no, msg])
+
+        validate = RowValidator(conn, table)
+        sequential = autoinc_sequential(conn)
+        batch = []
+        for raw_row in reader:
+            stats.read += 1
+            try:
+                batch.append((reader.line_num, validate(raw_row)))
+            except ValueError as e:
+                on_error(reader.line_num, str(e))
+
+            if len(batch) >= batch_size:
+                _flush(conn, table, batch, stats, on_error, sequential)
+                batch = []
+                stats.pos = raw.tell()
+                if progress:
+                    progress(stats)
+
+        if batch:
+            _flush(conn, table, batch, stats, on_error, sequential)
+        if stats.rebuild_index:
+            quick_index().build(conn)
+        stats.pos = stats.size
+        if progress:
+            progress(stats)
+        return stats
+    finally:
+        raw.close()
+        if err_file:
+            err_file.close()
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if len(args) < 2 or args[0] not in SPECS:
+        print(__doc__)
+        sys.exit(2)
+    table, path = args[0], args[1]
+    batch = int(args[args.index("--batch") + 1]) if "--batch" in args else 1000
+    errors = args[args.index("--errors") + 1] if "--errors" in args else None
+
+    def show(stats):
+        print(f"\r{stats.percent:3d}%  {stats.summary()}", end="", flush=True)
+
+    result = import_csv(path, table, batch_size=batch, progress=show, errors_path=errors)
+    print()
+    for line_no, msg in result.errors[:20]:
+        print(f"  baris {line_no}: {msg}")
+    if result.failed > 20:
+        print(f"  ... dan {result.failed - 20} error lain" + (f" (lihat {errors})" if errors else ""))
+    sys.exit(1 if result.failed else 0)
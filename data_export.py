@@ -0,0 +1,179 @@
+"""
+Export data tabel/report ke CSV, XLSX atau Parquet.
+
+Baris dibaca bertahap dari server (db.stream_query) dan ditulis per chunk,
+jadi memori tetap kecil walau hasilnya jutaan baris. Format dipilih dari
+ekstensi file. XLSX butuh openpyxl, Parquet butuh pyarrow.
+"""
+import csv
+import os
+from decimal import Decimal
+from itertools import islice
+
+from db import connection, stream_query
+
+FILE_FILTER = "CSV (*.csv);;Excel (*.xlsx);;Parquet (*.parquet)"
+CHUNK_SIZE = 5000
+
+
+def _chunks(rows, size):
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+def _write_csv(path, headers, chunks, on_chunk):
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        w = csv.writer(f)
+        w.writerow(headers)
+        for chunk in chunks:
+            w.writerows(chunk)
+            on_chunk(len(chunk))
+
+
+def _write_xlsx(path, headers, chunks, on_chunk):
+    try:
+        from openpyxl import Workbook
+    except ImportError:
+        raise RuntimeError("Export XLSX butuh paket openpyxl (pip install openpyxl).")
+
+    # write_only: baris langsung di-stream ke file, tidak disimpan di memori
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet()
+    ws.append(headers)
+    for chunk in chunks:
+        for row in chunk:
+            # openpyxl tidak menerima Decimal dari MySQL, simpan sebagai float
+            ws.append([float(v) if isinstance(v, Decimal) else v for v in row])
+        on_chunk(len(chunk))
+    wb.save(path)
+
+
+# baris yang paling banyak ditahan untuk menentukan skema Parquet
+PARQUET_SCHEMA_ROWS = 100_000
+
+
+def _parquet_field(pa, field):
+    if pa.types.is_null(field.type):
+        return pa.field(field.name, pa.string())
+    if pa.types.is_decimal(field.type):
+        return pa.field(field.name, pa.decimal128(38, field.type.scale))
+    return field
+
+
+def _write_parquet(path, headers, chunks, on_chunk):
+    """
+    Skema ditentukan setelah tiap kolom punya nilai non-NULL: chunk awal
+    ditahan dulu (paling banyak PARQUET_SCHEMA_ROWS baris). Kolom yang
+    sampai batas itu masih NULL semua jadi string, dan nilainya di chunk
+    berikut ditulis sebagai teks, jadi export tidak gagal di tengah jalan.
+    """
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        raise RuntimeError("Export Parquet butuh paket pyarrow (pip install pyarrow).")
+
+    writer = None
+    schema = None
+    text_cols = set()
+    pending, pending_rows = [], 0
+    seen = [False] * len(headers)
+
+    def columns_of(chunk):
+        cols = {h: [row[i] for row in chunk] for i, h in enumerate(headers)}
+        for h in text_cols:
+            cols[h] = [None if v is None else str(v) for v in cols[h]]
+        return cols
+
+    def open_writer():
+        nonlocal writer, schema
+        # presisi DECIMAL dilebarkan supaya nilai besar di chunk berikut muat
+        sample = pa.Table.from_pydict({h: [row[i] for c in pending for row in c]
+                                       for i, h in enumerate(headers)})
+        schema = pa.schema([_parquet_field(pa, f) for f in sample.schema])
+        text_cols.update(f.name for f in sample.schema if pa.types.is_null(f.type))
+        writer = pq.ParquetWriter(path, schema)
+        for chunk in pending:
+            write(chunk)
+        pending.clear()
+
+    def write(chunk):
+        # satu chunk = satu row group
+        writer.write_table(pa.Table.from_pydict(columns_of(chunk), schema=schema))
+        on_chunk(len(chunk))
+
+    try:
+        for chunk in chunks:
+            if writer is not None:
+                write(chunk)
+                continue
+            pending.append(chunk)
+            pending_rows += len(chunk)
+            for i in range(len(headers)):
+                seen[i] = seen[i] or any(row[i] is not None for row in chunk)
+            if all(seen) or pending_rows >= PARQUET_SCHEMA_ROWS:
+                open_writer()
+        if writer is None and pending:
+            open_writer()
+        if writer is None:
+            pq.write_table(pa.table({h: pa.array([], pa.string()) for h in headers}), path)
+    finally:
+        if writer is not None:
+            writer.close()
+
+
+WRITERS = {
+    ".csv": _write_csv,
+    ".xlsx": _write_xlsx,
+    ".parquet": _write_parquet,
+}
+
+
+def with_extension(path, selected_filter=""):
+    """Tambahkan ekstensi sesuai filter dialog jika user tidak menulisnya."""
+    if os.path.splitext(path)[1].lower() in WRITERS:
+        return path
+    for ext in WRITERS:
+        if ext in selected_filter:
+            return path + ext
+    return path + ".csv"
+
+
+def write_rows(path, headers, rows, progress=None, chunk_size=CHUNK_SIZE):
+    """
+    Tulis rows (iterable tuple, boleh generator) ke path; format dari ekstensi.
+    progress(n) dipanggil setiap selesai satu chunk. Return jumlah baris.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext not in WRITERS:
+        raise RuntimeError(f"Format export tidak dikenal: {ext or path}")
+
+    written = 0
+
+    def on_chunk(n):
+        nonlocal written
+        written += n
+        if progress:
+            progress(written)
+
+    try:
+        WRITERS[ext](path, list(headers), _chunks(rows, chunk_size), on_chunk)
+    except BaseException:
+        # jangan tinggalkan file setengah jadi
+        if os.path.exists(path):
+            os.remove(path)
+        raise
+    return written
+
+
+def export_query(path, query, params=None, conn=None, progress=None, chunk_size=CHUNK_SIZE):
+    """Export hasil query langsung ke file tanpa menampung seluruh hasil di memori."""
+    if conn is None:
+        with connection(read_only=True) as own:
+            return export_query(path, query, params, own, progress, chunk_size)
+    headers, rows = stream_query(conn, query, params, batch=chunk_size)
+    return write_rows(path, headers, rows, progress, chunk_size)
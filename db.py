@@ -1,5 +1,12 @@
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import mysql.connector
 
+from query_stats import estimate_bytes, timed
+
 DB_CONFIG = {
     "host": "127.0.0.1",
     "user": "root",
@@ -8,24 +15,590 @@ DB_CONFIG = {
     "port": 3306
 }
 
-def get_conn():
-    return mysql.connector.connect(**DB_CONFIG)
+# pengaturan pool koneksi bersama
+POOL_CONFIG = {
+    "size": 5,             # maksimal koneksi terbuka sekaligus
+    "acquire_timeout": 10,  # detik menunggu koneksi kosong sebelum error
+    "idle_timeout": 300,    # detik, koneksi idle lebih lama dari ini ditutup
+    "ping_after": 30,       # detik idle sebelum koneksi dicek (ping) saat diambil
+}
+
+# replika untuk query baca (report & daftar); None = semua query ke primary.
+# contoh dua instance lokal: {**DB_CONFIG, "port": 3307}
+REPLICA_CONFIG = None
+
+ROUTING_CONFIG = {
+    "max_lag": 5,          # detik; replika yang tertinggal lebih dari ini tidak dipakai
+                           # (None = lag tidak dicek, mis. replika tanpa SHOW REPLICA STATUS)
+    "check_every": 2,      # detik antar cek lag (thread background, hasilnya dipakai bersama)
+    "connect_timeout": 2,  # detik; default connection_timeout koneksi replika (hanya saat connect)
+}
+
+# prepared statement yang disimpan per koneksi (yang paling lama tidak dipakai dibuang)
+STATEMENT_CACHE_SIZE = 64
+
+
+def get_conn(**overrides):
+    """Koneksi baru di luar pool (untuk keperluan khusus, mis. KILL QUERY)."""
+    return mysql.connector.connect(**dict(DB_CONFIG, **overrides))
+
+
+# ---------- pool koneksi ----------
+class ConnectionPool:
+    """
+    Pool koneksi MySQL yang thread-safe.
+    - koneksi dipakai ulang, jadi handshake TCP+auth hanya sekali per koneksi
+    - saat diambil, koneksi yang lama idle dicek dulu dengan ping
+    - koneksi idle lebih lama dari idle_timeout ditutup otomatis
+    """
+    def __init__(self, config, size=5, acquire_timeout=10, idle_timeout=300, ping_after=30):
+        self.config = dict(config)
+        self.size = size
+        self.acquire_timeout = acquire_timeout
+        self.idle_timeout = idle_timeout
+        self.ping_after = ping_after
+
+        self._lock = threading.Condition()
+        self._idle = []        # list[(conn, last_used)]
+        self._in_use = 0
+        self._stats = {
+            "created": 0,
+            "reused": 0,
+            "ping_failed": 0,
+            "evicted": 0,
+            "waits": 0,
+        }
+
+    def _open(self):
+        conn = mysql.connector.connect(**self.config)
+        with self._lock:
+            self._stats["created"] += 1
+        return conn
+
+    @staticmethod
+    def _close_quietly(conn):
+        forget_statements(conn)
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _evict_idle(self, now):
+        # dipanggil dengan lock dipegang
+        keep, drop = [], []
+        for conn, last_used in self._idle:
+            (drop if now - last_used > self.idle_timeout else keep).append((conn, last_used))
+        self._idle = keep
+        self._stats["evicted"] += len(drop)
+        return [c for c, _ in drop]
+
+    def acquire(self):
+        deadline = time.monotonic() + self.acquire_timeout
+        with self._lock:
+            dropped = self._evict_idle(time.monotonic())
+            while not self._idle and self._in_use >= self.size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise RuntimeError(f"Pool koneksi habis ({self.size} koneksi sedang dipakai)")
+                self._stats["waits"] += 1
+                self._lock.wait(remaining)
+            conn, last_used = self._idle.pop() if self._idle else (None, 0.0)
+            self._in_use += 1
+
+        for c in dropped:
+            self._close_quietly(c)
+
+        try:
+            if conn is not None and time.monotonic() - last_used > self.ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    with self._lock:
+                        self._stats["ping_failed"] += 1
+                    self._close_quietly(conn)
+                    conn = None
+            if conn is None:
+                return self._open()
+            with self._lock:
+                self._stats["reused"] += 1
+            return conn
+        except Exception:
+            with self._lock:
+                self._in_use -= 1
+                self._lock.notify()
+            raise
+
+    def release(self, conn, broken=False):
+        if not broken:
+            try:
+                # akhiri transaksi/snapshot yang masih terbuka supaya
+                # pemakai berikutnya melihat data terbaru
+                if conn.in_transaction:
+                    conn.rollback()
+            except Exception:
+                broken = True
+
+        with self._lock:
+            self._in_use -= 1
+            if not broken:
+                self._idle.append((conn, time.monotonic()))
+            self._lock.notify()
+
+        if broken:
+            self._close_quietly(conn)
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["size"] = self.size
+            data["in_use"] = self._in_use
+            data["idle"] = len(self._idle)
+        return data
+
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = self._idle, []
+        for conn, _ in idle:
+            self._close_quietly(conn)
+
+
+_pools = {}   # "primary" / "replica" -> ConnectionPool
+_pool_lock = threading.Lock()
+
+
+def get_pool(role="primary"):
+    pool = _pools.get(role)
+    if pool is None:
+        with _pool_lock:
+            pool = _pools.get(role)
+            if pool is None:
+                config = DB_CONFIG if role == "primary" else replica_config()
+                pool = _pools[role] = ConnectionPool(config, **POOL_CONFIG)
+    return pool
+
+
+def pool_stats(role="primary"):
+    return get_pool(role).stats()
+
+
+# ---------- routing baca/tulis ----------
+def replica_config():
+    """REPLICA_CONFIG dengan connection_timeout pendek, supaya replika mati tidak menggantung."""
+    if REPLICA_CONFIG is None:
+        raise RuntimeError("REPLICA_CONFIG belum diisi")
+    return {"connection_timeout": ROUTING_CONFIG["connect_timeout"], **REPLICA_CONFIG}
+
+
+def replica_lag(conn):
+    """
+    Detik ketertinggalan replika (Seconds_Behind_Source), atau None jika
+    replikasi berhenti / server ini bukan replika.
+    """
+    cur = conn.cursor(dictionary=True)
+    try:
+        # MySQL 8.0.22+ / lama & MariaDB
+        for sql in ("SHOW REPLICA STATUS", "SHOW SLAVE STATUS"):
+            try:
+                cur.execute(sql)
+            except mysql.connector.errors.ProgrammingError:
+                continue
+            rows = cur.fetchall()
+            if not rows:
+                return None
+            row = rows[0]
+            lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+            return None if lag is None else int(lag)
+        return None
+    finally:
+        cur.close()
+
+
+class ReadRouter:
+    """
+    Memilih server untuk query baca: replika jika sehat dan lag-nya di bawah
+    ROUTING_CONFIG["max_lag"], selain itu primary. Tulis selalu ke primary.
+
+    Lag dicek thread background tiap check_every detik lewat koneksinya
+    sendiri (bukan dari pool); choose() hanya membaca hasil terakhir, jadi
+    tidak pernah menunggu replika, termasuk dari thread GUI. Hasil cek yang
+    terlalu lama (thread macet menunggu replika) dianggap tidak sehat.
+
+    Read-your-writes: selama penulisan terakhir proses ini lebih baru dari
+    lag replika (+1 detik, karena lag dibulatkan per detik), baca tetap ke
+    primary supaya data yang baru ditulis tidak "hilang".
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._thread = None
+        self._checked_at = None
+        self._healthy = False
+        self._lag = None
+        self._reason = "belum dicek"
+        self._last_write = None
+        self._stats = {"replica": 0, "fallback_lag": 0, "fallback_write": 0}
+
+    def mark_write(self):
+        with self._lock:
+            self._last_write = time.monotonic()
+
+    def mark_unhealthy(self, reason):
+        # berlaku sampai cek berikutnya dari thread monitor
+        with self._lock:
+            self._healthy, self._reason = False, reason
+
+    def _start(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._monitor, name="replica-lag", daemon=True)
+                self._thread.start()
+
+    def _monitor(self):
+        conn = None
+        while True:
+            conn = self._check(conn)
+            time.sleep(ROUTING_CONFIG["check_every"])
+
+    def _check(self, conn):
+        """Satu cek lag; return koneksi untuk cek berikutnya (None jika putus)."""
+        max_lag = ROUTING_CONFIG["max_lag"]
+        try:
+            if conn is None:
+                conn = mysql.connector.connect(**replica_config())
+            elif max_lag is None:
+                conn.ping(reconnect=False)
+            lag = None if max_lag is None else replica_lag(conn)
+        except Exception as e:
+            if conn is not None:
+                try:
+                    conn.close()
+                except Exception:
+                    pass
+            conn = None
+            healthy, lag, reason = False, None, f"replika tidak bisa dihubungi: {e}"
+        else:
+            if max_lag is None:
+                healthy, reason = True, "lag tidak dicek"
+            elif lag is None:
+                healthy, reason = False, "replikasi berhenti / bukan replika"
+            elif lag > max_lag:
+                healthy, reason = False, f"lag {lag} dtk > {max_lag} dtk"
+            else:
+                healthy, reason = True, f"lag {lag} dtk"
+        with self._lock:
+            self._healthy, self._lag, self._reason = healthy, lag, reason
+            self._checked_at = time.monotonic()
+        return conn
+
+    def choose(self):
+        """"replica" atau "primary" untuk satu query baca (tidak pernah menunggu replika)."""
+        if REPLICA_CONFIG is None:
+            return "primary"
+        if self._thread is None:
+            self._start()
+        now = time.monotonic()
+        stale_after = 3 * ROUTING_CONFIG["check_every"] + ROUTING_CONFIG["connect_timeout"]
+        with self._lock:
+            healthy = (self._healthy and self._checked_at is not None
+                       and now - self._checked_at <= stale_after)
+            fresh_write = (self._last_write is not None
+                           and now - self._last_write < (self._lag or 0) + 1)
+            if not healthy:
+                self._stats["fallback_lag"] += 1
+                return "primary"
+            if fresh_write:
+                self._stats["fallback_write"] += 1
+                return "primary"
+            self._stats["replica"] += 1
+            return "replica"
+
+    def stats(self):
+        with self._lock:
+            data = dict(self._stats)
+            data["enabled"] = REPLICA_CONFIG is not None
+            data["healthy"] = self._healthy
+            data["lag"] = self._lag
+            data["reason"] = self._reason if REPLICA_CONFIG is not None else "tanpa replika"
+        return data
+
+
+_router = ReadRouter()
+
+
+def mark_write():
+    """Catat bahwa proses ini baru menulis (untuk read-your-writes)."""
+    _router.mark_write()
 
-def select_rows(query, params=None):
-    conn = get_conn()
+
+def routing_stats():
+    return _router.stats()
+
+
+_discarded = set()   # id(conn) yang tidak boleh kembali ke pool
+_discard_lock = threading.Lock()
+
+
+def discard_connection(conn):
+    """
+    Tandai koneksi dari connection() supaya ditutup saat dilepas, bukan
+    dikembalikan ke pool (mis. koneksi yang sudah di-KILL QUERY).
+    """
+    with _discard_lock:
+        _discarded.add(id(conn))
+
+
+@contextmanager
+def connection(read_only=False):
+    """
+    Pinjam koneksi dari pool; otomatis dikembalikan setelah blok selesai.
+    read_only=True: boleh dilayani replika (report, daftar, export); jika
+    replika tidak bisa dipakai, otomatis ke primary.
+    """
+    role = _router.choose() if read_only else "primary"
+    pool = get_pool(role)
     try:
+        conn = pool.acquire()
+    except mysql.connector.Error as e:
+        if role == "primary":
+            raise
+        _router.mark_unhealthy(f"replika tidak bisa dihubungi: {e}")
+        role, pool = "primary", get_pool("primary")
+        conn = pool.acquire()
+    broken = False
+    try:
+        yield conn
+    except (mysql.connector.errors.OperationalError, mysql.connector.errors.InterfaceError) as e:
+        broken = True
+        if role == "replica":
+            # query berikutnya ke primary sampai cek lag berikutnya
+            _router.mark_unhealthy(f"koneksi replika putus: {e}")
+        raise
+    finally:
+        with _discard_lock:
+            if id(conn) in _discarded:
+                _discarded.discard(id(conn))
+                broken = True
+        pool.release(conn, broken=broken)
+
+
+@contextmanager
+def transaction_conn():
+    """
+    Satu transaksi di koneksi pool; yield koneksinya (untuk run_prepared).
+    Commit jika blok selesai normal, rollback jika ada exception.
+    """
+    with connection() as conn:
+        try:
+            yield conn
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        mark_write()
+
+
+@contextmanager
+def transaction():
+    """Seperti transaction_conn, tapi yield cursor dictionary."""
+    with transaction_conn() as conn:
         cur = conn.cursor(dictionary=True)
-        cur.execute(query, params or ())
-        return cur.fetchall()
+        try:
+            yield cur
+        finally:
+            cur.close()
+
+
+# ---------- prepared statement ----------
+# id(koneksi) -> (koneksi, OrderedDict sql -> (sql, cursor prepared))
+_statements = {}
+_stmt_lock = threading.Lock()
+_stmt_stats = {"hits": 0, "misses": 0, "evicted": 0}
+
+
+def _close_cursor(cur):
+    try:
+        cur.close()   # DEALLOCATE statement di server
+    except Exception:
+        pass
+
+
+def prepared_cursor(conn, sql, dictionary=True):
+    """
+    Cursor prepared untuk sql di koneksi ini. Statement di-PREPARE di server
+    hanya saat pertama kali (miss); pemanggilan berikutnya dengan sql yang
+    sama memakai ulang statement itu (hit). Return (sql, cursor): sql yang
+    dikembalikan harus dipakai di cursor.execute, karena connector hanya
+    memakai ulang statement jika objek string-nya sama.
+    """
+    key = (sql, dictionary)
+    with _stmt_lock:
+        entry = _statements.get(id(conn))
+        if entry is None or entry[0] is not conn:
+            entry = _statements[id(conn)] = (conn, OrderedDict())
+        cache = entry[1]
+        hit = cache.get(key)
+        if hit is not None:
+            cache.move_to_end(key)
+            _stmt_stats["hits"] += 1
+            return hit
+        _stmt_stats["misses"] += 1
+
+    hit = (sql, conn.cursor(prepared=True, dictionary=dictionary))
+    old = None
+    with _stmt_lock:
+        cache[key] = hit
+        if len(cache) > STATEMENT_CACHE_SIZE:
+            _, old = cache.popitem(last=False)
+            _stmt_stats["evicted"] += 1
+    if old is not None:
+        _close_cursor(old[1])
+    return hit
+
+
+def run_prepared(conn, sql, params=None, dictionary=True):
+    """
+    Eksekusi sql (placeholder %s) sebagai prepared statement yang di-cache
+    per koneksi. Return cursor-nya: baca hasil dengan fetchall(), jangan
+    ditutup (cursor dipakai lagi oleh pemanggilan berikutnya).
+    """
+    with timed(sql) as probe:
+        cur = _execute_prepared(conn, sql, params, dictionary)
+        probe["rows"] = cur.rowcount if cur.rowcount >= 0 else None
+    return cur
+
+
+def _execute_prepared(conn, sql, params, dictionary):
+    sql, cur = prepared_cursor(conn, sql, dictionary)
+    cur.execute(sql, tuple(params or ()))
+    return cur
+
+
+def forget_statements(conn):
+    """Buang cache statement koneksi ini (dipanggil saat koneksi ditutup)."""
+    with _stmt_lock:
+        entry = _statements.get(id(conn))
+        if entry is None or entry[0] is not conn:
+            return
+        del _statements[id(conn)]
+    for _, cur in entry[1].values():
+        _close_cursor(cur)
+
+
+def statement_stats():
+    with _stmt_lock:
+        data = dict(_stmt_stats)
+        data["cached"] = sum(len(c) for _, c in _statements.values())
+        data["connections"] = len(_statements)
+    total = data["hits"] + data["misses"]
+    data["hit_rate"] = data["hits"] / total if total else 0.0
+    return data
+
+
+def query_rows(conn, query, params=None):
+    """Jalankan SELECT di koneksi yang sudah dipegang, hasil list[dict]."""
+    cur = conn.cursor(dictionary=True)
+    try:
+        with timed(query) as probe:
+            cur.execute(query, params or ())
+            rows = cur.fetchall()
+            probe["rows"], probe["bytes"] = len(rows), estimate_bytes(rows)
+        return rows
     finally:
-        conn.close()
+        cur.close()
+
+
+def stream_query(conn, query, params=None, batch=1000):
+    """
+    Jalankan query dengan cursor tanpa buffer (hasil dibaca bertahap dari
+    server). Return (headers, generator baris).
+    """
+    cur = conn.cursor(buffered=False)
+    cur.execute(query, params or ())
+    headers = [d[0] for d in cur.description]
+
+    def rows():
+        try:
+            while True:
+                chunk = cur.fetchmany(batch)
+                if not chunk:
+                    break
+                yield from chunk
+        finally:
+            try:
+                cur.close()
+            except Exception:
+                # masih ada sisa hasil yang belum dibaca; koneksi akan
+                # dibuang oleh pool saat dikembalikan
+                pass
+
+    return headers, rows()
+
+
+def in_chunks(values, size=500):
+    """
+    Pecah values untuk klausa IN (...) operasi massal.
+    Yield (placeholder "%s, %s, ...", tuple nilai) per paling banyak size nilai.
+    """
+    values = list(values)
+    for i in range(0, len(values), size):
+        chunk = tuple(values[i:i + size])
+        yield ", ".join(["%s"] * len(chunk)), chunk
+
+
+def select_rows(query, params=None, read_only=False):
+    """read_only=True untuk report/daftar yang boleh dibaca dari replika."""
+    with connection(read_only) as conn:
+        return query_rows(conn, query, params)
+
+
+def select_prepared(query, params=None):
+    """select_rows lewat prepared statement (untuk query yang sering diulang)."""
+    with connection() as conn, timed(query) as probe:
+        rows = _execute_prepared(conn, query, params, True).fetchall()
+        probe["rows"], probe["bytes"] = len(rows), estimate_bytes(rows)
+        return rows
+
 
 def execute(query, params=None):
-    conn = get_conn()
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            with timed(query) as probe:
+                cur.execute(query, params or ())
+                conn.commit()
+                probe["rows"] = cur.rowcount
+            mark_write()
+            return cur.rowcount
+        finally:
+            cur.close()
+
+
+def insert(query, params=None):
+    """Seperti execute, tapi mengembalikan lastrowid (PK auto_increment baru)."""
+    with connection() as conn:
+        cur = conn.cursor()
+        try:
+            with timed(query) as probe:
+                cur.execute(query, params or ())
+                conn.commit()
+                probe["rows"] = cur.rowcount
+            mark_write()
+            return cur.lastrowid
+        finally:
+            cur.close()
+
+
+def kill_query(connection_id, host=None, port=None):
+    """
+    Hentikan query yang sedang jalan di koneksi lain (sisi server).
+    host/port: server tempat query itu jalan (primary atau replika).
+    """
+    overrides = {}
+    if host is not None and port is not None and (host, port) != (DB_CONFIG["host"], DB_CONFIG["port"]):
+        overrides = dict(REPLICA_CONFIG or {}, host=host, port=port)
+    conn = get_conn(**overrides)
     try:
         cur = conn.cursor()
-        cur.execute(query, params or ())
-        conn.commit()
-        return cur.rowcount
+        cur.execute(f"KILL QUERY {int(connection_id)}")
+        cur.close()
     finally:
         conn.close()
@@ -0,0 +1,127 @@
+from PySide6.QtCore import Qt, QTimer
+from PySide6.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QSpinBox,
+    QTableWidget, QTableWidgetItem, QSplitter, QHeaderView
+)
+
+from db import pool_stats, routing_stats, statement_stats
+from query_stats import STATS_CONFIG, query_stats
+
+SUMMARY_HEADERS = ["Query", "Halaman", "Jumlah", "p50 (ms)", "p95 (ms)", "p99 (ms)",
+                   "Maks (ms)", "Baris", "Byte", "Error"]
+SLOW_HEADERS = ["Jam", "ms", "Halaman", "Baris", "Query"]
+
+
+def _item(value, number=False):
+    if isinstance(value, float):
+        value = f"{value:,.1f}"
+    item = QTableWidgetItem(str(value))
+    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+    if number:
+        item.setTextAlignment(int(Qt.AlignRight | Qt.AlignVCenter))
+    return item
+
+
+def _fill(table, rows, numeric):
+    table.setRowCount(len(rows))
+    for r, row in enumerate(rows):
+        for c, value in enumerate(row):
+            table.setItem(r, c, _item(value, c in numeric))
+
+
+class DiagnosticsPage(QWidget):
+    """
+    Latensi query yang dicatat query_stats: p50/p95/p99 per query, slow log,
+    dan status pool koneksi / prepared statement. Diperbarui tiap detik
+    selama halaman tampil.
+    """
+    title = "Diagnostics"
+
+    def __init__(self, interval_ms=1000):
+        super().__init__()
+        self.lbl_info = QLabel("")
+        self.spn_slow = QSpinBox()
+        self.spn_slow.setRange(1, 600000)
+        self.spn_slow.setSuffix(" ms")
+        self.spn_slow.setValue(STATS_CONFIG["slow_ms"])
+        self.btn_reset = QPushButton("Reset")
+
+        top = QHBoxLayout()
+        top.addWidget(self.lbl_info)
+        top.addStretch()
+        top.addWidget(QLabel("Slow query >="))
+        top.addWidget(self.spn_slow)
+        top.addWidget(self.btn_reset)
+
+        self.tbl_summary = QTableWidget(0, len(SUMMARY_HEADERS))
+        self.tbl_summary.setHorizontalHeaderLabels(SUMMARY_HEADERS)
+        self.tbl_summary.setSortingEnabled(False)
+        self.tbl_slow = QTableWidget(0, len(SLOW_HEADERS))
+        self.tbl_slow.setHorizontalHeaderLabels(SLOW_HEADERS)
+        for tbl in (self.tbl_summary, self.tbl_slow):
+            tbl.setSelectionBehavior(QTableWidget.SelectRows)
+            tbl.setWordWrap(False)
+            tbl.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
+        self.tbl_summary.setColumnWidth(0, 420)
+        self.tbl_slow.setColumnWidth(4, 520)
+
+        split = QSplitter(Qt.Vertical)
+        split.addWidget(self.tbl_summary)
+        slow_box = QWidget()
+        slow_lay = QVBoxLayout(slow_box)
+        slow_lay.setContentsMargins(0, 0, 0, 0)
+        slow_lay.addWidget(QLabel("Slow query log (terbaru di atas)"))
+        slow_lay.addWidget(self.tbl_slow)
+        split.addWidget(slow_box)
+
+        lay = QVBoxLayout(self)
+        lay.addLayout(top)
+        lay.addWidget(split)
+
+        self.timer = QTimer(self)
+        self.timer.setInterval(interval_ms)
+        self.timer.timeout.connect(self.refresh)
+        self.btn_reset.clicked.connect(self.reset)
+        self.spn_slow.valueChanged.connect(lambda v: STATS_CONFIG.__setitem__("slow_ms", v))
+        self.refresh()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.refresh()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def reset(self):
+        query_stats().reset()
+        self.refresh()
+
+    def refresh(self):
+        stats = query_stats()
+        summaries = stats.summaries()
+        _fill(self.tbl_summary, [
+            (s["sql"], s["pages"], s["count"], s["p50"], s["p95"], s["p99"],
+             s["max"], s["rows"], s["bytes"], s["errors"])
+            for s in summaries
+        ], numeric=set(range(2, 10)))
+        _fill(self.tbl_slow, [
+            (e["time"], e["ms"], e["page"], "" if e["rows"] is None else e["rows"],
+             e["sql"] + (f"  [{e['error']}]" if e["error"] else ""))
+            for e in stats.slow_log()
+        ], numeric={1, 3})
+
+        pool = pool_stats()
+        stmt = statement_stats()
+        route = routing_stats()
+        total = sum(s["count"] for s in summaries)
+        replica = ""
+        if route["enabled"]:
+            replica = (f" | replika: {route['replica']} baca, ke primary {route['fallback_lag']} "
+                       f"(replika tidak layak) + {route['fallback_write']} (baru menulis), {route['reason']}")
+        self.lbl_info.setText(
+            f"{total} query, {len(summaries)} jenis | pool: {pool['in_use']}/{pool['size']} dipakai, "
+            f"{pool['idle']} idle, {pool['waits']} antre | prepared: {stmt['hit_rate'] * 100:.0f}% hit"
+            + replica
+        )
@@ -0,0 +1,232 @@
+"""
+Generator data sintetis untuk users, drivers, orders dan payments, supaya
+performa aplikasi bisa diukur (ojol.sql hanya berisi beberapa baris).
+
+- seed tetap -> data yang sama persis setiap kali dijalankan
+- sebaran dibuat miring seperti data asli: sebagian kecil pelanggan membuat
+  sebagian besar pesanan, driver aktif dapat lebih banyak order, kota besar
+  lebih sering jadi titik awal/tujuan, tidak semua pesanan sudah dibayar
+- id diisi langsung (lanjut dari MAX(id) yang ada), jadi FK tidak perlu
+  dibaca balik dari server; insert per batch dengan executemany
+
+Pemakaian:
+    python gen_data.py kecil                       # 10rb user, 500 driver, 200rb pesanan
+    python gen_data.py besar                       # 1jt user, 50rb driver, 20jt pesanan
+    python gen_data.py --users 5000 --orders 100000 --seed 7
+    python gen_data.py sedang --reset              # kosongkan tabel dulu (admin tidak disentuh)
+"""
+import sys
+import time
+
+import numpy as np
+
+from db import get_conn
+import rollup
+
+SCALES = {
+    "kecil": {"users": 10_000, "drivers": 500, "orders": 200_000},
+    "sedang": {"users": 100_000, "drivers": 5_000, "orders": 2_000_000},
+    "besar": {"users": 1_000_000, "drivers": 50_000, "orders": 20_000_000},
+}
+
+FIRST_NAMES = [
+    "Ahmad", "Budi", "Citra", "Dewi", "Eko", "Fajar", "Gita", "Hendra", "Indah", "Joko",
+    "Kartika", "Lestari", "Muhammad", "Nur", "Oki", "Putri", "Rahmat", "Siti", "Taufik", "Wahyu",
+    "Yudha", "Rendi", "Ridho", "Enggar", "Rizky", "Aulia", "Bayu", "Dimas", "Fitri", "Hasan",
+]
+LAST_NAMES = [
+    "Saputra", "Wijaya", "Pratama", "Hidayat", "Rahman", "Santoso", "Lestari", "Kusuma",
+    "Nugroho", "Setiawan", "Halim", "Anwar", "Syahputra", "Ramadhan", "Permata", "Utami",
+]
+# (tempat, bobot) -- Banjarmasin & sekitarnya paling ramai
+PLACES = [
+    ("Banjarmasin", 30), ("Banjarbaru", 14), ("Martapura", 10), ("Pelaihari", 4),
+    ("Kandangan", 3), ("Barabai", 3), ("Amuntai", 2), ("Tanjung", 2), ("Rantau", 2),
+    ("Marabahan", 2), ("Kotabaru", 1), ("Batulicin", 1), ("Bandara Syamsudin Noor", 6),
+    ("Pasar Lama", 5), ("Duta Mall", 5), ("ULM Banjarmasin", 4), ("Siring Menara Pandang", 3),
+    ("Pelabuhan Trisakti", 3),
+]
+MOTORS = [("Beat", 30), ("Vario", 25), ("Scoopy", 12), ("NMAX", 8), ("Mio", 10),
+          ("Supra", 6), ("Sonic", 4), ("Aerox", 5)]
+PLATE_PREFIX = [("DA", 85), ("KH", 8), ("B", 4), ("L", 3)]
+METODE = [("cash", 50), ("e-wallet", 35), ("kartu", 15)]
+PAID_RATIO = 0.92   # porsi pesanan yang sudah punya pembayaran
+
+
+def _weights(pairs):
+    names = [n for n, _ in pairs]
+    w = np.array([w for _, w in pairs], dtype=float)
+    return names, w / w.sum()
+
+
+def _pick(rng, pairs, n):
+    names, p = _weights(pairs)
+    return [names[i] for i in rng.choice(len(names), size=n, p=p)]
+
+
+def skewed(rng, pool, n, power):
+    """
+    n nilai dari pool dengan sebaran miring: indeks ~ u**power, jadi
+    power=3 -> ~20% teratas dapat ~60% bagian. pool sebaiknya sudah diacak
+    supaya yang "ramai" tidak selalu id kecil.
+    """
+    idx = (len(pool) * rng.random(n) ** power).astype(np.int64)
+    return pool[np.minimum(idx, len(pool) - 1)]
+
+
+def _next_id(cur, table, pk):
+    cur.execute(f"SELECT COALESCE(MAX(`{pk}`), 0) FROM `{table}`")
+    return int(cur.fetchone()[0]) + 1
+
+
+def _insert(conn, table, cols, rows, batch):
+    sql = (f"INSERT INTO `{table}` ({', '.join(f'`{c}`' for c in cols)}) "
+           f"VALUES ({', '.join(['%s'] * len(cols))})")
+    cur = conn.cursor()
+    try:
+        for i in range(0, len(rows), batch):
+            cur.executemany(sql, rows[i:i + batch])
+            conn.commit()
+    finally:
+        cur.close()
+
+
+def _progress(label, done, total, t0):
+    rate = done / (time.perf_counter() - t0 or 1e-9)
+    print(f"\r{label}: {done}/{total} ({rate:,.0f} baris/dtk)", end="", flush=True)
+
+
+def gen_users(conn, rng, n, batch):
+    cur = conn.cursor()
+    start = _next_id(cur, "users", "user_id")
+    cur.close()
+    t0 = time.perf_counter()
+    for lo in range(0, n, batch):
+        ids = range(start + lo, start + min(lo + batch, n))
+        k = len(ids)
+        first = rng.integers(0, len(FIRST_NAMES), k)
+        last = rng.integers(0, len(LAST_NAMES), k)
+        phones = rng.integers(10 ** 9, 10 ** 10, k)
+        rows = [
+            (uid, f"{FIRST_NAMES[f]} {LAST_NAMES[l]}",
+             f"{FIRST_NAMES[f].lower()}.{LAST_NAMES[l].lower()}{uid}@contoh.id",
+             f"08{p}", f"pw{uid:07d}")
+            for uid, f, l, p in zip(ids, first.tolist(), last.tolist(), phones.tolist())
+        ]
+        _insert(conn, "users", ("user_id", "nama", "email", "no_hp", "password"), rows, batch)
+        _progress("users", lo + k, n, t0)
+    print()
+    return np.arange(start, start + n, dtype=np.int64)
+
+
+def gen_drivers(conn, rng, user_ids, n, batch):
+    cur = conn.cursor()
+    start = _next_id(cur, "drivers", "driver_id")
+    cur.close()
+    n = min(n, len(user_ids))
+    owners = rng.choice(user_ids, size=n, replace=False).tolist()
+    prefix = _pick(rng, PLATE_PREFIX, n)
+    numbers = rng.integers(1, 10000, n).tolist()
+    motors = _pick(rng, MOTORS, n)
+    rows = [(start + i, owners[i], f"{prefix[i]} {numbers[i]:04d}", motors[i]) for i in range(n)]
+    t0 = time.perf_counter()
+    _insert(conn, "drivers", ("driver_id", "user_id", "plat_nomor", "jenis_motor"), rows, batch)
+    _progress("drivers", n, n, t0)
+    print()
+    return np.arange(start, start + n, dtype=np.int64)
+
+
+def gen_orders(conn, rng, user_ids, driver_ids, n, batch):
+    """Pesanan + pembayarannya, per batch supaya memori tetap kecil."""
+    cur = conn.cursor()
+    start = _next_id(cur, "orders", "pesanan_id")
+    pay_start = _next_id(cur, "payments", "payment_id")
+    cur.close()
+
+    # diacak sekali: urutan "keramaian" tidak sama dengan urutan id
+    customers = rng.permutation(user_ids)
+    drivers = rng.permutation(driver_ids)
+    place_names, place_p = _weights(PLACES)
+    metode_names, metode_p = _weights(METODE)
+
+    t0 = time.perf_counter()
+    paid = 0
+    for lo in range(0, n, batch):
+        k = min(batch, n - lo)
+        ids = np.arange(start + lo, start + lo + k)
+        pel = skewed(rng, customers, k, 3.0)
+        drv = skewed(rng, drivers, k, 1.8)
+        awal = rng.choice(len(place_names), size=k, p=place_p)
+        tujuan = rng.choice(len(place_names), size=k, p=place_p)
+        # jarak miring ke perjalanan pendek; tarif dasar + per km, dibulatkan 500
+        jarak = np.clip(np.round(rng.lognormal(1.6, 0.8, k), 2), 0.5, 999.99)
+        biaya = np.maximum(10000, np.round((5000 + jarak * 2500) / 500) * 500)
+
+        orders = [
+            (int(i), int(p), int(d), place_names[a], place_names[t], float(j), float(b))
+            for i, p, d, a, t, j, b in zip(ids, pel, drv, awal, tujuan, jarak, biaya)
+        ]
+        _insert(conn, "orders",
+                ("pesanan_id", "pelanggan_id", "driver_id", "titik_awal", "titik_tujuan", "jarak", "biaya"),
+                orders, batch)
+
+        mask = rng.random(k) < PAID_RATIO
+        metode = rng.choice(len(metode_names), size=int(mask.sum()), p=metode_p)
+        payments = [
+            (pay_start + paid + j, int(i), metode_names[m], float(b))
+            for j, (i, m, b) in enumerate(zip(ids[mask], metode, biaya[mask]))
+        ]
+        paid += len(payments)
+        _insert(conn, "payments", ("payment_id", "pesanan_id", "metode", "jumlah"), payments, batch)
+        _progress("orders", lo + k, n, t0)
+    print()
+    return paid
+
+
+def reset(conn):
+    cur = conn.cursor()
+    try:
+        for table in ("payments", "orders", "drivers", "users"):
+            cur.execute(f"DELETE FROM `{table}`")
+        conn.commit()
+    finally:
+        cur.close()
+
+
+def generate(users, drivers, orders, seed=42, batch=5000, do_reset=False):
+    rng = np.random.default_rng(seed)
+    conn = get_conn()
+    try:
+        cur = conn.cursor()
+        # koneksi khusus (bukan pool), jadi setting sesi ini tidak bocor ke aplikasi
+        cur.execute("SET SESSION unique_checks = 0, foreign_key_checks = 0")
+        cur.close()
+        if do_reset:
+            reset(conn)
+        t0 = time.perf_counter()
+        user_ids = gen_users(conn, rng, users, batch)
+        driver_ids = gen_drivers(conn, rng, user_ids, drivers, batch)
+        paid = gen_orders(conn, rng, user_ids, driver_ids, orders, batch)
+        print(f"Selesai dalam {time.perf_counter() - t0:.1f} detik "
+              f"({users} user, {len(driver_ids)} driver, {orders} pesanan, {paid} pembayaran).")
+    finally:
+        conn.close()
+
+    rollup.create()
+    print("Tabel rekap dihitung ulang.")
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "-h" in args or "--help" in args:
+        print(__doc__)
+        sys.exit(0)
+    sizes = dict(SCALES["kecil"])
+    if args and args[0] in SCALES:
+        sizes = dict(SCALES[args[0]])
+    for name in ("users", "drivers", "orders"):
+        if f"--{name}" in args:
+            sizes[name] = int(args[args.index(f"--{name}") + 1])
+    seed = int(args[args.index("--seed") + 1]) if "--seed" in args else 42
+    batch = int(args[args.index("--batch") + 1]) if "--batch" in args else 5000
+    generate(sizes["users"], sizes["drivers"], sizes["orders"], seed, batch, "--reset" in args)
@@ -0,0 +1,71 @@
+"""
+Laporan biaya import per modul: berapa ms tiap modul berat jika diimport
+(diukur di proses terpisah dengan python -X importtime, di atas modul yang
+memang selalu dimuat app_main), dan apakah modul itu masih dimuat saat
+startup atau sudah ditunda sampai pertama dipakai.
+
+Dipakai oleh: python app_main.py --import-timing
+Bisa juga sendiri: python import_timing.py
+"""
+import os
+import subprocess
+import sys
+
+# modul yang dulu selalu diimport saat startup
+TRACKED = [
+    "PySide6.QtUiTools",
+    "pandas",
+    "report_engine",
+    "report_dashboard",
+    "report_windows",
+    "pdf_export",
+    "data_export",
+    "crud_pages",
+    "diagnostics_page",
+]
+
+# selalu dimuat app_main; diimport dulu supaya tidak ikut terhitung per modul
+BASELINE = "PySide6.QtWidgets, PySide6.QtGui, db, query_worker, quick_search"
+
+
+def import_cost_ms(module: str) -> float:
+    """Waktu import kumulatif module di interpreter baru setelah BASELINE (ms), -1 jika gagal."""
+    env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {BASELINE}; import {module}"],
+        capture_output=True, text=True, env=env, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    if result.returncode != 0:
+        return -1.0
+    for line in reversed(result.stderr.splitlines()):
+        parts = line.split("|")
+        if len(parts) == 3 and parts[2].strip() == module:
+            return int(parts[1]) / 1000
+    return -1.0
+
+
+def report(loaded_at_startup) -> str:
+    """
+    loaded_at_startup: nama modul yang ada di sys.modules setelah jendela tampil.
+    Kolom "sebelum" = biaya seandainya diimport di awal seperti dulu,
+    "sesudah" = biaya yang masih dibayar saat startup.
+    """
+    lines = [f"  {'modul':<22}{'sebelum':>10}{'sesudah':>10}  status"]
+    before = after = 0.0
+    for module in TRACKED:
+        cost = import_cost_ms(module)
+        if cost < 0:
+            lines.append(f"  {module:<22}{'?':>10}{'?':>10}  gagal diukur")
+            continue
+        at_startup = module in loaded_at_startup
+        before += cost
+        after += cost if at_startup else 0.0
+        lines.append(f"  {module:<22}{cost:9.1f}ms{cost if at_startup else 0.0:9.1f}ms  "
+                     f"{'dimuat saat startup' if at_startup else 'ditunda'}")
+    lines.append(f"  {'TOTAL':<22}{before:9.1f}ms{after:9.1f}ms")
+    lines.append("  (biaya tiap modul diukur terpisah, termasuk dependensinya, jadi total bisa tumpang tindih)")
+    return "Import timing:\n" + "\n".join(lines)
+
+
+if __name__ == "__main__":
+    print(report(set(sys.modules)))
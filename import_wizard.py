@@ -0,0 +1,120 @@
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import (
+    QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QLabel, QPushButton,
+    QComboBox, QLineEdit, QSpinBox, QProgressBar, QPlainTextEdit, QFileDialog
+)
+
+from csv_import import SPECS, import_csv
+from query_worker import executor
+
+
+class ImportDialog(QDialog):
+    """
+    Wizard import CSV: pilih tabel + file, lalu import berjalan di background
+    (csv_import.import_csv) dengan progress dan daftar baris yang gagal.
+    finishedImport(table, jumlah_masuk) dikirim setelah selesai.
+    """
+    progress = Signal(object)
+    finishedImport = Signal(str, int)
+
+    def __init__(self, table=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import CSV")
+        self.resize(560, 420)
+        self.stats = None
+
+        self.cmb_table = QComboBox()
+        self.cmb_table.addItems(list(SPECS))
+        if table in SPECS:
+            self.cmb_table.setCurrentText(table)
+        self.txt_path = QLineEdit()
+        self.btn_browse = QPushButton("Pilih...")
+        self.spn_batch = QSpinBox()
+        self.spn_batch.setRange(1, 50000)
+        self.spn_batch.setValue(1000)
+        self.lbl_columns = QLabel("")
+        self.lbl_columns.setWordWrap(True)
+
+        path_row = QHBoxLayout()
+        path_row.addWidget(self.txt_path)
+        path_row.addWidget(self.btn_browse)
+
+        form = QFormLayout()
+        form.addRow("Tabel", self.cmb_table)
+        form.addRow("File CSV", path_row)
+        form.addRow("Baris per transaksi", self.spn_batch)
+        form.addRow("Kolom CSV", self.lbl_columns)
+
+        self.bar = QProgressBar()
+        self.lbl_status = QLabel("")
+        self.txt_errors = QPlainTextEdit()
+        self.txt_errors.setReadOnly(True)
+        self.txt_errors.setPlaceholderText("Baris yang gagal akan tampil di sini")
+
+        self.btn_start = QPushButton("Mulai Import")
+        self.btn_close = QPushButton("Tutup")
+        buttons = QHBoxLayout()
+        buttons.addStretch()
+        buttons.addWidget(self.btn_start)
+        buttons.addWidget(self.btn_close)
+
+        lay = QVBoxLayout(self)
+        lay.addLayout(form)
+        lay.addWidget(self.bar)
+        lay.addWidget(self.lbl_status)
+        lay.addWidget(self.txt_errors)
+        lay.addLayout(buttons)
+
+        self.cmb_table.currentTextChanged.connect(self._show_columns)
+        self.btn_browse.clicked.connect(self._browse)
+        self.btn_start.clicked.connect(self.start)
+        self.btn_close.clicked.connect(self.reject)
+        self.progress.connect(self._on_progress)
+        self._show_columns(self.cmb_table.currentText())
+
+    def _show_columns(self, table):
+        self.lbl_columns.setText(", ".join(c for c, _, _ in SPECS[table]["columns"]))
+
+    def _browse(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Pilih CSV", "", "CSV Files (*.csv)")
+        if path:
+            self.txt_path.setText(path)
+
+    def start(self):
+        path = self.txt_path.text().strip()
+        if not path:
+            self.lbl_status.setText("Pilih file CSV dulu.")
+            return
+        table = self.cmb_table.currentText()
+        batch = self.spn_batch.value()
+
+        self.btn_start.setEnabled(False)
+        self.btn_close.setEnabled(False)
+        self.txt_errors.clear()
+        self.bar.setValue(0)
+        self.lbl_status.setText("Import berjalan...")
+        executor().submit(
+            (self, "import"),
+            lambda conn: import_csv(path, table, conn, batch_size=batch, progress=self.progress.emit),
+            lambda stats: self._done(table, stats),
+            self._failed,
+        )
+
+    def _on_progress(self, stats):
+        self.bar.setValue(stats.percent)
+        self.lbl_status.setText(stats.summary())
+
+    def _done(self, table, stats):
+        self.stats = stats
+        self._on_progress(stats)
+        self.btn_start.setEnabled(True)
+        self.btn_close.setEnabled(True)
+        self.txt_errors.setPlainText("\n".join(f"baris {n}: {msg}" for n, msg in stats.errors))
+        if stats.failed > len(stats.errors):
+            self.txt_errors.appendPlainText(f"... dan {stats.failed - len(stats.errors)} error lain")
+        self.finishedImport.emit(table, stats.inserted)
+
+    def _failed(self, msg):
+        self.btn_start.setEnabled(True)
+        self.btn_close.setEnabled(True)
+        self.lbl_status.setText(f"Import gagal: {msg}")
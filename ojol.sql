@@ -114,6 +114,48 @@ INSERT INTO `payments` (`payment_id`, `pesanan_id`, `metode`, `jumlah`) VALUES
 
 -- --------------------------------------------------------
 
+--
+-- Table structure for table `rekap_driver`
+--
+
+CREATE TABLE `rekap_driver` (
+  `driver_id` int(9) NOT NULL,
+  `total_pesanan` int(11) NOT NULL DEFAULT 0,
+  `total_biaya` decimal(16,2) NOT NULL DEFAULT 0.00
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+--
+-- Dumping data for table `rekap_driver`
+--
+
+INSERT INTO `rekap_driver` (`driver_id`, `total_pesanan`, `total_biaya`) VALUES
+(1, 2, 100000.00),
+(2, 1, 10000.00),
+(3, 1, 50000.00);
+
+-- --------------------------------------------------------
+
+--
+-- Table structure for table `rekap_metode`
+--
+
+CREATE TABLE `rekap_metode` (
+  `metode` enum('cash','e-wallet','kartu') NOT NULL,
+  `jumlah_transaksi` int(11) NOT NULL DEFAULT 0,
+  `total_pembayaran` decimal(16,2) NOT NULL DEFAULT 0.00
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+
+--
+-- Dumping data for table `rekap_metode`
+--
+
+INSERT INTO `rekap_metode` (`metode`, `jumlah_transaksi`, `total_pembayaran`) VALUES
+('cash', 1, 500000.00),
+('e-wallet', 1, 50000.00),
+('kartu', 1, 1000000.00);
+
+-- --------------------------------------------------------
+
 --
 -- Table structure for table `users`
 --
@@ -171,6 +213,18 @@ ALTER TABLE `payments`
   ADD PRIMARY KEY (`payment_id`),
   ADD KEY `idx_payments_pesanan_id` (`pesanan_id`);
 
+--
+-- Indexes for table `rekap_driver`
+--
+ALTER TABLE `rekap_driver`
+  ADD PRIMARY KEY (`driver_id`);
+
+--
+-- Indexes for table `rekap_metode`
+--
+ALTER TABLE `rekap_metode`
+  ADD PRIMARY KEY (`metode`);
+
 --
 -- Indexes for table `users`
 --
@@ -0,0 +1,468 @@
+import datetime
+import re
+from bisect import bisect_right
+from collections import OrderedDict
+from decimal import Decimal
+
+from PySide6.QtCore import Qt, QAbstractTableModel, QModelIndex, Signal
+
+from db import query_rows
+from query_worker import executor
+
+
+def _seek(cols, values, op, inclusive=False):
+    """
+    Kondisi keyset untuk urutan beberapa kolom, mis. (a, b) < (x, y) ditulis
+    a < x OR (a = x AND b < y); inclusive berlaku di kolom terakhir (<=).
+    """
+    terms, params = [], []
+    for i, col in enumerate(cols):
+        last_op = op + "=" if inclusive and i == len(cols) - 1 else op
+        conds = [f"{c} = %s" for c in cols[:i]] + [f"{col} {last_op} %s"]
+        terms.append("(" + " AND ".join(conds) + ")")
+        params += list(values[:i + 1])
+    return "(" + " OR ".join(terms) + ")", params
+
+
+def page_sql(base_query, key_col, page_size, after=None, last=None,
+             where=None, params=(), sort_col=None, descending=True):
+    """
+    SQL satu halaman keyset.
+    urutan   : sort_col lalu key_col (key_col saja jika sort_col None), DESC/ASC
+    after    : batas eksklusif dari halaman sebelumnya (None = halaman pertama)
+    last     : batas inklusif akhir halaman; jika diisi, rentang diambil persis
+               tanpa LIMIT (untuk mengambil ulang halaman yang sudah dikenal)
+    where    : filter tambahan (mis. hasil search_where) dengan params-nya
+    after/last berupa tuple (nilai sort_col, key) jika sort_col diisi.
+    """
+    cols = [sort_col, key_col] if sort_col else [key_col]
+    fwd, back = ("<", ">") if descending else (">", "<")
+
+    conds, all_params = [], []
+    if where:
+        conds.append(f"({where})")
+        all_params += list(params)
+    if after is not None:
+        sql, p = _seek(cols, after if sort_col else (after,), fwd)
+        conds.append(sql)
+        all_params += p
+    if last is not None:
+        sql, p = _seek(cols, last if sort_col else (last,), back, inclusive=True)
+        conds.append(sql)
+        all_params += p
+
+    sql = base_query.strip().rstrip(";")
+    if conds:
+        sql += " WHERE " + " AND ".join(conds)
+    direction = "DESC" if descending else "ASC"
+    sql += " ORDER BY " + ", ".join(f"{c} {direction}" for c in cols)
+    if last is None:
+        sql += " LIMIT %s"
+        all_params.append(page_size)
+    return sql, tuple(all_params)
+
+
+_SELECT_LIST = re.compile(r"^\s*SELECT\s+(.*?)\s+FROM\s", re.I | re.S)
+_SELECT_ITEM = re.compile(r"^(.*?)(?:\s+AS\s+(\w+))?$", re.I | re.S)
+
+
+def select_exprs(base_query):
+    """{nama kolom hasil: ekspresi SQL} dari SELECT list, mis. {"driver": "u.nama"}."""
+    m = _SELECT_LIST.match(base_query)
+    exprs = {}
+    if not m:
+        return exprs
+    for item in m.group(1).split(","):
+        expr, alias = _SELECT_ITEM.match(item.strip()).groups()
+        exprs[alias or expr.split(".")[-1]] = expr
+    return exprs
+
+
+def search_where(exprs, text, key_col=None):
+    """
+    WHERE pencarian: tiap ekspresi LIKE '%text%' (OR); teks berupa angka juga
+    dicocokkan persis ke key_col. Return (sql, params), (None, ()) jika kosong.
+    """
+    text = text.strip()
+    if not text or not exprs:
+        return None, ()
+    pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+    terms = [f"{e} LIKE %s" for e in exprs]
+    params = [pattern] * len(exprs)
+    if key_col and text.isdigit():
+        terms.append(f"{key_col} = %s")
+        params.append(int(text))
+    return " OR ".join(terms), tuple(params)
+
+
+class KeysetTableModel(QAbstractTableModel):
+    """
+    Model tabel yang mengambil data per halaman (keyset pagination).
+
+    base_query: SELECT ... FROM ... JOIN ... tanpa WHERE/ORDER BY/LIMIT
+    key_col   : kolom kunci di base_query (mis. "o.pesanan_id"), urut DESC
+    columns   : nama kolom hasil query (kolom pertama wajib PK)
+
+    - baris ditambah bertahap lewat canFetchMore/fetchMore saat di-scroll
+    - tiap halaman diambil dengan "WHERE key < batas ORDER BY key DESC LIMIT n",
+      jadi tidak pakai OFFSET yang makin lambat di halaman belakang
+    - hanya max_pages halaman yang disimpan di memori (LRU); halaman yang
+      sudah dibuang diambil ulang dari DB berdasarkan rentang kuncinya
+    - semua query jalan di background (query_worker), thread GUI tidak ikut menunggu
+    - hasil tulis lokal bisa disisipkan langsung (upsert_row/remove_key)
+      tanpa query ulang seluruh tabel
+    - filter (set_filter) dan urutan (sort, dipanggil saat header diklik)
+      dikerjakan di server: WHERE/ORDER BY ikut di query tiap halaman
+    """
+    error = Signal(str)
+    loadingChanged = Signal(bool)
+
+    def __init__(self, base_query, key_col, columns, page_size=200, max_pages=10, parent=None):
+        super().__init__(parent)
+        self.base_query = base_query.strip().rstrip(";")
+        self.key_col = key_col
+        self.columns = list(columns)
+        self.page_size = page_size
+        self.max_pages = max_pages
+
+        self._pages = OrderedDict()   # no halaman -> list[tuple]
+        self._page_last = []          # kunci terkecil tiap halaman (batas bawah, inklusif)
+        self._page_len = []           # jumlah baris tiap halaman
+        self._page_start = []         # index baris pertama tiap halaman
+        self._row_count = 0
+        self._exhausted = False
+        self._pending = set()         # halaman yang sedang diambil
+
+        self.exprs = select_exprs(self.base_query)   # kolom hasil -> ekspresi SQL
+        self._where, self._params = None, ()
+        self._sort_col = None          # kolom hasil yang jadi urutan utama (None = key)
+        self._descending = True
+
+    # ---------- query ----------
+    def _sort_expr(self):
+        if self._sort_col is None:
+            return None
+        return self.exprs.get(self._sort_col, self._sort_col)
+
+    def _cursor(self, values):
+        # posisi baris dalam urutan: kunci saja, atau (nilai kolom sort, kunci)
+        if self._sort_col is None:
+            return values[0]
+        return (values[self.columns.index(self._sort_col)], values[0])
+
+    def _before(self, a, b):
+        """True jika posisi a ada sebelum b dalam urutan tampilan."""
+        return a > b if self._descending else a < b
+
+    def _local_order_ok(self, cursor):
+        """
+        True jika _before sama dengan urutan server untuk cursor ini: urut
+        kunci, atau kolom sort berupa angka/tanggal. Teks diurutkan server
+        menurut collation (utf8mb4_*_ci: huruf besar/kecil & aksen), yang
+        tidak sama dengan perbandingan str Python.
+        """
+        if self._sort_col is None:
+            return True
+        value = cursor[0]
+        return isinstance(value, (int, float, Decimal, datetime.date)) and not isinstance(value, bool)
+
+    def _page_after(self, page):
+        # batas (eksklusif) halaman = posisi baris terakhir halaman sebelumnya
+        return None if page == 0 else self._page_last[page - 1]
+
+    def _page_sql(self, page):
+        last = self._page_last[page] if page < len(self._page_last) else None
+        if page == len(self._page_last) - 1 and self._exhausted:
+            # halaman terakhir: baris baru sesudah batasnya ikut terambil
+            last = None
+        return page_sql(self.base_query, self.key_col, self.page_size, self._page_after(page), last,
+                        self._where, self._params, self._sort_expr(), self._descending)
+
+    def query_sql(self):
+        """Query seluruh baris sesuai filter & urutan sekarang, tanpa LIMIT (untuk export)."""
+        sql = self.base_query
+        if self._where:
+            sql += f" WHERE ({self._where})"
+        cols = [c for c in (self._sort_expr(), self.key_col) if c]
+        direction = "DESC" if self._descending else "ASC"
+        sql += " ORDER BY " + ", ".join(f"{c} {direction}" for c in cols)
+        return sql, self._params
+
+    def row_query(self, key):
+        """Query satu baris tampilan berdasarkan kunci (untuk tulis lokal); ikut filter aktif."""
+        sql = f"{self.base_query} WHERE {self.key_col} = %s"
+        if self._where:
+            sql += f" AND ({self._where})"
+        return sql, (key,) + tuple(self._params)
+
+    def _request_page(self, page):
+        if page in self._pending:
+            return
+        was_loading = bool(self._pending)
+        self._pending.add(page)
+        sql, params = self._page_sql(page)
+        columns = self.columns
+        executor().submit(
+            (self, page),
+            lambda conn: [tuple(r.get(c) for c in columns) for r in query_rows(conn, sql, params)],
+            lambda rows, p=page: self._page_loaded(p, rows),
+            lambda msg, p=page: self._page_failed(p, msg),
+            read_only=True,
+        )
+        if not was_loading:
+            self.loadingChanged.emit(True)
+
+    def _done_pending(self, page):
+        self._pending.discard(page)
+        if not self._pending:
+            self.loadingChanged.emit(False)
+
+    def _cache_page(self, page, rows):
+        self._pages[page] = rows
+        self._pages.move_to_end(page)
+        while len(self._pages) > self.max_pages:
+            self._pages.popitem(last=False)
+
+    def _recount(self):
+        start = 0
+        self._page_start = []
+        for n in self._page_len:
+            self._page_start.append(start)
+            start += n
+        self._row_count = start
+
+    def _page_loaded(self, page, rows):
+        self._done_pending(page)
+
+        if page < len(self._page_len):
+            # halaman lama yang diambil ulang setelah dibuang dari cache
+            self._reload_page(page, rows)
+            return
+
+        self._cache_page(page, rows)
+        if len(rows) < self.page_size:
+            self._exhausted = True
+        if not rows:
+            return
+
+        first = self._row_count
+        self.beginInsertRows(QModelIndex(), first, first + len(rows) - 1)
+        self._page_last.append(self._cursor(rows[-1]))
+        self._page_len.append(len(rows))
+        self._recount()
+        self.endInsertRows()
+
+    def _reload_page(self, page, rows):
+        start, old_len, new_len = self._page_start[page], self._page_len[page], len(rows)
+        # jumlah baris bisa beda kalau ada yang menulis dari luar aplikasi
+        if new_len > old_len:
+            self.beginInsertRows(QModelIndex(), start + old_len, start + new_len - 1)
+            self._page_len[page] = new_len
+            self._cache_page(page, rows)
+            self._recount()
+            self.endInsertRows()
+        elif new_len < old_len:
+            self.beginRemoveRows(QModelIndex(), start + new_len, start + old_len - 1)
+            self._page_len[page] = new_len
+            self._cache_page(page, rows)
+            self._recount()
+            self.endRemoveRows()
+        else:
+            self._cache_page(page, rows)
+        if page == len(self._page_last) - 1 and rows:
+            self._page_last[page] = self._cursor(rows[-1])
+            if new_len >= self.page_size:
+                self._exhausted = False
+        if new_len:
+            self.dataChanged.emit(self.index(start, 0), self.index(start + new_len - 1, len(self.columns) - 1))
+
+    def _page_failed(self, page, msg):
+        self._done_pending(page)
+        if page >= len(self._page_len):
+            self._exhausted = True
+        self.error.emit(msg)
+
+    def _locate(self, row):
+        page = bisect_right(self._page_start, row) - 1
+        return page, row - self._page_start[page]
+
+    def _row(self, row):
+        if row < 0 or row >= self._row_count:
+            return None
+        page, offset = self._locate(row)
+        rows = self._pages.get(page)
+        if rows is None:
+            self._request_page(page)
+            return None
+        self._pages.move_to_end(page)
+        return rows[offset] if offset < len(rows) else None
+
+    def _page_for_cursor(self, cursor):
+        # halaman yang rentangnya memuat posisi cursor, None jika di luar yang sudah dimuat
+        for page, last in enumerate(self._page_last):
+            if not self._before(last, cursor):
+                return page
+        return None
+
+    def rows_query(self, placeholders, keys):
+        """Seperti row_query untuk banyak kunci: placeholders = "%s, %s, ..." (db.in_chunks)."""
+        sql = f"{self.base_query} WHERE {self.key_col} IN ({placeholders})"
+        if self._where:
+            sql += f" AND ({self._where})"
+        return sql, tuple(keys) + tuple(self._params)
+
+    # ---------- API untuk halaman ----------
+    def set_filter(self, where=None, params=()):
+        """Filter baru (mis. dari search_where) lalu muat ulang dari halaman pertama."""
+        self._where, self._params = where, tuple(params)
+        self.reset()
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        # dipanggil QTableView saat header diklik (setSortingEnabled)
+        sort_col = None if column <= 0 else self.columns[column]
+        descending = order == Qt.DescendingOrder
+        if (sort_col, descending) == (self._sort_col, self._descending):
+            return
+        self._sort_col, self._descending = sort_col, descending
+        self.reset()
+
+    def reset(self):
+        """Batalkan query yang jalan, buang semua halaman, lalu ambil halaman pertama."""
+        for page in self._pending:
+            executor().cancel((self, page))
+        self._pending.clear()
+
+        self.beginResetModel()
+        self._pages.clear()
+        self._page_last = []
+        self._page_len = []
+        self._page_start = []
+        self._row_count = 0
+        self._exhausted = False
+        self.endResetModel()
+        self._request_page(0)
+
+    def is_loading(self):
+        return bool(self._pending)
+
+    def row_values(self, row):
+        return self._row(row)
+
+    def key_at(self, row):
+        values = self._row(row)
+        return None if values is None else values[0]
+
+    def row_of_key(self, key):
+        # cukup cari di halaman yang ada di cache (paling banyak max_pages halaman)
+        for page, rows in self._pages.items():
+            for i, values in enumerate(rows):
+                if values[0] == key:
+                    return self._page_start[page] + i
+        return None
+
+    def upsert_row(self, values):
+        """Sisipkan / perbarui satu baris hasil tulis lokal sesuai urutan tampilan."""
+        cursor = self._cursor(values)
+        row = self.row_of_key(values[0])
+        if row is not None:
+            page, offset = self._locate(row)
+            if self._cursor(self._pages[page][offset]) == cursor:
+                # posisi tidak berubah: ganti isinya saja
+                self._pages[page][offset] = values
+                self.dataChanged.emit(self.index(row, 0), self.index(row, len(self.columns) - 1))
+                return
+            # nilai kolom sort berubah: pindahkan baris
+            self.remove_key(values[0])
+
+        if not self._local_order_ok(cursor):
+            # posisi hanya bisa ditentukan server: ambil ulang halaman yang dimuat,
+            # tiap halaman memakai rentang kuncinya sendiri (lihat _reload_page)
+            self._refetch_cached()
+            return
+
+        page = self._page_for_cursor(cursor)
+        if page is None:
+            if not self._exhausted:
+                # belum sampai halaman itu; nanti ikut terambil oleh fetchMore
+                return
+            if not self._page_last:
+                self._page_last.append(cursor)
+                self._page_len.append(0)
+                self._cache_page(0, [])
+                self._recount()
+            page = len(self._page_last) - 1
+            self._page_last[page] = cursor
+
+        rows = self._pages.get(page)
+        start = self._page_start[page]
+        # halaman tidak di cache: cukup tambah panjangnya, isi ikut saat diambil ulang
+        pos = 0
+        if rows is not None:
+            while pos < len(rows) and self._before(self._cursor(rows[pos]), cursor):
+                pos += 1
+
+        row = start + pos
+        self.beginInsertRows(QModelIndex(), row, row)
+        if rows is not None:
+            rows.insert(pos, values)
+        self._page_len[page] += 1
+        self._recount()
+        self.endInsertRows()
+
+    def _refetch_cached(self):
+        if not self._page_last:
+            if self._exhausted:
+                self._exhausted = False
+                self._request_page(0)
+            return
+        pages = set(self._pages)
+        if self._exhausted:
+            pages.add(len(self._page_last) - 1)
+        for page in sorted(pages):
+            # query yang masih jalan mungkin dimulai sebelum penulisan; ganti
+            self._pending.discard(page)
+            self._request_page(page)
+
+    def remove_key(self, key):
+        row = self.row_of_key(key)
+        if row is None:
+            return
+        page, offset = self._locate(row)
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._pages[page][offset]
+        self._page_len[page] -= 1
+        self._recount()
+        self.endRemoveRows()
+
+    # ---------- QAbstractTableModel ----------
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._row_count
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.columns)
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return False
+        return len(self._page_last) not in self._pending
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        self._request_page(len(self._page_last))
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role != Qt.DisplayRole:
+            return None
+        values = self._row(index.row())
+        if values is None:
+            return ""
+        val = values[index.column()]
+        return "" if val is None else str(val)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role != Qt.DisplayRole:
+            return None
+        if orientation == Qt.Horizontal:
+            return self.columns[section]
+        return str(section + 1)
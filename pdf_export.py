@@ -0,0 +1,139 @@
+from PySide6.QtCore import Qt, QMarginsF, QRectF
+from PySide6.QtGui import QFont, QFontMetricsF, QPageLayout, QPageSize, QPainter, QPdfWriter
+
+from db import connection, stream_query
+
+
+class PdfTableWriter:
+    """
+    Menulis tabel ke PDF halaman demi halaman dengan QPdfWriter/QPainter.
+    Baris langsung digambar lalu dibuang, jadi memori tidak tergantung
+    jumlah baris. Header kolom diulang di setiap halaman.
+
+    Lebar kolom dihitung dari header + sample_rows (baris awal), teks yang
+    lebih panjang dipotong dengan "...".
+    """
+    def __init__(self, path, title, headers, sample_rows=(), font_size=8, landscape=True):
+        self.title = title
+        self.headers = [str(h) for h in headers]
+
+        self.writer = QPdfWriter(path)
+        self.writer.setTitle(title)
+        self.writer.setResolution(150)
+        self.writer.setPageSize(QPageSize(QPageSize.A4))
+        self.writer.setPageOrientation(QPageLayout.Landscape if landscape else QPageLayout.Portrait)
+        self.writer.setPageMargins(QMarginsF(10, 10, 10, 10), QPageLayout.Millimeter)
+
+        self.painter = QPainter(self.writer)
+        self.font = QFont("Arial", font_size)
+        self.bold = QFont("Arial", font_size, QFont.Bold)
+        self.title_font = QFont("Arial", font_size + 6, QFont.Bold)
+        self.fm = QFontMetricsF(self.font, self.writer)
+
+        rect = self.writer.pageLayout().paintRectPixels(self.writer.resolution())
+        self.page_w, self.page_h = rect.width(), rect.height()
+        self.row_h = self.fm.height() * 1.5
+        self.pad = self.fm.averageCharWidth()
+        self.col_w = self._column_widths(sample_rows)
+
+        self.page_no = 0
+        self.y = 0.0
+        self.rows_written = 0
+        self._new_page()
+
+    def _column_widths(self, sample_rows):
+        bold_fm = QFontMetricsF(self.bold, self.writer)
+        widths = [bold_fm.horizontalAdvance(h) + 2 * self.pad for h in self.headers]
+        for row in sample_rows:
+            for i, val in enumerate(row):
+                widths[i] = max(widths[i], self.fm.horizontalAdvance(_text(val)) + 2 * self.pad)
+        total = sum(widths) or 1
+        if total > self.page_w:
+            widths = [w * self.page_w / total for w in widths]
+        return widths
+
+    def _new_page(self):
+        if self.page_no:
+            self._footer()
+            self.writer.newPage()
+        self.page_no += 1
+        self.y = 0.0
+
+        if self.page_no == 1:
+            self.painter.setFont(self.title_font)
+            title_h = QFontMetricsF(self.title_font, self.writer).height() * 1.6
+            self.painter.drawText(QRectF(0, 0, self.page_w, title_h), Qt.AlignLeft | Qt.AlignVCenter, self.title)
+            self.y = title_h
+
+        self.painter.setFont(self.bold)
+        self.painter.fillRect(QRectF(0, self.y, sum(self.col_w), self.row_h), Qt.lightGray)
+        self._draw_cells(self.headers)
+        self.painter.setFont(self.font)
+
+    def _footer(self):
+        self.painter.setFont(self.font)
+        self.painter.drawText(
+            QRectF(0, self.page_h - self.row_h, self.page_w, self.row_h),
+            Qt.AlignRight | Qt.AlignVCenter, f"Halaman {self.page_no}",
+        )
+
+    def _draw_cells(self, values):
+        x = 0.0
+        for w, val in zip(self.col_w, values):
+            cell = QRectF(x, self.y, w, self.row_h)
+            self.painter.drawRect(cell)
+            text = self.fm.elidedText(_text(val), Qt.ElideRight, w - 2 * self.pad)
+            self.painter.drawText(cell.adjusted(self.pad, 0, -self.pad, 0), Qt.AlignLeft | Qt.AlignVCenter, text)
+            x += w
+        self.y += self.row_h
+
+    def write_row(self, values):
+        # sisakan satu baris untuk footer nomor halaman
+        if self.y + 2 * self.row_h > self.page_h:
+            self._new_page()
+        self._draw_cells(values)
+        self.rows_written += 1
+
+    def close(self):
+        self._footer()
+        self.painter.end()
+
+
+def _text(val):
+    return "" if val is None else str(val)
+
+
+def write_pdf(path, title, headers, rows, progress=None, progress_every=500, sample_size=200):
+    """
+    Tulis rows (iterable tuple/list, boleh generator) ke PDF.
+    progress(n) dipanggil setiap progress_every baris dan di akhir.
+    Return jumlah baris yang ditulis.
+    """
+    rows = iter(rows)
+    sample = []
+    for row in rows:
+        sample.append(row)
+        if len(sample) >= sample_size:
+            break
+
+    pdf = PdfTableWriter(path, title, headers, sample)
+    try:
+        for source in (sample, rows):
+            for row in source:
+                pdf.write_row(row)
+                if progress and pdf.rows_written % progress_every == 0:
+                    progress(pdf.rows_written)
+    finally:
+        pdf.close()
+    if progress:
+        progress(pdf.rows_written)
+    return pdf.rows_written
+
+
+def export_query_pdf(path, title, query, params=None, conn=None, progress=None, batch=1000):
+    """Export hasil query langsung ke PDF tanpa menampung seluruh hasil di memori."""
+    if conn is None:
+        with connection(read_only=True) as own:
+            return export_query_pdf(path, title, query, params, own, progress, batch)
+    headers, rows = stream_query(conn, query, params, batch)
+    return write_pdf(path, title, headers, rows, progress)
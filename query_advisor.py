@@ -0,0 +1,403 @@
+"""
+Diagnostik query: jalankan EXPLAIN FORMAT=JSON untuk semua query yang
+dipakai aplikasi (view CrudPage, opsi FK, report) terhadap skema live,
+tandai full scan / filesort / temporary table, lalu buat migration index
+yang aman dijalankan berulang kali.
+
+Kandidat index diambil dari kolom di node plan yang bermasalah (kolom join,
+GROUP BY, ORDER BY). Kandidat yang sudah tercakup index lama (termasuk PK
+yang otomatis ada di ujung index sekunder InnoDB) dilewati, dan index lama
+yang menjadi prefix index baru dibuang di migration yang sama.
+
+Pemakaian:
+    python query_advisor.py                     # laporan saja
+    python query_advisor.py --out indexes.sql   # + tulis migration
+    python query_advisor.py --apply             # + jalankan migration
+"""
+import json
+import re
+import sys
+
+from db import connection
+
+# ---------- kumpulkan query ----------
+def collect_queries():
+    """list[(nama, sql, params)] untuk semua query terdaftar di aplikasi."""
+    from crud_pages import (
+        UsersPage, DriversPage, AdminPage, OrdersPage, PaymentsPage,
+        USERS_OPTIONS_SQL, DRIVERS_OPTIONS_SQL, ORDERS_OPTIONS_SQL,
+    )
+    from paged_model import page_sql
+    import report_dashboard
+    import report_windows
+    from report_engine import BASE_QUERY
+    import rollup
+
+    queries = []
+    for cls in (UsersPage, DriversPage, AdminPage, OrdersPage, PaymentsPage):
+        name = cls.__name__
+        sql, params = page_sql(cls.VIEW_QUERY, cls.KEY_COL, 200)
+        queries.append((f"{name} halaman pertama", sql, params))
+        sql, params = page_sql(cls.VIEW_QUERY, cls.KEY_COL, 200, after=1000)
+        queries.append((f"{name} halaman lanjutan", sql, params))
+        queries.append((f"{name} baris per PK", f"{cls.VIEW_QUERY.strip()} WHERE {cls.KEY_COL} = %s", (1,)))
+
+    queries.append(("FK users", USERS_OPTIONS_SQL, ()))
+    queries.append(("FK drivers", DRIVERS_OPTIONS_SQL, ()))
+    queries.append(("FK orders", ORDERS_OPTIONS_SQL, ()))
+
+    for title, q, *_ in report_dashboard.REPORTS + report_windows.REPORTS:
+        if isinstance(q, str):
+            queries.append((f"Report {title}", q, ()))
+    queries.append(("Report join dasar (report_engine)", BASE_QUERY, ()))
+    queries.append(("Rollup rebuild driver", rollup._DRIVER_ACTUAL, ()))
+    queries.append(("Rollup rebuild metode", rollup._METODE_ACTUAL, ()))
+    return queries
+
+
+# ---------- analisa EXPLAIN ----------
+def _walk(node, table=None):
+    """Yield (tabel, node) untuk setiap dict di plan JSON (MySQL & MariaDB)."""
+    if isinstance(node, dict):
+        table = node.get("table_name", table)
+        yield table, node
+        for v in node.values():
+            yield from _walk(v, table)
+    elif isinstance(node, list):
+        for v in node:
+            yield from _walk(v, table)
+
+
+def findings(plan):
+    """list[(tabel, masalah)] dari satu plan EXPLAIN FORMAT=JSON."""
+    out = []
+    for table, node in _walk(plan):
+        if node.get("access_type") == "ALL":
+            rows = node.get("rows_examined_per_scan", node.get("rows", "?"))
+            out.append((table, f"full scan (~{rows} baris)"))
+        # MySQL: using_filesort / using_temporary_table, MariaDB: node filesort / temporary_table
+        if node.get("using_filesort") is True or "filesort" in node:
+            out.append((table, "filesort"))
+        if node.get("using_temporary_table") is True or "temporary_table" in node:
+            out.append((table, "temporary table"))
+    # buang duplikat, pertahankan urutan
+    return list(dict.fromkeys(out))
+
+
+_TABLE_REF = re.compile(
+    r"\b(?:FROM|JOIN)\s+`?(\w+)`?(?:\s+(?:AS\s+)?(?!ON\b|WHERE\b|JOIN\b|LEFT\b|GROUP\b|ORDER\b)(\w+))?",
+    re.I,
+)
+
+
+def table_aliases(sql):
+    """{alias: tabel} dari klausa FROM/JOIN; kunci None = tabel FROM pertama."""
+    aliases = {}
+    for table, alias in _TABLE_REF.findall(sql):
+        aliases.setdefault(None, table)
+        aliases[alias or table] = table
+    return aliases
+
+
+def explain(conn, sql, params=()):
+    cur = conn.cursor()
+    try:
+        cur.execute("EXPLAIN FORMAT=JSON " + sql.strip().rstrip(";"), params)
+        return json.loads(cur.fetchone()[0])
+    finally:
+        cur.close()
+
+
+def index_columns(conn):
+    """
+    {tabel: {nama index: (kolom, ...)}} dari information_schema, plus
+    {tabel: set(nama index unik)}. Index dengan prefix panjang (SUB_PART)
+    tidak dimasukkan karena tidak bisa dipakai untuk covering/urutan penuh.
+    """
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT table_name, index_name, column_name, non_unique, sub_part
+            FROM information_schema.STATISTICS
+            WHERE table_schema = DATABASE()
+            ORDER BY table_name, index_name, seq_in_index
+        """)
+        indexes, unique, partial = {}, {}, set()
+        for table, name, col, non_unique, sub_part in cur.fetchall():
+            if sub_part is not None:
+                partial.add((table, name))
+            indexes.setdefault(table, {}).setdefault(name, ())
+            indexes[table][name] += (col,)
+            if not non_unique:
+                unique.setdefault(table, set()).add(name)
+        for table, name in partial:
+            del indexes[table][name]
+        return indexes, unique
+    finally:
+        cur.close()
+
+
+def table_columns(conn):
+    """{tabel: set(kolom)} untuk memastikan kolom hasil parsing SQL memang ada."""
+    cur = conn.cursor()
+    try:
+        cur.execute("""
+            SELECT table_name, column_name FROM information_schema.COLUMNS
+            WHERE table_schema = DATABASE()
+        """)
+        out = {}
+        for table, col in cur.fetchall():
+            out.setdefault(table, set()).add(col)
+        return out
+    finally:
+        cur.close()
+
+
+# ---------- kandidat index dari plan ----------
+_EQUALITY = re.compile(r"([`\w.]+)\s*=\s*([`\w.]+)")
+_AGGREGATE = re.compile(r"\b(?:SUM|MIN|MAX|AVG|COUNT)\s*\(\s*(?:DISTINCT\s+)?([`\w.]+)\s*\)", re.I)
+_CLAUSE_END = r"(?=\bHAVING\b|\bORDER\s+BY\b|\bLIMIT\b|\bFOR\s+UPDATE\b|;|\)|$)"
+
+
+def _column_ref(text):
+    """(alias, kolom) dari `db`.`alias`.`kolom` / alias.kolom / kolom; None jika bukan kolom."""
+    parts = text.replace("`", "").split(".")
+    if not all(re.fullmatch(r"[A-Za-z_]\w*", p) for p in parts):
+        return None
+    return (parts[-2] if len(parts) >= 2 else None), parts[-1]
+
+
+def _clause_columns(sql, keyword):
+    """Kolom di klausa GROUP BY / ORDER BY terakhir; None jika ada ekspresi."""
+    matches = list(re.finditer(rf"\b{keyword}\s+BY\s+(.+?){_CLAUSE_END}", sql, re.I | re.S))
+    if not matches:
+        return []
+    refs = []
+    for item in matches[-1].group(1).split(","):
+        item = re.sub(r"\s+(ASC|DESC)\s*$", "", item.strip(), flags=re.I)
+        ref = _column_ref(item)
+        if ref is None:
+            return None
+        refs.append(ref)
+    return refs
+
+
+class _Resolver:
+    """Memetakan (alias, kolom) ke (tabel, kolom) untuk satu query."""
+    def __init__(self, sql, columns):
+        self.aliases = table_aliases(sql)
+        self.columns = columns
+        self.single = len(set(self.aliases.values())) == 1
+
+    def table(self, alias):
+        return self.aliases.get(alias, alias)
+
+    def resolve(self, ref):
+        if ref is None:
+            return None
+        alias, col = ref
+        # kolom tanpa alias hanya aman di query satu tabel
+        if alias is None and not self.single:
+            return None
+        table = self.aliases.get(alias)
+        if table is None or col not in self.columns.get(table, ()):
+            return None   # alias kolom SELECT (mis. total_pesanan) / ekspresi
+        return table, col
+
+    def resolve_all(self, refs):
+        """(tabel, (kolom, ...)) jika semua kolom dari satu tabel, selain itu None."""
+        resolved = [self.resolve(r) for r in refs or ()]
+        if not resolved or None in resolved or len({t for t, _ in resolved}) != 1:
+            return None
+        return resolved[0][0], tuple(dict.fromkeys(c for _, c in resolved))
+
+
+def _join_columns(node, alias, resolver):
+    """Kolom milik alias di kondisi join (kolom = kolom tabel lain) pada node."""
+    cols = []
+    for left, right in _EQUALITY.findall(node.get("attached_condition", "")):
+        a, b = _column_ref(left), _column_ref(right)
+        if a is None or b is None or a[0] is None or b[0] is None:
+            continue
+        if resolver.table(a[0]) == resolver.table(b[0]):
+            continue
+        for ref in (a, b):
+            if ref[0] == alias:
+                cols.append(ref[1])
+    return cols
+
+
+def candidates(sql, plan, columns):
+    """
+    list[(tabel, kolom, alasan)] yang diturunkan dari node plan yang
+    bermasalah, bukan daftar tetap:
+    - full scan tabel yang di-join : kolom join tabel itu
+    - GROUP BY + temporary table   : kolom GROUP BY + kolom agregat (covering)
+    - filesort                     : kolom akses ref tabel itu + kolom ORDER BY
+    Full scan tabel pertama tanpa kondisi join (report yang memang membaca
+    seluruh tabel) tidak menghasilkan kandidat.
+    """
+    resolver = _Resolver(sql, columns)
+    out = []
+    access = {}   # tabel -> kolom index yang dipakai akses ref (untuk prefix ORDER BY)
+    temporary = filesort = False
+    for alias, node in _walk(plan):
+        if node.get("using_temporary_table") is True or "temporary_table" in node:
+            temporary = True
+        if node.get("using_filesort") is True or "filesort" in node:
+            filesort = True
+        if alias is None or "access_type" not in node:
+            continue
+        table = resolver.table(alias)
+        if node["access_type"] in ("ref", "eq_ref") and node.get("used_key_parts"):
+            access[table] = tuple(node["used_key_parts"])
+        if node["access_type"] == "ALL":
+            cols = [c for c in _join_columns(node, alias, resolver) if c in columns.get(table, ())]
+            if cols:
+                out.append((table, tuple(dict.fromkeys(cols)), "full scan saat join"))
+
+    group = _clause_columns(sql, "GROUP")
+    if temporary and group:
+        key = resolver.resolve_all(group)
+        if key:
+            table, cols = key
+            aggregated = resolver.resolve_all(_column_ref(a) for a in _AGGREGATE.findall(sql))
+            if aggregated and aggregated[0] == table:
+                cols += tuple(c for c in aggregated[1] if c not in cols)
+            out.append((table, cols, "GROUP BY dengan temporary table"))
+    elif filesort and not group:
+        key = resolver.resolve_all(_clause_columns(sql, "ORDER"))
+        if key:
+            table, cols = key
+            prefix = tuple(c for c in access.get(table, ()) if c not in cols)
+            out.append((table, prefix + cols, "filesort"))
+    return out
+
+
+def _covered(cols, indexes, pk):
+    """
+    True jika cols sudah dilayani index yang ada: prefix dari (kolom index +
+    PK). Index sekunder InnoDB selalu diakhiri PK, jadi (a, pk) sama dengan (a).
+    """
+    for name, idx_cols in indexes.items():
+        full = idx_cols if name == "PRIMARY" else idx_cols + tuple(c for c in pk if c not in idx_cols)
+        if full[:len(cols)] == cols:
+            return True
+    return False
+
+
+def plan_indexes(found, indexes, unique):
+    """
+    found: list[(tabel, kolom, alasan)] dari semua query.
+    Return list[(tabel, nama, kolom, alasan, index_lama_yang_dibuang)].
+    Kandidat yang sudah tercakup index lama dilewati; kandidat yang jadi
+    prefix kandidat lain digabung; index non-unik lama yang jadi prefix
+    index baru dibuang di migration yang sama (FK tetap punya index).
+    """
+    merged = {}
+    for table, cols, reason in found:
+        merged.setdefault((table, cols), set()).add(reason)
+    todo = []
+    for (table, cols), reasons in merged.items():
+        existing = indexes.get(table, {})
+        pk = existing.get("PRIMARY", ())
+        # kolom PK di ujung tidak menambah apa-apa untuk index sekunder
+        while cols and cols[-1] in pk and len(cols) > 1:
+            cols = cols[:-1]
+        if _covered(cols, existing, pk):
+            continue
+        if any(t == table and c != cols and c[:len(cols)] == cols for (t, c) in merged):
+            continue   # ada kandidat lebih panjang dengan prefix yang sama
+        drops = tuple(name for name, idx_cols in existing.items()
+                      if name != "PRIMARY" and name not in unique.get(table, ())
+                      and cols[:len(idx_cols)] == idx_cols)
+        name = f"idx_{table}_{'_'.join(cols)}"[:64]
+        todo.append((table, name, cols, ", ".join(sorted(reasons)), drops))
+    return sorted(todo)
+
+
+# ---------- migration ----------
+def _guarded(table, name, exists, statement):
+    """Statement yang hanya dijalankan jika index name ada (exists=1) / belum ada (exists=0)."""
+    return f"""SET @s = IF((SELECT COUNT(*) FROM information_schema.STATISTICS
+             WHERE table_schema = DATABASE() AND table_name = '{table}' AND index_name = '{name}') {'>' if exists else '='} 0,
+            '{statement}',
+            'SELECT 1');
+PREPARE stmt FROM @s;
+EXECUTE stmt;
+DEALLOCATE PREPARE stmt;"""
+
+
+def migration_sql(indexes):
+    """SQL idempotent: index baru dibuat dulu, baru index prefix lama dibuang (MySQL & MariaDB)."""
+    parts = ["-- migration index hasil query_advisor.py (aman dijalankan berulang)"]
+    for table, name, cols, reason, drops in indexes:
+        col_sql = ", ".join(f"`{c}`" for c in cols)
+        parts.append(f"\n-- {reason}")
+        parts.append(_guarded(table, name, False, f"ALTER TABLE `{table}` ADD INDEX `{name}` ({col_sql})"))
+        for old in drops:
+            parts.append(f"-- {old} adalah prefix {name}, jadi tidak diperlukan lagi")
+            parts.append(_guarded(table, old, True, f"ALTER TABLE `{table}` DROP INDEX `{old}`"))
+    return "\n".join(parts) + "\n"
+
+
+def apply_indexes(conn, indexes):
+    have, _ = index_columns(conn)
+    cur = conn.cursor()
+    try:
+        for table, name, cols, _, drops in indexes:
+            if name not in have.get(table, {}):
+                col_sql = ", ".join(f"`{c}`" for c in cols)
+                cur.execute(f"ALTER TABLE `{table}` ADD INDEX `{name}` ({col_sql})")
+            for old in drops:
+                if old in have.get(table, {}):
+                    cur.execute(f"ALTER TABLE `{table}` DROP INDEX `{old}`")
+    finally:
+        cur.close()
+
+
+def run(out_path=None, apply=False):
+    found = []
+    with connection() as conn:
+        columns = table_columns(conn)
+        for name, sql, params in collect_queries():
+            try:
+                plan = explain(conn, sql, params)
+            except Exception as e:
+                print(f"[ERROR] {name}: {e}")
+                continue
+            problems = findings(plan)
+            # plan memakai alias (o, u_pel, ...); ubah ke nama tabel asli
+            aliases = table_aliases(sql)
+            problems = [(aliases.get(t, t), p) for t, p in problems]
+            status = "OK" if not problems else "; ".join(f"{t}: {p}" for t, p in problems)
+            print(f"[{'OK' if not problems else '!!'}] {name}: {status}")
+            if problems:
+                found += [(t, c, f"{r} ({name})") for t, c, r in candidates(sql, plan, columns)]
+
+        indexes, unique = index_columns(conn)
+        todo = plan_indexes(found, indexes, unique)
+
+        print()
+        if not todo:
+            print("Tidak ada index baru yang disarankan.")
+        for table, name, cols, reason, drops in todo:
+            extra = f"; buang {', '.join(drops)}" if drops else ""
+            print(f"Saran: {table}.{name} ({', '.join(cols)}) - {reason}{extra}")
+
+        if out_path and todo:
+            with open(out_path, "w", encoding="utf-8") as f:
+                f.write(migration_sql(todo))
+            print(f"Migration ditulis ke {out_path}")
+        if apply and todo:
+            apply_indexes(conn, todo)
+            print("Index sudah dibuat.")
+    return todo
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    out = None
+    if "--out" in args:
+        out = args[args.index("--out") + 1]
+    run(out_path=out, apply="--apply" in args)
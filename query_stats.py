@@ -0,0 +1,233 @@
+"""
+Pengukuran query: setiap statement yang lewat db.query_rows / execute /
+insert / select_prepared dan report_engine.read_frame dicatat waktunya,
+jumlah baris, perkiraan byte, dan halaman yang memanggil.
+
+- per query (SQL dinormalisasi) disimpan histogram latensi dengan bucket
+  geometris, jadi p50/p95/p99 bisa dihitung tanpa menyimpan semua sampel
+- query yang lebih lama dari STATS_CONFIG["slow_ms"] masuk slow log
+  (di memori, dan ke file jika slow_log_path diisi)
+- halaman pemanggil: diset QueryExecutor untuk query background
+  (page_scope), selain itu dicari dari stack (objek dengan atribut title)
+
+Ditampilkan di halaman Diagnostics (diagnostics_page.py).
+"""
+import re
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+
+STATS_CONFIG = {
+    "enabled": True,
+    "slow_ms": 500,            # ambang slow log (ms)
+    "slow_log_size": 200,      # entri slow log yang disimpan di memori
+    "slow_log_path": None,     # jika diisi, slow log juga ditulis ke file ini
+}
+
+# batas atas bucket (ms): 0.1 ms x 1.25^i -> selisih antar bucket 25%
+BUCKETS = [0.1 * 1.25 ** i for i in range(80)]
+
+_SPACES = re.compile(r"\s+")
+_IN_LIST = re.compile(r"%s(?:\s*,\s*%s)+")
+
+
+def normalize_sql(sql) -> str:
+    """SQL satu baris; daftar IN (%s, %s, ...) disamakan supaya jadi satu entri."""
+    text = _SPACES.sub(" ", str(sql)).strip().rstrip(";")
+    return _IN_LIST.sub("%s, ...", text)
+
+
+def estimate_bytes(rows, sample=100) -> int:
+    """Perkiraan ukuran hasil (teks/angka) dari sampel baris, bukan semua baris."""
+    if not rows:
+        return 0
+    head = rows[:sample]
+    size = 0
+    for row in head:
+        values = row.values() if isinstance(row, dict) else row
+        for v in values:
+            size += len(v) if isinstance(v, (str, bytes, bytearray)) else 8
+    return size * len(rows) // len(head)
+
+
+class QueryStat:
+    def __init__(self, sql):
+        self.sql = sql
+        self.count = 0
+        self.errors = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+        self.rows = 0
+        self.bytes = 0
+        self.pages = set()
+        self.hist = [0] * (len(BUCKETS) + 1)
+
+    def add(self, ms, rows, nbytes, page, error):
+        self.count += 1
+        self.errors += bool(error)
+        self.total_ms += ms
+        self.max_ms = max(self.max_ms, ms)
+        self.rows += rows or 0
+        self.bytes += nbytes or 0
+        self.pages.add(page)
+        self.hist[bisect_left(BUCKETS, ms)] += 1
+
+    def percentile(self, p) -> float:
+        """Batas atas bucket tempat persentil p jatuh (dibatasi max_ms)."""
+        if not self.count:
+            return 0.0
+        need = p / 100 * self.count
+        seen = 0
+        for i, n in enumerate(self.hist):
+            seen += n
+            if seen >= need:
+                return min(BUCKETS[i] if i < len(BUCKETS) else self.max_ms, self.max_ms)
+        return self.max_ms
+
+    def summary(self) -> dict:
+        return {
+            "sql": self.sql,
+            "pages": ", ".join(sorted(self.pages)),
+            "count": self.count,
+            "errors": self.errors,
+            "p50": self.percentile(50),
+            "p95": self.percentile(95),
+            "p99": self.percentile(99),
+            "max": self.max_ms,
+            "avg": self.total_ms / self.count if self.count else 0.0,
+            "rows": self.rows,
+            "bytes": self.bytes,
+        }
+
+
+class QueryStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._slow = deque(maxlen=STATS_CONFIG["slow_log_size"])
+        self.since = time.time()
+
+    def record(self, sql, seconds, rows=None, nbytes=None, page=None, error=None):
+        key = normalize_sql(sql)
+        ms = seconds * 1000
+        page = page or current_page()
+        with self._lock:
+            stat = self._stats.get(key)
+            if stat is None:
+                stat = self._stats[key] = QueryStat(key)
+            stat.add(ms, rows, nbytes, page, error)
+            slow = ms >= STATS_CONFIG["slow_ms"]
+            if slow:
+                entry = {"time": time.strftime("%H:%M:%S"), "ms": ms, "page": page, "sql": key,
+                         "rows": rows, "bytes": nbytes, "error": error}
+                self._slow.append(entry)
+        if slow and STATS_CONFIG["slow_log_path"]:
+            _append_slow_log(entry)
+
+    def summaries(self):
+        """Ringkasan per query, paling lambat (p95) dulu."""
+        with self._lock:
+            data = [s.summary() for s in self._stats.values()]
+        return sorted(data, key=lambda s: s["p95"], reverse=True)
+
+    def slow_log(self):
+        with self._lock:
+            return list(reversed(self._slow))
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._slow = deque(maxlen=STATS_CONFIG["slow_log_size"])
+            self.since = time.time()
+
+
+def _append_slow_log(entry):
+    try:
+        with open(STATS_CONFIG["slow_log_path"], "a", encoding="utf-8") as f:
+            f.write(f"{entry['time']}\t{entry['ms']:.1f} ms\t{entry['page']}\t"
+                    f"rows={entry['rows']}\t{entry['sql']}\n")
+    except OSError:
+        pass
+
+
+# ---------- halaman pemanggil ----------
+_local = threading.local()
+
+
+@contextmanager
+def page_scope(label):
+    """Semua query di thread ini selama blok dicatat atas nama label."""
+    prev = getattr(_local, "page", None)
+    _local.page = label
+    try:
+        yield
+    finally:
+        _local.page = prev
+
+
+def label_of(obj) -> str:
+    """Nama halaman dari key executor / objek: atribut title, atau milik parent-nya."""
+    if isinstance(obj, tuple) and obj:
+        obj = obj[0]
+    if isinstance(obj, str):
+        return obj
+    node = obj
+    for _ in range(3):
+        title = getattr(node, "title", None)
+        if isinstance(title, str):
+            return title
+        parent = getattr(node, "parent", None)
+        node = parent() if callable(parent) else None
+        if node is None:
+            break
+    return type(obj).__name__
+
+
+def current_page(max_depth=20) -> str:
+    page = getattr(_local, "page", None)
+    if page:
+        return page
+    # pemanggilan langsung (thread UI): cari self yang punya title di stack
+    frame = sys._getframe(1)
+    for _ in range(max_depth):
+        if frame is None:
+            break
+        owner = frame.f_locals.get("self")
+        title = getattr(owner, "title", None)
+        if isinstance(title, str):
+            return title
+        frame = frame.f_back
+    return "-"
+
+
+# ---------- hook ----------
+@contextmanager
+def timed(sql):
+    """
+    Ukur satu statement. Pemanggil mengisi probe["rows"] / probe["bytes"]
+    (opsional) sebelum blok selesai.
+    """
+    if not STATS_CONFIG["enabled"]:
+        yield {}
+        return
+    probe = {"rows": None, "bytes": None}
+    t0 = time.perf_counter()
+    try:
+        yield probe
+    except Exception as e:
+        query_stats().record(sql, time.perf_counter() - t0, error=type(e).__name__)
+        raise
+    query_stats().record(sql, time.perf_counter() - t0, probe["rows"], probe["bytes"])
+
+
+_stats = None
+
+
+def query_stats() -> QueryStats:
+    global _stats
+    if _stats is None:
+        _stats = QueryStats()
+    return _stats
@@ -0,0 +1,151 @@
+import itertools
+import threading
+
+from PySide6.QtCore import QObject, QRunnable, QThreadPool, Signal
+
+from db import POOL_CONFIG, connection, discard_connection, kill_query
+from query_stats import label_of, page_scope
+
+
+class _TaskSignals(QObject):
+    done = Signal(int, object)
+    failed = Signal(int, str)
+
+
+class QueryTask(QRunnable):
+    """
+    Menjalankan fn(conn) di thread pool dengan koneksi dari pool DB.
+    connection_id (beserta server-nya) dicatat selama query berjalan supaya
+    bisa di-KILL. KILL dijalankan dengan _lock dipegang dan run() mengambil
+    lock yang sama sebelum melepas koneksi, jadi KILL tidak pernah mengenai
+    koneksi yang sudah kembali ke pool dan dipakai task lain. Koneksi yang
+    pernah di-KILL dibuang, tidak dikembalikan ke pool.
+    page: nama halaman pemanggil untuk query_stats.
+    read_only: query baca yang boleh dilayani replika (lihat db.connection).
+    """
+    def __init__(self, token, fn, page=None, read_only=False):
+        super().__init__()
+        self.token = token
+        self.fn = fn
+        self.page = page
+        self.read_only = read_only
+        self.signals = _TaskSignals()
+        self.cancelled = False
+        self.connection_id = None
+        self.killed = False
+        self._lock = threading.Lock()
+
+    def run(self):
+        if self.cancelled:
+            return
+        try:
+            with connection(self.read_only) as conn:
+                with self._lock:
+                    self.connection_id = (conn.connection_id, conn.server_host, conn.server_port)
+                try:
+                    with page_scope(self.page):
+                        result = self.fn(conn)
+                finally:
+                    with self._lock:
+                        self.connection_id = None
+                        if self.killed:
+                            discard_connection(conn)
+        except Exception as e:
+            if not self.cancelled:
+                self.signals.failed.emit(self.token, str(e))
+            return
+        if not self.cancelled:
+            self.signals.done.emit(self.token, result)
+
+    def cancel(self):
+        """Tandai batal; return True jika query sedang jalan (perlu di-KILL, lihat kill())."""
+        with self._lock:
+            self.cancelled = True
+            return self.connection_id is not None
+
+    def kill(self):
+        """KILL QUERY selama koneksi masih dipegang task ini; tidak apa-apa jika sudah selesai."""
+        with self._lock:
+            if self.connection_id is None:
+                return   # sudah selesai, koneksinya mungkin sudah dipakai task lain
+            self.killed = True
+            try:
+                kill_query(*self.connection_id)
+            except Exception:
+                pass
+
+
+class _KillTask(QRunnable):
+    def __init__(self, task):
+        super().__init__()
+        self.task = task
+
+    def run(self):
+        self.task.kill()
+
+
+class QueryExecutor(QObject):
+    """
+    Antrian query di background (QThreadPool).
+    Tiap permintaan punya key (mis. halaman/tab). Submit baru dengan key yang
+    sama membatalkan permintaan lama, termasuk KILL QUERY di server.
+    Callback on_done/on_error dipanggil di thread GUI lewat signal.
+    """
+    def __init__(self, max_threads=None, parent=None):
+        super().__init__(parent)
+        self.pool = QThreadPool(self)
+        # sisakan satu koneksi pool untuk query sinkron di thread GUI
+        self.pool.setMaxThreadCount(max_threads or max(1, POOL_CONFIG["size"] - 1))
+        self._tokens = itertools.count(1)
+        self._active = {}   # key -> (token, task, on_done, on_error)
+
+    def submit(self, key, fn, on_done, on_error=None, read_only=False):
+        """read_only=True untuk query baca (daftar, report, export) yang boleh ke replika."""
+        self.cancel(key)
+        token = next(self._tokens)
+        task = QueryTask(token, fn, label_of(key), read_only)
+        task.signals.done.connect(lambda t, res, k=key: self._finish(k, t, res, None))
+        task.signals.failed.connect(lambda t, msg, k=key: self._finish(k, t, None, msg))
+        self._active[key] = (token, task, on_done, on_error)
+        self.pool.start(task)
+        return token
+
+    def cancel(self, key):
+        entry = self._active.pop(key, None)
+        if entry is None:
+            return
+        task = entry[1]
+        try:
+            taken = self.pool.tryTake(task)
+        except RuntimeError:
+            # objek C++ sudah dihapus Qt (task selesai)
+            taken = False
+        if not taken:
+            if task.cancel():
+                # pakai pool global supaya KILL tidak antre di belakang query
+                QThreadPool.globalInstance().start(_KillTask(task))
+
+    def is_running(self, key):
+        return key in self._active
+
+    def _finish(self, key, token, result, error):
+        entry = self._active.get(key)
+        if entry is None or entry[0] != token:
+            # hasil dari permintaan yang sudah diganti / dibatalkan
+            return
+        del self._active[key]
+        _, _, on_done, on_error = entry
+        if error is None:
+            on_done(result)
+        elif on_error is not None:
+            on_error(error)
+
+
+_executor = None
+
+
+def executor():
+    global _executor
+    if _executor is None:
+        _executor = QueryExecutor()
+    return _executor
@@ -0,0 +1,87 @@
+import time
+
+from PySide6.QtCore import Qt, QModelIndex, Signal
+from PySide6.QtGui import QStandardItem, QStandardItemModel
+from PySide6.QtWidgets import QCompleter, QHBoxLayout, QLabel, QLineEdit, QWidget
+
+from trigram_index import quick_index
+
+KIND_LABELS = {"users": "User", "drivers": "Driver", "places": "Tempat"}
+
+
+def hit_label(hit) -> str:
+    label = KIND_LABELS.get(hit["kind"], hit["kind"])
+    if hit["kind"] == "places":
+        return f"{label}: {hit['text']} ({hit['count']} pesanan)"
+    return f"{label} #{hit['key']}: {hit['text']} ({hit['field']})"
+
+
+class QuickSearch(QWidget):
+    """
+    Kotak cari global di atas semua halaman. Hasil diambil dari indeks
+    trigram di memori (trigram_index), bukan dari DB, jadi bisa dicari
+    setiap ketikan tanpa debounce.
+    activated(hit): hasil yang dipilih user (dict dari TrigramIndex.search).
+    """
+    activated = Signal(dict)
+
+    def __init__(self, parent=None, limit=20):
+        super().__init__(parent)
+        self.limit = limit
+
+        self.txt = QLineEdit()
+        self.txt.setPlaceholderText("Cari user, no HP, plat, tempat... (Ctrl+K)")
+        self.txt.setClearButtonEnabled(True)
+        self.txt.setMinimumWidth(320)
+        self.lbl = QLabel("")
+
+        self.results = QStandardItemModel(self)
+        self.completer = QCompleter(self.results, self)
+        # hasil sudah disaring & diurutkan indeks; completer cukup menampilkan
+        self.completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+        self.completer.setMaxVisibleItems(limit)
+        self.completer.setWidget(self.txt)
+
+        lay = QHBoxLayout(self)
+        lay.setContentsMargins(0, 0, 0, 0)
+        lay.addWidget(self.txt)
+        lay.addWidget(self.lbl)
+
+        self.txt.textEdited.connect(self._search)
+        self.completer.activated[QModelIndex].connect(self._activated)
+
+    def focus(self):
+        self.txt.setFocus()
+        self.txt.selectAll()
+
+    def set_status(self, text: str):
+        self.lbl.setText(text)
+
+    def _search(self, text):
+        index = quick_index()
+        t0 = time.perf_counter()
+        hits = index.search(text, limit=self.limit)
+        ms = (time.perf_counter() - t0) * 1000
+
+        self.results.clear()
+        for hit in hits:
+            item = QStandardItem(hit_label(hit))
+            item.setData(hit, Qt.UserRole)
+            self.results.appendRow(item)
+
+        if index.building:
+            self.set_status(f"indeks dibangun... ({len(index)} data)")
+        elif text.strip():
+            self.set_status(f"{len(hits)} hasil, {ms:.1f} ms")
+        else:
+            self.set_status("")
+
+        if hits:
+            self.completer.complete()
+        else:
+            self.completer.popup().hide()
+
+    def _activated(self, index):
+        hit = index.data(Qt.UserRole)
+        if hit:
+            self.activated.emit(hit)
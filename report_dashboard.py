@@ -1,54 +1,109 @@
 import sys
-import mysql.connector
+import time
 
-from PySide6.QtCore import Qt
+from PySide6.QtCore import Qt, Signal
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QLabel, QTabWidget, QTableWidget, QTableWidgetItem,
     QPushButton, QFileDialog, QMessageBox
 )
-from PySide6.QtGui import QTextDocument
-from PySide6.QtPrintSupport import QPrinter
 
+# koneksi DB (konfigurasi & pool) diambil dari db.py
+from db import select_rows, query_rows
+from query_worker import executor
+from rollup import DRIVER_REPORT_QUERY, METODE_REPORT_QUERY, ensure_tables
 
-# =========================
-# KONFIG DB (ubah sesuai XAMPP kamu)
-# =========================
-DB_CONFIG = {
-    "host": "127.0.0.1",
-    "user": "root",
-    "password": "",     # isi kalau root kamu pakai password
-    "database": "ojol",
-    "port": 3306
-}
 
+def fetch_all(query: str, params=None):
+    return select_rows(query, params, read_only=True)
 
-def get_conn():
-    return mysql.connector.connect(**DB_CONFIG)
 
+def derived(name):
+    # report_engine (pandas) baru diimport saat report turunan pertama kali dimuat
+    def load(conn):
+        from report_engine import engine
+        return engine().rows(name, conn)
+    return load
 
-def fetch_all(query: str, params=None):
-    conn = get_conn()
-    try:
-        cur = conn.cursor(dictionary=True)
-        cur.execute(query, params or ())
-        return cur.fetchall()
-    finally:
-        conn.close()
 
+def invalidate_engine():
+    # belum pernah diimport = belum ada join dasar yang perlu dibuang
+    if "report_engine" in sys.modules:
+        sys.modules["report_engine"].engine().invalidate()
 
-def html_escape(s: str) -> str:
-    return (s.replace("&", "&amp;")
-             .replace("<", "&lt;")
-             .replace(">", "&gt;")
-             .replace('"', "&quot;"))
+
+# =========================
+# 10 REPORT QUERIES (sesuai DB ojol)
+# =========================
+REPORTS = [
+    ("1. Data Users", """
+        SELECT user_id, nama, email, no_hp
+        FROM users
+        ORDER BY user_id;
+    """),
+
+    ("2. Data Admin", """
+        SELECT admin_id, nama, email, no_hp
+        FROM admin
+        ORDER BY admin_id;
+    """),
+
+    ("3. Data Drivers", """
+        SELECT d.driver_id,
+               d.user_id,
+               u.nama AS nama_driver,
+               u.no_hp AS hp_driver,
+               d.plat_nomor,
+               d.jenis_motor
+        FROM drivers d
+        JOIN users u ON u.user_id = d.user_id
+        ORDER BY d.driver_id;
+    """),
+
+    ("4. Data Pesanan", """
+        SELECT pesanan_id, pelanggan_id, driver_id, titik_awal, titik_tujuan, jarak, biaya
+        FROM orders
+        ORDER BY pesanan_id DESC;
+    """),
+
+    ("5. Data Pembayaran", """
+        SELECT payment_id, pesanan_id, metode, jumlah
+        FROM payments
+        ORDER BY payment_id DESC;
+    """),
+
+    # 6-8 diturunkan di memori dari satu join dasar (report_engine)
+    ("6. Detail Pesanan", derived("detail_pesanan")),
+    ("7. Detail Pembayaran", derived("detail_pembayaran")),
+    ("8. Pesanan Belum Dibayar", derived("pesanan_belum_dibayar")),
+
+    # 9-10 membaca tabel rekap kecil yang dijaga rollup.py
+    ("9. Rekap Pesanan per Driver", DRIVER_REPORT_QUERY),
+    ("10. Rekap Pembayaran per Metode", METODE_REPORT_QUERY),
+]
 
 
 class ReportTab(QWidget):
-    def __init__(self, title: str, query: str):
+    """
+    Satu tab report. Data tidak dimuat di konstruktor; pemanggil memakai
+    ensure_fresh() supaya query hanya jalan kalau data belum ada atau sudah
+    lebih tua dari ttl detik.
+
+    query: SQL, atau callable(conn) -> list[dict] untuk report turunan
+    invalidate: dipanggil saat tombol Refresh diklik (mis. buang cache engine)
+    """
+    finished = Signal(bool)   # True = berhasil dimuat
+    pdfProgress = Signal(int)  # jumlah baris yang sudah ditulis ke PDF
+    dataProgress = Signal(int)  # jumlah baris yang sudah ditulis ke CSV/XLSX/Parquet
+
+    def __init__(self, title: str, query, ttl: float = 60, invalidate=None):
         super().__init__()
         self.title = title
         self.query = query
+        self.ttl = ttl
+        self.invalidate = invalidate
+        self.loaded_at = None   # time.monotonic() saat data terakhir dimuat
+        self.loading = False
 
         self.table = QTableWidget()
         self.table.setAlternatingRowColors(True)
@@ -58,28 +113,71 @@ class ReportTab(QWidget):
 
         self.btnRefresh = QPushButton("Refresh")
         self.btnExport = QPushButton("Export PDF")
+        self.btnExportData = QPushButton("Export Data")
+        self.lblStatus = QLabel("")
 
         btn_row = QHBoxLayout()
+        btn_row.addWidget(self.lblStatus)
         btn_row.addStretch(1)
         btn_row.addWidget(self.btnRefresh)
         btn_row.addWidget(self.btnExport)
+        btn_row.addWidget(self.btnExportData)
 
         layout = QVBoxLayout(self)
         layout.addLayout(btn_row)
         layout.addWidget(self.table)
 
-        self.btnRefresh.clicked.connect(self.load_data)
+        self.btnRefresh.clicked.connect(self._refresh_clicked)
         self.btnExport.clicked.connect(self.export_pdf)
-
+        self.btnExportData.clicked.connect(self.export_data)
+        self.pdfProgress.connect(lambda n: self.lblStatus.setText(f"Export PDF: {n} baris..."))
+        self.dataProgress.connect(lambda n: self.lblStatus.setText(f"Export data: {n} baris..."))
+
+    def is_stale(self) -> bool:
+        if self.loaded_at is None:
+            return True
+        return time.monotonic() - self.loaded_at > self.ttl
+
+    def ensure_fresh(self):
+        if self.is_stale() and not self.loading:
+            self.load_data()
+
+    def _refresh_clicked(self):
+        if callable(self.invalidate):
+            self.invalidate()
         self.load_data()
 
     def load_data(self):
-        try:
-            rows = fetch_all(self.query)
-        except Exception as e:
-            QMessageBox.critical(self, "DB Error", f"Gagal mengambil data:\n{e}")
-            return
+        # query jalan di background; refresh baru membatalkan yang masih jalan
+        self.loading = True
+        self.lblStatus.setText("Memuat...")
+        if callable(self.query):
+            fn = self.query
+        elif self.query in (DRIVER_REPORT_QUERY, METODE_REPORT_QUERY):
+            # database lama mungkin belum punya tabel rekap
+            def fn(conn):
+                ensure_tables()
+                return query_rows(conn, self.query)
+        else:
+            fn = lambda conn: query_rows(conn, self.query)
+        executor().submit(
+            self,
+            fn,
+            self._show_rows,
+            self._show_error,
+            read_only=True,
+        )
 
+    def _show_error(self, msg):
+        self.loading = False
+        self.lblStatus.setText("")
+        self.finished.emit(False)
+        QMessageBox.critical(self, "DB Error", f"Gagal mengambil data:\n{msg}")
+
+    def _fill_table(self, rows):
+        self.loading = False
+        self.loaded_at = time.monotonic()
+        self.lblStatus.setText("")
         if not rows:
             self.table.clear()
             self.table.setRowCount(0)
@@ -100,64 +198,144 @@ class ReportTab(QWidget):
 
         self.table.resizeColumnsToContents()
 
+    def _show_rows(self, rows):
+        self._fill_table(rows)
+        self.finished.emit(True)
+
     def export_pdf(self):
+        # penulis PDF / export data diimport saat pertama kali dipakai, bukan saat startup
+        from pdf_export import export_query_pdf, write_pdf
+
         path, _ = QFileDialog.getSaveFileName(
             self, "Simpan PDF", f"{self.title}.pdf", "PDF Files (*.pdf)"
         )
         if not path:
             return
 
-        # ambil data dari table widget
-        col_count = self.table.columnCount()
-        row_count = self.table.rowCount()
-        headers = [self.table.horizontalHeaderItem(i).text() for i in range(col_count)]
-
-        # buat HTML
-        html = []
-        html.append(f"<h2>{html_escape(self.title)}</h2>")
-        html.append("<table border='1' cellspacing='0' cellpadding='4'>")
-        html.append("<tr>")
-        for h in headers:
-            html.append(f"<th>{html_escape(h)}</th>")
-        html.append("</tr>")
-
-        for r in range(row_count):
-            html.append("<tr>")
-            for c in range(col_count):
-                it = self.table.item(r, c)
-                html.append(f"<td>{html_escape(it.text() if it else '')}</td>")
-            html.append("</tr>")
-
-        html.append("</table>")
-        html_str = "\n".join(html)
-
-        try:
-            doc = QTextDocument()
-            doc.setHtml(html_str)
-
-            printer = QPrinter(QPrinter.HighResolution)
-            printer.setOutputFormat(QPrinter.PdfFormat)
-            printer.setOutputFileName(path)
-
-            doc.print_(printer)
-            QMessageBox.information(self, "Sukses", f"PDF tersimpan:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Gagal export PDF:\n{e}")
+        # ditulis di background: query dibaca bertahap dari server dan tiap
+        # halaman PDF langsung digambar, jadi memori tetap kecil
+        if callable(self.query):
+            def job(conn):
+                rows = self.query(conn)
+                headers = list(rows[0].keys()) if rows else []
+                return write_pdf(path, self.title, headers,
+                                 (tuple(r.values()) for r in rows), progress=self.pdfProgress.emit)
+        else:
+            def job(conn):
+                return export_query_pdf(path, self.title, self.query, conn=conn,
+                                        progress=self.pdfProgress.emit)
+
+        self.lblStatus.setText("Export PDF...")
+        self.btnExport.setEnabled(False)
+        executor().submit((self, "pdf"), job, lambda n: self._pdf_done(path, n), self._pdf_failed,
+                          read_only=True)
+
+    def _pdf_done(self, path, n):
+        self.btnExport.setEnabled(True)
+        self.lblStatus.setText("")
+        QMessageBox.information(self, "Sukses", f"PDF tersimpan ({n} baris):\n{path}")
+
+    def _pdf_failed(self, msg):
+        self.btnExport.setEnabled(True)
+        self.lblStatus.setText("")
+        QMessageBox.critical(self, "Error", f"Gagal export PDF:\n{msg}")
+
+    def export_data(self):
+        from data_export import FILE_FILTER, export_query, with_extension, write_rows
+
+        path, selected = QFileDialog.getSaveFileName(self, "Export Data", self.title, FILE_FILTER)
+        if not path:
+            return
+        path = with_extension(path, selected)
+
+        if callable(self.query):
+            def job(conn):
+                rows = self.query(conn)
+                headers = list(rows[0].keys()) if rows else []
+                return write_rows(path, headers, (tuple(r.values()) for r in rows),
+                                  progress=self.dataProgress.emit)
+        else:
+            def job(conn):
+                return export_query(path, self.query, conn=conn, progress=self.dataProgress.emit)
+
+        self.lblStatus.setText("Export data...")
+        self.btnExportData.setEnabled(False)
+        executor().submit((self, "data"), job, lambda n: self._data_done(path, n), self._data_failed,
+                          read_only=True)
+
+    def _data_done(self, path, n):
+        self.btnExportData.setEnabled(True)
+        self.lblStatus.setText("")
+        QMessageBox.information(self, "Sukses", f"Data tersimpan ({n} baris):\n{path}")
+
+    def _data_failed(self, msg):
+        self.btnExportData.setEnabled(True)
+        self.lblStatus.setText("")
+        QMessageBox.critical(self, "Error", f"Gagal export data:\n{msg}")
 
 
 class DashboardReport(QMainWindow):
     """
     Dashboard report dengan 10 tab (7–12 report terpenuhi).
+    Hanya tab yang terlihat yang dimuat; tab lain dimuat saat dipilih
+    dan datanya sudah lebih tua dari ttl detik.
     """
 
-    def refresh_all(self):
-        # refresh semua tab
-        for i in range(self.tabs.count()):
-            tab = self.tabs.widget(i)
-            if hasattr(tab, "load_data"):
-                tab.load_data()
-
-    def __init__(self):
+    def refresh_all(self, parallel: bool = True):
+        """
+        Refresh semua tab.
+        parallel=True : semua query dikirim sekaligus ke executor background
+                        (dibatasi jumlah thread/koneksi pool), tiap tab terisi
+                        begitu hasilnya datang -> total ~ query paling lambat
+        parallel=False: satu per satu (untuk perbandingan)
+        """
+        tabs = [self.tabs.widget(i) for i in range(self.tabs.count())]
+        tabs = [t for t in tabs if hasattr(t, "load_data")]
+        if not tabs:
+            return
+        # join dasar report turunan dijalankan ulang sekali untuk refresh ini
+        invalidate_engine()
+        self._batch = {
+            "queue": [] if parallel else tabs[1:],
+            "waiting": set(tabs if parallel else tabs[:1]),
+            "done": 0,
+            "total": len(tabs),
+            "t0": time.perf_counter(),
+        }
+        self.lblBatch.setText(f"Memuat 0/{len(tabs)}...")
+        for tab in list(self._batch["waiting"]):
+            tab.load_data()
+
+    def _on_batch_tab_done(self, tab, ok):
+        batch = self._batch
+        if batch is None or tab not in batch["waiting"]:
+            return
+        batch["waiting"].discard(tab)
+        batch["done"] += 1
+        if batch["queue"]:
+            nxt = batch["queue"].pop(0)
+            batch["waiting"].add(nxt)
+            nxt.load_data()
+
+        if batch["done"] < batch["total"]:
+            self.lblBatch.setText(f"Memuat {batch['done']}/{batch['total']}...")
+            return
+        elapsed = time.perf_counter() - batch["t0"]
+        self.lblBatch.setText(f"{batch['total']} report dimuat dalam {elapsed:.2f} detik")
+        self._batch = None
+
+    def refresh_visible(self):
+        # dipanggil saat navigasi ke dashboard: cukup tab yang sedang tampil
+        tab = self.tabs.currentWidget()
+        if hasattr(tab, "ensure_fresh"):
+            tab.ensure_fresh()
+
+    def _on_tab_changed(self, index):
+        tab = self.tabs.widget(index)
+        if hasattr(tab, "ensure_fresh"):
+            tab.ensure_fresh()
+
+    def __init__(self, ttl: float = 60):
         super().__init__()
         self.setWindowTitle("Dashboard")
 
@@ -172,118 +350,28 @@ class DashboardReport(QMainWindow):
         title.setStyleSheet("font-size: 28px; font-weight: 800; color: black;")
         main_layout.addWidget(title)
 
+        self._batch = None
+        self.btnRefreshAll = QPushButton("Refresh Semua")
+        self.lblBatch = QLabel("")
+        batch_row = QHBoxLayout()
+        batch_row.addWidget(self.lblBatch)
+        batch_row.addStretch(1)
+        batch_row.addWidget(self.btnRefreshAll)
+        main_layout.addLayout(batch_row)
+        self.btnRefreshAll.clicked.connect(lambda: self.refresh_all())
+
         self.tabs = QTabWidget()
         main_layout.addWidget(self.tabs)
 
-        # =========================
-        # 10 REPORT QUERIES (sesuai DB ojol)
-        # =========================
-        reports = [
-            ("1. Data Users", """
-                SELECT user_id, nama, email, no_hp
-                FROM users
-                ORDER BY user_id;
-            """),
-
-            ("2. Data Admin", """
-                SELECT admin_id, nama, email, no_hp
-                FROM admin
-                ORDER BY admin_id;
-            """),
-
-            ("3. Data Drivers", """
-                SELECT d.driver_id,
-                       d.user_id,
-                       u.nama AS nama_driver,
-                       u.no_hp AS hp_driver,
-                       d.plat_nomor,
-                       d.jenis_motor
-                FROM drivers d
-                JOIN users u ON u.user_id = d.user_id
-                ORDER BY d.driver_id;
-            """),
-
-            ("4. Data Pesanan", """
-                SELECT pesanan_id, pelanggan_id, driver_id, titik_awal, titik_tujuan, jarak, biaya
-                FROM orders
-                ORDER BY pesanan_id DESC;
-            """),
-
-            ("5. Data Pembayaran", """
-                SELECT payment_id, pesanan_id, metode, jumlah
-                FROM payments
-                ORDER BY payment_id DESC;
-            """),
-
-            ("6. Detail Pesanan", """
-                SELECT o.pesanan_id,
-                       u_pel.nama AS pelanggan,
-                       u_drv.nama AS driver,
-                       o.titik_awal,
-                       o.titik_tujuan,
-                       o.jarak,
-                       o.biaya
-                FROM orders o
-                JOIN users u_pel ON u_pel.user_id = o.pelanggan_id
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u_drv ON u_drv.user_id = d.user_id
-                ORDER BY o.pesanan_id DESC;
-            """),
-
-            ("7. Detail Pembayaran", """
-                SELECT p.payment_id,
-                       p.pesanan_id,
-                       u_pel.nama AS pelanggan,
-                       u_drv.nama AS driver,
-                       p.metode,
-                       p.jumlah
-                FROM payments p
-                JOIN orders o ON o.pesanan_id = p.pesanan_id
-                JOIN users u_pel ON u_pel.user_id = o.pelanggan_id
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u_drv ON u_drv.user_id = d.user_id
-                ORDER BY p.payment_id DESC;
-            """),
-
-            ("8. Pesanan Belum Dibayar", """
-                SELECT o.pesanan_id,
-                       u_pel.nama AS pelanggan,
-                       u_drv.nama AS driver,
-                       o.biaya
-                FROM orders o
-                JOIN users u_pel ON u_pel.user_id = o.pelanggan_id
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u_drv ON u_drv.user_id = d.user_id
-                LEFT JOIN payments p ON p.pesanan_id = o.pesanan_id
-                WHERE p.payment_id IS NULL
-                ORDER BY o.pesanan_id DESC;
-            """),
-
-            ("9. Rekap Pesanan per Driver", """
-                SELECT u_drv.nama AS driver,
-                       COUNT(*) AS total_pesanan,
-                       SUM(o.biaya) AS total_biaya
-                FROM orders o
-                JOIN drivers d ON d.driver_id = o.driver_id
-                JOIN users u_drv ON u_drv.user_id = d.user_id
-                GROUP BY u_drv.nama
-                ORDER BY total_pesanan DESC;
-            """),
-
-            ("10. Rekap Pembayaran per Metode", """
-                SELECT metode,
-                       COUNT(*) AS jumlah_transaksi,
-                       SUM(jumlah) AS total_pembayaran
-                FROM payments
-                GROUP BY metode
-                ORDER BY total_pembayaran DESC;
-            """),
-        ]
-
-        for tab_title, q in reports:
-            tab = ReportTab(tab_title, q)
+        for tab_title, q in REPORTS:
+            tab = ReportTab(tab_title, q, ttl=ttl,
+                            invalidate=invalidate_engine if callable(q) else None)
+            tab.finished.connect(lambda ok, t=tab: self._on_batch_tab_done(t, ok))
             self.tabs.addTab(tab, tab_title)
 
+        self.tabs.currentChanged.connect(self._on_tab_changed)
+        self.refresh_visible()
+
 
 if __name__ == "__main__":
     app = QApplication(sys.argv)
@@ -0,0 +1,200 @@
+import threading
+import time
+from decimal import Decimal
+
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from db import connection
+from query_stats import timed
+
+
+# Join dasar pesanan + pelanggan + driver (+ pembayaran, LEFT JOIN).
+# Satu baris per (pesanan, pembayaran); pesanan tanpa pembayaran -> payment_id NULL.
+BASE_QUERY = """
+    SELECT o.pesanan_id,
+           o.pelanggan_id,
+           u_pel.nama AS pelanggan,
+           o.driver_id,
+           u_drv.nama AS driver,
+           o.titik_awal,
+           o.titik_tujuan,
+           o.jarak,
+           o.biaya,
+           p.payment_id,
+           p.metode,
+           p.jumlah
+    FROM orders o
+    JOIN users u_pel ON u_pel.user_id = o.pelanggan_id
+    JOIN drivers d ON d.driver_id = o.driver_id
+    JOIN users u_drv ON u_drv.user_id = d.user_id
+    LEFT JOIN payments p ON p.pesanan_id = o.pesanan_id
+"""
+
+
+# ---------- dtype ----------
+ID = "Int64"            # id, nullable (LEFT JOIN bisa NULL; tanpa ini jadi float)
+MONEY = "float64"       # DECIMAL -> float, bukan object berisi Decimal
+CATEGORY = "category"   # enum & teks yang banyak berulang (nama, tempat)
+
+BASE_DTYPES = {
+    "pesanan_id": ID,
+    "pelanggan_id": ID,
+    "pelanggan": CATEGORY,
+    "driver_id": ID,
+    "driver": CATEGORY,
+    "titik_awal": CATEGORY,
+    "titik_tujuan": CATEGORY,
+    "jarak": "float64",
+    "biaya": MONEY,
+    "payment_id": ID,
+    "metode": CATEGORY,
+    "jumlah": MONEY,
+}
+
+
+def read_frame(conn, query, params=None, dtypes=None, chunksize=5000) -> pd.DataFrame:
+    """
+    Baca query per chunk; tiap chunk langsung dikonversi sesuai dtypes sebelum
+    chunk berikutnya dibaca, jadi frame mentah (object/Decimal) tidak pernah
+    ada utuh di memori. df.attrs["raw_bytes"] = memori seandainya tanpa dtypes.
+    """
+    dtypes = dtypes or {}
+    chunks, raw_bytes = [], 0
+    with timed(query) as probe:
+        for chunk in pd.read_sql(query, conn, params=params, chunksize=chunksize):
+            raw_bytes += int(chunk.memory_usage(deep=True).sum())
+            for col, dtype in dtypes.items():
+                if col in chunk.columns:
+                    chunk[col] = chunk[col].astype(dtype)
+            chunks.append(chunk)
+        probe["rows"], probe["bytes"] = sum(len(c) for c in chunks), raw_bytes
+
+    if not chunks:
+        return pd.DataFrame()
+    # kategori tiap chunk beda-beda; samakan dulu supaya concat tetap category
+    for col, dtype in dtypes.items():
+        if dtype == CATEGORY and col in chunks[0].columns and len(chunks) > 1:
+            cats = union_categoricals([c[col] for c in chunks]).categories
+            for c in chunks:
+                c[col] = c[col].cat.set_categories(cats)
+    df = pd.concat(chunks, ignore_index=True) if len(chunks) > 1 else chunks[0]
+    df.attrs["raw_bytes"] = raw_bytes
+    return df
+
+
+def load_base(conn) -> pd.DataFrame:
+    return read_frame(conn, BASE_QUERY, dtypes=BASE_DTYPES)
+
+
+# ---------- report turunan (semua dihitung di memori dari frame dasar) ----------
+def _orders(base: pd.DataFrame) -> pd.DataFrame:
+    return base.drop_duplicates("pesanan_id")
+
+
+def _payments(base: pd.DataFrame) -> pd.DataFrame:
+    return base[base["payment_id"].notna()]
+
+
+def detail_pesanan(base: pd.DataFrame) -> pd.DataFrame:
+    cols = ["pesanan_id", "pelanggan", "driver", "titik_awal", "titik_tujuan", "jarak", "biaya"]
+    return _orders(base)[cols].sort_values("pesanan_id", ascending=False)
+
+
+def detail_pembayaran(base: pd.DataFrame) -> pd.DataFrame:
+    cols = ["payment_id", "pesanan_id", "pelanggan", "driver", "metode", "jumlah"]
+    return _payments(base)[cols].sort_values("payment_id", ascending=False)
+
+
+def pesanan_belum_dibayar(base: pd.DataFrame) -> pd.DataFrame:
+    # anti-join: dari LEFT JOIN, pesanan tanpa pembayaran punya payment_id NULL
+    cols = ["pesanan_id", "pelanggan", "driver", "biaya"]
+    return base.loc[base["payment_id"].isna(), cols].sort_values("pesanan_id", ascending=False)
+
+
+def rekap_per_driver(base: pd.DataFrame) -> pd.DataFrame:
+    out = (_orders(base)
+           .groupby("driver", sort=False, observed=True)
+           .agg(total_pesanan=("pesanan_id", "size"), total_biaya=("biaya", "sum"))
+           .reset_index())
+    return out.sort_values("total_pesanan", ascending=False, kind="stable")
+
+
+def rekap_per_metode(base: pd.DataFrame) -> pd.DataFrame:
+    out = (_payments(base)
+           .groupby("metode", sort=False, observed=True)
+           .agg(jumlah_transaksi=("payment_id", "size"), total_pembayaran=("jumlah", "sum"))
+           .reset_index())
+    return out.sort_values("total_pembayaran", ascending=False, kind="stable")
+
+
+REPORTS = {
+    "detail_pesanan": detail_pesanan,
+    "detail_pembayaran": detail_pembayaran,
+    "pesanan_belum_dibayar": pesanan_belum_dibayar,
+    "rekap_per_driver": rekap_per_driver,
+    "rekap_per_metode": rekap_per_metode,
+}
+
+
+def df_to_rows(df: pd.DataFrame):
+    """
+    DataFrame -> list[dict] dengan NaN/NA jadi None (format select_rows).
+    Kolom float (DECIMAL(x,2) di database) dikembalikan sebagai Decimal 2
+    angka di belakang koma, sama seperti hasil query langsung (15000.00).
+    """
+    out = df.astype(object).where(df.notna(), None)
+    for col in df.select_dtypes("float").columns:
+        out[col] = [None if v != v else Decimal(f"{v:.2f}") for v in df[col].to_numpy()]
+    return out.to_dict("records")
+
+
+class ReportEngine:
+    """
+    Menjalankan BASE_QUERY sekali lalu menurunkan report-report lain dari
+    hasilnya. Frame dipakai bersama selama max_age detik (satu "refresh");
+    invalidate() memaksa query ulang di permintaan berikutnya.
+    Aman dipanggil dari beberapa thread: hanya satu yang menjalankan query,
+    yang lain menunggu hasilnya.
+    """
+    def __init__(self, max_age: float = 5):
+        self.max_age = max_age
+        self._lock = threading.Lock()
+        self._frame = None
+        self._loaded_at = None
+
+    def invalidate(self):
+        with self._lock:
+            self._frame = None
+            self._loaded_at = None
+
+    def base(self, conn=None) -> pd.DataFrame:
+        with self._lock:
+            fresh = self._loaded_at is not None and time.monotonic() - self._loaded_at <= self.max_age
+            if not fresh:
+                if conn is None:
+                    with connection(read_only=True) as own:
+                        self._frame = load_base(own)
+                else:
+                    self._frame = load_base(conn)
+                self._loaded_at = time.monotonic()
+            return self._frame
+
+    def report(self, name: str, conn=None) -> pd.DataFrame:
+        df = REPORTS[name](self.base(conn)).reset_index(drop=True)
+        # attrs ikut terbawa dari frame dasar; raw_bytes hanya berlaku untuk frame itu
+        df.attrs = {}
+        return df
+
+    def rows(self, name: str, conn=None):
+        return df_to_rows(self.report(name, conn))
+
+
+_engine = None
+
+
+def engine() -> ReportEngine:
+    global _engine
+    if _engine is None:
+        _engine = ReportEngine()
+    return _engine
@@ -1,40 +1,168 @@
 import sys
+from collections import OrderedDict
+
+import numpy as np
 import pandas as pd
-import mysql.connector
+from pandas.api.types import is_numeric_dtype
 
-from PySide6.QtCore import Qt, QAbstractTableModel
+from PySide6.QtCore import Qt, QAbstractTableModel, QLocale, Signal
 from PySide6.QtWidgets import (
     QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
     QPushButton, QTabWidget, QTableView, QFileDialog, QMessageBox, QLabel
 )
-from PySide6.QtPrintSupport import QPrinter
-from PySide6.QtGui import QTextDocument
-
-DB_CONFIG = {
-    "host": "127.0.0.1",
-    "user": "root",
-    "password": "",
-    "database": "ojol",
-    "port": 3306
-}
-
-def fetch_df(query: str, params=None) -> pd.DataFrame:
-    conn = mysql.connector.connect(**DB_CONFIG)
-    try:
-        return pd.read_sql(query, conn, params=params)
-    finally:
-        conn.close()
+
+from db import connection
+from query_worker import executor
+from pdf_export import export_query_pdf, write_pdf
+from data_export import FILE_FILTER, export_query, with_extension, write_rows
+from report_engine import engine, read_frame, ID, CATEGORY
+
+def read_df(conn, query: str, params=None, dtypes=None) -> pd.DataFrame:
+    # dibaca per chunk dan langsung dikonversi ke dtype (lihat report_engine.read_frame)
+    return read_frame(conn, query, params, dtypes)
+
+def fetch_df(query: str, params=None, dtypes=None) -> pd.DataFrame:
+    with connection(read_only=True) as conn:
+        return read_df(conn, query, params, dtypes)
+
+def _fmt_bytes(n) -> str:
+    for unit in ("B", "KB", "MB"):
+        if n < 1024:
+            return f"{n:.0f} {unit}" if unit == "B" else f"{n:.1f} {unit}"
+        n /= 1024
+    return f"{n:.1f} GB"
+
+def memory_report(df: pd.DataFrame) -> str:
+    """Memori frame; jika dibaca lewat read_frame, dibandingkan dengan tanpa dtype."""
+    used = int(df.memory_usage(deep=True).sum())
+    text = f"Memori: {_fmt_bytes(used)}"
+    raw = df.attrs.get("raw_bytes")
+    if raw:
+        text += f" (tanpa dtype: {_fmt_bytes(raw)}, hemat {100 - used * 100 / raw:.0f}%)"
+    return text
+
+# kolom uang yang ditampilkan sebagai rupiah
+RUPIAH_COLS = {"biaya", "jumlah", "total_biaya", "total_pembayaran"}
+# kolom DECIMAL(x,2) lain (jadi float64 di read_frame); tampil 2 desimal seperti str(Decimal)
+DECIMAL_COLS = {"jarak"}
+# pemisah ribuan/desimal mengikuti locale Indonesia (1.500.000,50)
+RUPIAH_LOCALE = QLocale(QLocale.Indonesian, QLocale.Indonesia)
+
+def has_fraction(s: pd.Series) -> bool:
+    """Ada nilai yang tidak bulat (dalam sen)? Dihitung sekali per kolom untuk seluruh frame."""
+    v = s.astype("float64").fillna(0).to_numpy()
+    return bool((np.round(np.abs(v) * 100).astype(np.int64) % 100).any())
+
+def format_rupiah(s: pd.Series, decimals=None) -> pd.Series:
+    """
+    Format satu kolom angka jadi "Rp 1.500.000" sekaligus (tanpa loop per sel).
+    decimals: tampilkan ",50"; None = hanya kalau ada nilai di s yang tidak bulat.
+    """
+    group, dec = RUPIAH_LOCALE.groupSeparator(), RUPIAH_LOCALE.decimalPoint()
+    v = s.astype("float64").fillna(0).to_numpy()
+    cents = np.round(np.abs(v) * 100).astype(np.int64)
+    text = pd.Series(cents // 100).astype(str).str.replace(r"\B(?=(\d{3})+(?!\d))", group, regex=True)
+    frac = cents % 100
+    if frac.any() if decimals is None else decimals:
+        text = text + dec + pd.Series(frac).astype(str).str.zfill(2)
+    return pd.Series(np.where(v < 0, "-Rp ", "Rp "), dtype=object) + text
+
+def format_column(s: pd.Series, rupiah=False, decimals=None) -> list:
+    """Satu kolom -> list string tampilan (NULL/NaN jadi "")."""
+    if rupiah and is_numeric_dtype(s):
+        text = format_rupiah(s, decimals)
+    elif s.name in DECIMAL_COLS and is_numeric_dtype(s):
+        text = pd.Series(s.astype("float64").to_numpy()).map("{:.2f}".format)
+    else:
+        text = s.astype(str)
+    return np.where(s.isna().to_numpy(), "", text.to_numpy(dtype=object)).tolist()
+
+def format_frame(df: pd.DataFrame, decimals=None) -> list:
+    """Semua kolom df diformat; decimals: {kolom rupiah: bool} dari frame utuh (lihat DisplayCache)."""
+    decimals = decimals or {}
+    return [format_column(df[c], c in RUPIAH_COLS, decimals.get(c)) for c in df.columns]
+
+class DisplayCache:
+    """
+    Teks tampilan per blok BLOCK baris, diformat saat blok itu pertama kali
+    diminta (baris yang terlihat), paling banyak MAX_BLOCKS blok disimpan.
+    Frame jutaan baris tidak pernah punya string untuk semua selnya.
+    Dibuat di thread worker (blok pertama ikut disiapkan), lalu hanya
+    dipakai dari thread GUI.
+    """
+    BLOCK = 500
+    MAX_BLOCKS = 200
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self._blocks = OrderedDict()
+        # desimal rupiah diputuskan dari seluruh kolom supaya tiap blok sama
+        self._decimals = {c: has_fraction(df[c]) for c in df.columns
+                          if c in RUPIAH_COLS and is_numeric_dtype(df[c])}
+        if len(df.index):
+            self._block(0)
+
+    def _block(self, i):
+        block = self._blocks.get(i)
+        if block is None:
+            part = self.df.iloc[i * self.BLOCK:(i + 1) * self.BLOCK]
+            block = self._blocks[i] = format_frame(part, self._decimals)
+            if len(self._blocks) > self.MAX_BLOCKS:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(i)
+        return block
+
+    def text(self, row, col):
+        return self._block(row // self.BLOCK)[col][row % self.BLOCK]
+
+    def update_columns(self, df: pd.DataFrame, columns):
+        """Frame baru dengan baris sama; blok yang tersimpan hanya memformat ulang kolom itu."""
+        self.df = df
+        for name in columns:
+            if name in RUPIAH_COLS and is_numeric_dtype(df[name]):
+                self._decimals[name] = has_fraction(df[name])
+        for i, block in self._blocks.items():
+            part = df.iloc[i * self.BLOCK:(i + 1) * self.BLOCK]
+            for name in columns:
+                block[df.columns.get_loc(name)] = format_column(
+                    part[name], name in RUPIAH_COLS, self._decimals.get(name))
 
 class DataFrameModel(QAbstractTableModel):
-    def __init__(self, df=pd.DataFrame()):
+    """
+    Frame dipegang apa adanya (tidak di-copy); pemanggil tidak boleh mengubahnya.
+    Teks tampilan diambil dari DisplayCache (diformat per blok baris yang
+    terlihat), jadi data() tidak mengakses pandas per sel.
+    """
+    def __init__(self, df=None):
         super().__init__()
-        self._df = df.copy()
+        self._df = pd.DataFrame() if df is None else df
+        self._display = DisplayCache(self._df)
+        self._align = self._alignments(self._df)
+
+    @staticmethod
+    def _alignments(df):
+        right = int(Qt.AlignRight | Qt.AlignVCenter)
+        left = int(Qt.AlignLeft | Qt.AlignVCenter)
+        return [right if is_numeric_dtype(df[c]) else left for c in df.columns]
 
-    def set_df(self, df: pd.DataFrame):
+    def set_df(self, df: pd.DataFrame, display=None):
+        """display: DisplayCache(df) jika sudah dibuat di background."""
         self.beginResetModel()
-        self._df = df.copy()
+        self._df = df
+        self._display = DisplayCache(df) if display is None else display
+        self._align = self._alignments(df)
         self.endResetModel()
 
+    def update_columns(self, df: pd.DataFrame, columns):
+        """Ganti isi beberapa kolom saja (baris & urutan kolom sama); hanya kolom itu yang di-repaint."""
+        self._df = df
+        self._display.update_columns(df, columns)
+        for name in columns:
+            c = df.columns.get_loc(name)
+            if len(df.index):
+                self.dataChanged.emit(self.index(0, c), self.index(len(df.index) - 1, c))
+
     def rowCount(self, parent=None):
         return 0 if self._df is None else len(self._df.index)
 
@@ -42,11 +170,12 @@ class DataFrameModel(QAbstractTableModel):
         return 0 if self._df is None else len(self._df.columns)
 
     def data(self, index, role=Qt.DisplayRole):
-        if not index.isValid() or self._df is None:
+        if not index.isValid():
             return None
         if role == Qt.DisplayRole:
-            val = self._df.iat[index.row(), index.column()]
-            return "" if pd.isna(val) else str(val)
+            return self._display.text(index.row(), index.column())
+        if role == Qt.TextAlignmentRole:
+            return self._align[index.column()]
         return None
 
     def headerData(self, section, orientation, role=Qt.DisplayRole):
@@ -58,32 +187,20 @@ class DataFrameModel(QAbstractTableModel):
             return str(section + 1)
         return None
 
-def df_to_html(title: str, df: pd.DataFrame) -> str:
-    table_html = df.to_html(index=False, border=1)
-    return f"""
-    <html>
-    <head>
-      <meta charset="utf-8">
-      <style>
-        body {{ font-family: Arial, sans-serif; font-size: 10pt; }}
-        h2 {{ margin-bottom: 10px; }}
-        table {{ border-collapse: collapse; width: 100%; }}
-        th, td {{ padding: 6px; }}
-        th {{ background: #f2f2f2; }}
-      </style>
-    </head>
-    <body>
-      <h2>{title}</h2>
-      {table_html}
-    </body>
-    </html>
+class ReportTab(QWidget):
+    """
+    query : SQL, atau callable(conn) -> DataFrame untuk report turunan.
+    dtypes: dtype per kolom untuk report SQL (lihat read_frame).
     """
+    pdf_progress = Signal(int)
+    data_progress = Signal(int)
 
-class ReportTab(QWidget):
-    def __init__(self, title: str, query: str):
+    def __init__(self, title: str, query, dtypes=None, invalidate=None):
         super().__init__()
         self.title = title
         self.query = query
+        self.dtypes = dtypes
+        self.invalidate = invalidate
         self.df = pd.DataFrame()
         self.model = DataFrameModel(self.df)
 
@@ -92,28 +209,60 @@ class ReportTab(QWidget):
 
         self.btn_refresh = QPushButton("Refresh")
         self.btn_pdf = QPushButton("Export PDF")
+        self.btn_data = QPushButton("Export Data")
+        self.lbl_status = QLabel("")
+        self.lbl_mem = QLabel("")
 
         top = QHBoxLayout()
         top.addWidget(QLabel(title))
         top.addStretch()
+        top.addWidget(self.lbl_status)
         top.addWidget(self.btn_refresh)
         top.addWidget(self.btn_pdf)
+        top.addWidget(self.btn_data)
 
         layout = QVBoxLayout(self)
         layout.addLayout(top)
         layout.addWidget(self.view)
+        layout.addWidget(self.lbl_mem)
 
-        self.btn_refresh.clicked.connect(self.refresh)
+        self.btn_refresh.clicked.connect(self._refresh_clicked)
         self.btn_pdf.clicked.connect(self.export_pdf)
+        self.btn_data.clicked.connect(self.export_data)
+        self.pdf_progress.connect(lambda n: self.lbl_status.setText(f"Export PDF: {n} baris..."))
+        self.data_progress.connect(lambda n: self.lbl_status.setText(f"Export data: {n} baris..."))
 
         self.refresh()
 
+    def _refresh_clicked(self):
+        if callable(self.invalidate):
+            self.invalidate()
+        self.refresh()
+
     def refresh(self):
-        try:
-            self.df = fetch_df(self.query)
-            self.model.set_df(self.df)
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Gagal load report:\n{e}")
+        # query jalan di background; refresh baru membatalkan yang masih jalan
+        self.lbl_status.setText("Memuat...")
+        if callable(self.query):
+            load = self.query
+        else:
+            load = lambda conn: read_df(conn, self.query, dtypes=self.dtypes)
+
+        def fn(conn):
+            # teks tampilan ikut disiapkan di background, GUI tinggal pasang
+            df = load(conn)
+            return df, DisplayCache(df)
+
+        executor().submit(self, fn, lambda res: self._show_df(*res), self._show_error, read_only=True)
+
+    def _show_df(self, df, display=None):
+        self.lbl_status.setText("")
+        self.df = df
+        self.model.set_df(self.df, display)
+        self.lbl_mem.setText(memory_report(df))
+
+    def _show_error(self, msg):
+        self.lbl_status.setText("")
+        QMessageBox.critical(self, "Error", f"Gagal load report:\n{msg}")
 
     def export_pdf(self):
         if self.df is None or self.df.empty:
@@ -124,18 +273,76 @@ class ReportTab(QWidget):
         if not path:
             return
 
-        try:
-            printer = QPrinter(QPrinter.HighResolution)
-            printer.setOutputFormat(QPrinter.PdfFormat)
-            printer.setOutputFileName(path)
+        # report SQL di-stream langsung dari server; report turunan sudah di memori
+        if callable(self.query):
+            df = self.df
+            job = lambda conn: write_pdf(path, self.title, list(df.columns),
+                                         df.itertuples(index=False, name=None),
+                                         progress=self.pdf_progress.emit)
+        else:
+            job = lambda conn: export_query_pdf(path, self.title, self.query, conn=conn,
+                                                progress=self.pdf_progress.emit)
+
+        self.lbl_status.setText("Export PDF...")
+        self.btn_pdf.setEnabled(False)
+        executor().submit((self, "pdf"), job, lambda n: self._pdf_done(path, n), self._pdf_failed,
+                          read_only=True)
+
+    def _pdf_done(self, path, n):
+        self.btn_pdf.setEnabled(True)
+        self.lbl_status.setText("")
+        QMessageBox.information(self, "Sukses", f"Berhasil export PDF ({n} baris):\n{path}")
+
+    def _pdf_failed(self, msg):
+        self.btn_pdf.setEnabled(True)
+        self.lbl_status.setText("")
+        QMessageBox.critical(self, "Error", f"Gagal export PDF:\n{msg}")
+
+    def export_data(self):
+        path, selected = QFileDialog.getSaveFileName(self, "Export Data", self.title, FILE_FILTER)
+        if not path:
+            return
+        path = with_extension(path, selected)
+
+        # sama seperti PDF: SQL di-stream per chunk dari server, report turunan dari memori
+        if callable(self.query):
+            df = self.df
+            job = lambda conn: write_rows(path, list(df.columns),
+                                          df.itertuples(index=False, name=None),
+                                          progress=self.data_progress.emit)
+        else:
+            job = lambda conn: export_query(path, self.query, conn=conn, progress=self.data_progress.emit)
+
+        self.lbl_status.setText("Export data...")
+        self.btn_data.setEnabled(False)
+        executor().submit((self, "data"), job, lambda n: self._data_done(path, n), self._data_failed,
+                          read_only=True)
+
+    def _data_done(self, path, n):
+        self.btn_data.setEnabled(True)
+        self.lbl_status.setText("")
+        QMessageBox.information(self, "Sukses", f"Berhasil export data ({n} baris):\n{path}")
 
-            doc = QTextDocument()
-            doc.setHtml(df_to_html(self.title, self.df))
-            doc.print_(printer)
+    def _data_failed(self, msg):
+        self.btn_data.setEnabled(True)
+        self.lbl_status.setText("")
+        QMessageBox.critical(self, "Error", f"Gagal export data:\n{msg}")
 
-            QMessageBox.information(self, "Sukses", f"Berhasil export PDF:\n{path}")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Gagal export PDF:\n{e}")
+# (judul, query, dtype per kolom); nama/email/no_hp unik per baris jadi tetap teks
+REPORTS = [
+    ("Report 1 - Data Users", "SELECT user_id, nama, email, no_hp FROM users ORDER BY user_id;",
+     {"user_id": ID}),
+    ("Report 2 - Data Admin", "SELECT admin_id, nama, email, no_hp FROM admin ORDER BY admin_id;",
+     {"admin_id": ID}),
+    ("Report 3 - Data Drivers", """
+        SELECT d.driver_id, d.user_id, u.nama AS nama_driver, u.no_hp AS hp_driver, d.plat_nomor, d.jenis_motor
+        FROM drivers d JOIN users u ON u.user_id=d.user_id
+        ORDER BY d.driver_id;
+    """, {"driver_id": ID, "user_id": ID, "jenis_motor": CATEGORY}),
+    # 4 & 5 diturunkan dari satu join dasar (report_engine, dtype BASE_DTYPES)
+    ("Report 4 - Detail Pesanan", lambda conn: engine().report("detail_pesanan", conn), None),
+    ("Report 5 - Detail Pembayaran", lambda conn: engine().report("detail_pembayaran", conn), None),
+]
 
 class ReportsWindow(QMainWindow):
     def __init__(self):
@@ -146,37 +353,9 @@ class ReportsWindow(QMainWindow):
         self.tabs = QTabWidget()
         self.report_tabs = []
 
-        reports = [
-            ("Report 1 - Data Users", "SELECT user_id, nama, email, no_hp FROM users ORDER BY user_id;"),
-            ("Report 2 - Data Admin", "SELECT admin_id, nama, email, no_hp FROM admin ORDER BY admin_id;"),
-            ("Report 3 - Data Drivers", """
-                SELECT d.driver_id, d.user_id, u.nama AS nama_driver, u.no_hp AS hp_driver, d.plat_nomor, d.jenis_motor
-                FROM drivers d JOIN users u ON u.user_id=d.user_id
-                ORDER BY d.driver_id;
-            """),
-            ("Report 4 - Detail Pesanan", """
-                SELECT o.pesanan_id, p.nama AS pelanggan, u.nama AS driver,
-                       o.titik_awal, o.titik_tujuan, o.jarak, o.biaya
-                FROM orders o
-                JOIN users p ON p.user_id=o.pelanggan_id
-                JOIN drivers d ON d.driver_id=o.driver_id
-                JOIN users u ON u.user_id=d.user_id
-                ORDER BY o.pesanan_id DESC;
-            """),
-            ("Report 5 - Detail Pembayaran", """
-                SELECT pay.payment_id, pay.pesanan_id, p.nama AS pelanggan, u.nama AS driver,
-                       pay.metode, pay.jumlah
-                FROM payments pay
-                JOIN orders o ON o.pesanan_id=pay.pesanan_id
-                JOIN users p ON p.user_id=o.pelanggan_id
-                JOIN drivers d ON d.driver_id=o.driver_id
-                JOIN users u ON u.user_id=d.user_id
-                ORDER BY pay.payment_id DESC;
-            """),
-        ]
-
-        for title, query in reports:
-            tab = ReportTab(title, query)
+        for title, query, dtypes in REPORTS:
+            tab = ReportTab(title, query, dtypes,
+                            invalidate=engine().invalidate if callable(query) else None)
             self.report_tabs.append(tab)
             self.tabs.addTab(tab, title.split(" - ")[0])
 
@@ -186,6 +365,7 @@ class ReportsWindow(QMainWindow):
         self.setCentralWidget(root)
 
     def refresh_all(self):
+        engine().invalidate()
         for t in self.report_tabs:
             t.refresh()
 
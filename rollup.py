@@ -0,0 +1,215 @@
+"""
+Tabel rekap (rollup) untuk report "Rekap Pesanan per Driver" dan
+"Rekap Pembayaran per Metode".
+
+Isi tabel diperbarui di transaksi yang sama dengan insert/update/delete dari
+OrdersPage/PaymentsPage (lihat CrudPage.rollup), jadi dashboard cukup membaca
+tabel kecil ini tanpa GROUP BY atas seluruh orders/payments.
+
+Tabel sudah ada di ojol.sql; untuk database lama yang belum punya, tabel
+dibuat dan diisi otomatis saat pertama dipakai (ensure_tables).
+
+Pemakaian:
+    python rollup.py create    # buat tabel + isi awal
+    python rollup.py rebuild   # hitung ulang dari orders/payments
+    python rollup.py verify    # bandingkan rekap dengan hitungan langsung
+"""
+import sys
+import threading
+
+from db import transaction, select_rows
+
+DDL = [
+    """
+    CREATE TABLE IF NOT EXISTS `rekap_driver` (
+      `driver_id` int(9) NOT NULL,
+      `total_pesanan` int(11) NOT NULL DEFAULT 0,
+      `total_biaya` decimal(16,2) NOT NULL DEFAULT 0,
+      PRIMARY KEY (`driver_id`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """,
+    """
+    CREATE TABLE IF NOT EXISTS `rekap_metode` (
+      `metode` enum('cash','e-wallet','kartu') NOT NULL,
+      `jumlah_transaksi` int(11) NOT NULL DEFAULT 0,
+      `total_pembayaran` decimal(16,2) NOT NULL DEFAULT 0,
+      PRIMARY KEY (`metode`)
+    ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci;
+    """,
+]
+
+# query report dashboard yang membaca tabel rekap
+DRIVER_REPORT_QUERY = """
+    SELECT u_drv.nama AS driver,
+           SUM(r.total_pesanan) AS total_pesanan,
+           SUM(r.total_biaya) AS total_biaya
+    FROM rekap_driver r
+    JOIN drivers d ON d.driver_id = r.driver_id
+    JOIN users u_drv ON u_drv.user_id = d.user_id
+    WHERE r.total_pesanan > 0
+    GROUP BY u_drv.nama
+    ORDER BY total_pesanan DESC;
+"""
+
+METODE_REPORT_QUERY = """
+    SELECT metode, jumlah_transaksi, total_pembayaran
+    FROM rekap_metode
+    WHERE jumlah_transaksi > 0
+    ORDER BY total_pembayaran DESC;
+"""
+
+_DRIVER_DELTA = """
+    INSERT INTO rekap_driver (driver_id, total_pesanan, total_biaya)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        total_pesanan = total_pesanan + VALUES(total_pesanan),
+        total_biaya = total_biaya + VALUES(total_biaya);
+"""
+
+_METODE_DELTA = """
+    INSERT INTO rekap_metode (metode, jumlah_transaksi, total_pembayaran)
+    VALUES (%s, %s, %s)
+    ON DUPLICATE KEY UPDATE
+        jumlah_transaksi = jumlah_transaksi + VALUES(jumlah_transaksi),
+        total_pembayaran = total_pembayaran + VALUES(total_pembayaran);
+"""
+
+
+# ---------- update inkremental (dipanggil di dalam transaksi penulis) ----------
+def _apply_deltas(cur, sql, changes, key, amount):
+    # delta semua perubahan dijumlah per kunci dulu, lalu satu executemany
+    totals = {}
+    for old, new in changes:
+        for row, sign in ((old, -1), (new, 1)):
+            if row:
+                n, total = totals.get(row[key], (0, 0))
+                totals[row[key]] = (n + sign, total + sign * row[amount])
+    params = [(k, n, total) for k, (n, total) in totals.items() if n or total]
+    if params:
+        cur.executemany(sql, params)
+
+
+def apply_order_changes(cur, changes):
+    """changes: list (old, new) baris orders sebelum/sesudah (None untuk insert/delete)."""
+    _apply_deltas(cur, _DRIVER_DELTA, changes, "driver_id", "biaya")
+
+
+def apply_payment_changes(cur, changes):
+    """changes: list (old, new) baris payments sebelum/sesudah (None untuk insert/delete)."""
+    _apply_deltas(cur, _METODE_DELTA, changes, "metode", "jumlah")
+
+
+def apply_order_batch(cur, rows):
+    """Insert banyak orders sekaligus (import)."""
+    apply_order_changes(cur, [(None, r) for r in rows])
+
+
+def apply_payment_batch(cur, rows):
+    """Insert banyak payments sekaligus (import)."""
+    apply_payment_changes(cur, [(None, r) for r in rows])
+
+
+# ---------- rebuild / verify ----------
+_DRIVER_ACTUAL = """
+    SELECT driver_id, COUNT(*) AS total_pesanan, SUM(biaya) AS total_biaya
+    FROM orders GROUP BY driver_id
+"""
+
+_METODE_ACTUAL = """
+    SELECT metode, COUNT(*) AS jumlah_transaksi, SUM(jumlah) AS total_pembayaran
+    FROM payments GROUP BY metode
+"""
+
+
+_TABLES = ("rekap_driver", "rekap_metode")
+_ready = False
+_ready_lock = threading.Lock()
+
+
+def create():
+    with transaction() as cur:
+        for ddl in DDL:
+            cur.execute(ddl)
+    rebuild()
+
+
+def ensure_tables():
+    """
+    Pastikan tabel rekap ada (sekali per proses). Kalau belum ada, dibuat
+    lalu diisi dari orders/payments. Panggil SEBELUM membuka transaksi
+    penulis: DDL di tengah transaksi akan meng-commit transaksi itu.
+    """
+    global _ready
+    if _ready:
+        return
+    with _ready_lock:
+        if _ready:
+            return
+        rows = select_rows(
+            "SELECT TABLE_NAME AS t FROM information_schema.TABLES "
+            "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME IN (%s, %s)", _TABLES)
+        if len(rows) < len(_TABLES):
+            create()
+        _ready = True
+
+
+def rebuild():
+    with transaction() as cur:
+        cur.execute("DELETE FROM rekap_driver")
+        cur.execute(f"INSERT INTO rekap_driver (driver_id, total_pesanan, total_biaya) {_DRIVER_ACTUAL}")
+        cur.execute("DELETE FROM rekap_metode")
+        cur.execute(f"INSERT INTO rekap_metode (metode, jumlah_transaksi, total_pembayaran) {_METODE_ACTUAL}")
+
+
+def _diff(actual, stored, key, fields):
+    actual = {r[key]: r for r in actual}
+    # baris 0/0 adalah sisa normal delta (pesanan terakhir dihapus / pindah
+    # driver/metode) dan tampil sebagai nol di report: anggap tidak ada.
+    # Jumlah 0 dengan total bukan 0 tetap dibandingkan (dan jadi selisih).
+    stored = {r[key]: r for r in stored if any(r[f] for f in fields)}
+    problems = []
+    for k in sorted(set(actual) | set(stored), key=str):
+        a, s = actual.get(k), stored.get(k)
+        if s is None:
+            problems.append(f"{key}={k}: tidak ada di rekap, seharusnya {tuple(a[f] for f in fields)}")
+        elif a is None:
+            # grup tidak punya baris lagi di data asli, tapi rekap masih bernilai
+            problems.append(f"{key}={k}: tidak ada di data asli, tersimpan {tuple(s[f] for f in fields)}")
+        elif tuple(a[f] for f in fields) != tuple(s[f] for f in fields):
+            problems.append(f"{key}={k}: seharusnya {tuple(a[f] for f in fields)}, "
+                            f"tersimpan {tuple(s[f] for f in fields)}")
+    return problems
+
+
+def verify():
+    """Kembalikan list selisih (kosong = rekap sesuai data asli)."""
+    problems = _diff(
+        select_rows(_DRIVER_ACTUAL),
+        select_rows("SELECT driver_id, total_pesanan, total_biaya FROM rekap_driver"),
+        "driver_id", ("total_pesanan", "total_biaya"),
+    )
+    problems += _diff(
+        select_rows(_METODE_ACTUAL),
+        select_rows("SELECT metode, jumlah_transaksi, total_pembayaran FROM rekap_metode"),
+        "metode", ("jumlah_transaksi", "total_pembayaran"),
+    )
+    return problems
+
+
+if __name__ == "__main__":
+    cmd = sys.argv[1] if len(sys.argv) > 1 else "verify"
+    if cmd == "create":
+        create()
+        print("Tabel rekap dibuat dan diisi.")
+    elif cmd == "rebuild":
+        rebuild()
+        print("Tabel rekap dihitung ulang.")
+    elif cmd == "verify":
+        diffs = verify()
+        for d in diffs:
+            print(d)
+        print("Rekap sesuai." if not diffs else f"{len(diffs)} selisih ditemukan.")
+        sys.exit(1 if diffs else 0)
+    else:
+        print(__doc__)
+        sys.exit(2)
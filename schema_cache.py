@@ -0,0 +1,154 @@
+"""
+Cache metadata skema (kolom, PK, auto_increment, NULL, FK) untuk CrudWidget.
+
+Semua tabel dibaca dengan SATU query information_schema (bukan SHOW COLUMNS
+per tabel), lalu disimpan ke file JSON. Saat aplikasi dibuka lagi cukup satu
+query checksum kecil; metadata dibaca ulang hanya jika checksum berubah
+(tabel ditambah/dihapus/di-ALTER, kolom atau FK berubah).
+
+Checksum tidak memakai TABLES.UPDATE_TIME: di InnoDB nilai itu ikut berubah
+setiap ada INSERT/UPDATE data, jadi cache akan selalu dianggap basi.
+"""
+import json
+import os
+import threading
+
+from db import DB_CONFIG, connection, query_rows
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ojol")
+
+CHECKSUM_SQL = """
+    SELECT
+        (SELECT CONCAT(COUNT(*), ':', COALESCE(MAX(CREATE_TIME), ''))
+           FROM information_schema.TABLES
+          WHERE TABLE_SCHEMA = DATABASE()) AS tables_sig,
+        (SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS('|',
+                    TABLE_NAME, COLUMN_NAME, ORDINAL_POSITION, COLUMN_TYPE,
+                    IS_NULLABLE, COLUMN_KEY, EXTRA))), 0))
+           FROM information_schema.COLUMNS
+          WHERE TABLE_SCHEMA = DATABASE()) AS columns_sig,
+        (SELECT CONCAT(COUNT(*), ':', COALESCE(SUM(CRC32(CONCAT_WS('|',
+                    TABLE_NAME, COLUMN_NAME, REFERENCED_TABLE_NAME, REFERENCED_COLUMN_NAME))), 0))
+           FROM information_schema.KEY_COLUMN_USAGE
+          WHERE TABLE_SCHEMA = DATABASE() AND REFERENCED_TABLE_NAME IS NOT NULL) AS fk_sig
+"""
+
+COLUMNS_SQL = """
+    SELECT c.TABLE_NAME AS table_name, c.COLUMN_NAME AS name, c.COLUMN_KEY AS col_key,
+           c.EXTRA AS extra, c.IS_NULLABLE AS nullable, c.COLUMN_TYPE AS col_type,
+           k.REFERENCED_TABLE_NAME AS ref_table, k.REFERENCED_COLUMN_NAME AS ref_column
+    FROM information_schema.COLUMNS c
+    LEFT JOIN information_schema.KEY_COLUMN_USAGE k
+           ON k.TABLE_SCHEMA = c.TABLE_SCHEMA AND k.TABLE_NAME = c.TABLE_NAME
+          AND k.COLUMN_NAME = c.COLUMN_NAME AND k.REFERENCED_TABLE_NAME IS NOT NULL
+    WHERE c.TABLE_SCHEMA = DATABASE()
+    ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+"""
+
+
+def cache_path():
+    """File cache per server + database."""
+    name = f"schema_{DB_CONFIG['host']}_{DB_CONFIG['port']}_{DB_CONFIG['database']}.json"
+    return os.path.join(CACHE_DIR, name)
+
+
+def _checksum(conn):
+    row = query_rows(conn, CHECKSUM_SQL)[0]
+    return "|".join(str(row[k]) for k in ("tables_sig", "columns_sig", "fk_sig"))
+
+
+def _read_columns(conn):
+    """{tabel: [kolom dict]} dari satu query information_schema."""
+    tables = {}
+    for r in query_rows(conn, COLUMNS_SQL):
+        cols = tables.setdefault(r["table_name"], [])
+        if cols and cols[-1]["name"] == r["name"]:
+            continue   # kolom dengan lebih dari satu FK: cukup FK pertama
+        cols.append({
+            "name": r["name"],
+            "is_pk": r["col_key"] == "PRI",
+            "is_auto": "auto_increment" in (r["extra"] or ""),
+            "nullable": r["nullable"] == "YES",
+            "col_type": r["col_type"],
+            "fk": [r["ref_table"], r["ref_column"]] if r["ref_table"] else None,
+        })
+    return tables
+
+
+def _load_file(path):
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save_file(path, data):
+    # tulis ke file sementara lalu rename, supaya file cache tidak pernah setengah jadi
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, path)
+    except OSError:
+        pass   # cache hanya percepatan; gagal simpan tidak fatal
+
+
+class SchemaCache:
+    """
+    Metadata semua tabel database aktif. Dicek ke server (checksum) sekali
+    per proses; CrudWidget berikutnya langsung memakai salinan di memori.
+    """
+    def __init__(self, path=None):
+        self.path = path or cache_path()
+        self._lock = threading.Lock()
+        self._tables = None
+        self.source = None   # "file" / "db", untuk diagnosa
+
+    def load(self, conn=None, force=False):
+        """{tabel: [kolom dict]}; force=True membaca ulang dari server."""
+        with self._lock:
+            if self._tables is not None and not force:
+                return self._tables
+            if conn is None:
+                with connection() as own:
+                    self._tables = self._load(own, force)
+            else:
+                self._tables = self._load(conn, force)
+            return self._tables
+
+    def _load(self, conn, force):
+        checksum = _checksum(conn)
+        cached = None if force else _load_file(self.path)
+        if cached and cached.get("checksum") == checksum:
+            self.source = "file"
+            return cached["tables"]
+        tables = _read_columns(conn)
+        _save_file(self.path, {"checksum": checksum, "tables": tables})
+        self.source = "db"
+        return tables
+
+    def columns(self, table):
+        """Kolom satu tabel; tabel yang belum ada di cache memicu baca ulang sekali."""
+        cols = self.load().get(table)
+        if cols is None:
+            cols = self.load(force=True).get(table)
+        if cols is None:
+            raise RuntimeError(f"Tabel tidak ditemukan: {table}")
+        return cols
+
+    def invalidate(self):
+        """Lupakan salinan di memori; load berikutnya cek checksum lagi."""
+        with self._lock:
+            self._tables = None
+
+
+_cache = None
+
+
+def schema_cache() -> SchemaCache:
+    global _cache
+    if _cache is None:
+        _cache = SchemaCache()
+    return _cache
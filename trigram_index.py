@@ -0,0 +1,331 @@
+"""
+Indeks trigram di memori untuk pencarian cepat (quick search) nama user,
+no HP, plat nomor driver, dan nama tempat (titik_awal/titik_tujuan).
+
+LIKE '%x%' di MySQL tidak bisa memakai index, jadi teks dipecah jadi
+potongan 3 huruf (trigram) dan tiap trigram menyimpan daftar dokumen yang
+memuatnya. Pencarian cukup menghitung berapa trigram query yang cocok per
+dokumen (numpy, tanpa loop per baris), jadi tetap beberapa ms walau
+datanya jutaan baris.
+
+- build(): scan streaming dari DB saat startup (di background)
+- apply_change(): dipanggil CrudPage setelah insert/update/delete
+- search(): hasil berperingkat (skor = porsi trigram query yang cocok),
+  salah ketik sedikit masih ketemu
+"""
+import re
+import threading
+from array import array
+from math import ceil
+
+import numpy as np
+
+from db import connection, stream_query
+
+# tabel -> (query scan, kolom kunci, kolom yang diindeks)
+ENTITY_SOURCES = {
+    "users": ("SELECT user_id, nama, no_hp FROM users", "user_id", ("nama", "no_hp")),
+    "drivers": ("SELECT driver_id, plat_nomor FROM drivers", "driver_id", ("plat_nomor",)),
+}
+
+# nama tempat diindeks per tempat unik (bukan per pesanan), beserta jumlah pesanannya
+PLACE_FIELDS = ("titik_awal", "titik_tujuan")
+PLACES_QUERY = """
+    SELECT place, COUNT(*) AS n FROM (
+        SELECT titik_awal AS place FROM orders
+        UNION ALL
+        SELECT titik_tujuan FROM orders
+    ) x GROUP BY place
+"""
+
+# tabel yang penulisannya harus diteruskan ke apply_change
+INDEXED_TABLES = set(ENTITY_SOURCES) | {"orders"}
+
+_SPACES = re.compile(r"\s+")
+
+
+def normalize(text) -> str:
+    return _SPACES.sub(" ", str(text or "")).strip().lower()
+
+
+def doc_trigrams(text):
+    """Trigram dokumen; tiap kata diberi padding "  kata " (awal kata dapat bobot)."""
+    grams = set()
+    for word in normalize(text).split(" "):
+        if word:
+            padded = f"  {word} "
+            grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+def query_trigrams(text):
+    """
+    Trigram query: isi kata (cocok di mana saja) + trigram awal kata ("  k",
+    " ka"). Kata yang diketik dari awal dapat skor lebih tinggi, dan kata yang
+    salah ketik satu huruf tetap lolos min_score.
+    """
+    grams = set()
+    for word in normalize(text).split(" "):
+        if word:
+            s = f"  {word}"
+            grams.update(s[i:i + 3] for i in range(len(s) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Dokumen = (jenis, kunci, kolom, teks). Posting list per trigram disimpan
+    sebagai array int32 yang hanya ditambah; dokumen yang berubah/dihapus
+    ditandai mati lalu dibuang saat compact().
+    """
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self.ready = False
+        self.building = False
+
+    def _clear(self):
+        self._post = {}          # trigram -> array("i") id dokumen
+        self._kind = []          # per dokumen: "users" / "drivers" / "places"
+        self._key = []
+        self._field = []
+        self._text = []
+        self._len = array("H")   # panjang teks (untuk peringkat)
+        self._alive = bytearray()
+        self._doc_of = {}        # (jenis, kunci, kolom) -> id dokumen hidup
+        self._place_count = {}   # tempat -> jumlah pesanan
+        self._dead = 0
+        self._touched = set()    # (jenis, kunci) yang ditulis selama build
+        self._place_pending = None  # tempat -> delta pesanan yang ditulis selama scan tempat
+
+    def __len__(self):
+        return len(self._doc_of)
+
+    # ---------- tulis ----------
+    def _add(self, kind, key, field, text):
+        doc = len(self._kind)
+        self._kind.append(kind)
+        self._key.append(key)
+        self._field.append(field)
+        self._text.append(text)
+        self._len.append(min(len(text), 65535))
+        self._alive.append(1)
+        for g in doc_trigrams(text):
+            post = self._post.get(g)
+            if post is None:
+                post = self._post[g] = array("i")
+            post.append(doc)
+        self._doc_of[(kind, key, field)] = doc
+
+    def _drop(self, kind, key, field):
+        doc = self._doc_of.pop((kind, key, field), None)
+        if doc is not None:
+            self._alive[doc] = 0
+            self._dead += 1
+
+    def put(self, kind, key, field, text):
+        text = "" if text is None else str(text).strip()
+        with self._lock:
+            doc = self._doc_of.get((kind, key, field))
+            if doc is not None and self._text[doc] == text:
+                return
+            self._drop(kind, key, field)
+            if text:
+                self._add(kind, key, field, text)
+            self._maybe_compact()
+
+    def _place_delta(self, place, delta):
+        place = (place or "").strip()
+        if place:
+            self._place_set(place, self._place_count.get(place, 0) + delta)
+
+    def _place_set(self, place, n):
+        if n > 0:
+            self._place_count[place] = n
+            if ("places", place, "place") not in self._doc_of:
+                self._add("places", place, "place", place)
+        else:
+            self._place_count.pop(place, None)
+            self._drop("places", place, "place")
+
+    def apply_change(self, table, old, new):
+        """
+        Perbarui indeks dari satu penulisan CrudPage.
+        old/new: baris tabel sebelum/sesudah (None untuk insert/delete).
+        """
+        with self._lock:
+            if table == "orders":
+                if self.building:
+                    self._note_place_write(old, new)
+                    return
+                for row, delta in ((old, -1), (new, 1)):
+                    if row:
+                        for f in PLACE_FIELDS:
+                            self._place_delta(row.get(f), delta)
+                self._maybe_compact()
+                return
+            if table not in ENTITY_SOURCES:
+                return
+            _, key_col, fields = ENTITY_SOURCES[table]
+            if self.building:
+                self._touched.add((table, (new or old)[key_col]))
+            if new:
+                for f in fields:
+                    self.put(table, new[key_col], f, new.get(f))
+            elif old:
+                for f in fields:
+                    self._drop(table, old[key_col], f)
+                self._maybe_compact()
+
+    def _note_place_write(self, old, new):
+        """
+        Pesanan ditulis selama build. Sebelum scan tempat dimulai, hasil
+        COUNT(*) scan sudah memuatnya (apply_change dipanggil setelah commit),
+        jadi diabaikan; sesudahnya delta dicatat dan ditambahkan ke hasil scan.
+        """
+        if self._place_pending is None:
+            return
+        for row, delta in ((old, -1), (new, 1)):
+            if row:
+                for f in PLACE_FIELDS:
+                    place = (row.get(f) or "").strip()
+                    if place:
+                        self._place_pending[place] = self._place_pending.get(place, 0) + delta
+
+    def _maybe_compact(self):
+        if self._dead > 10000 and self._dead * 4 > len(self._kind):
+            self.compact()
+
+    def compact(self):
+        """Bangun ulang posting list hanya dari dokumen yang masih hidup."""
+        with self._lock:
+            docs = [(self._kind[d], self._key[d], self._field[d], self._text[d])
+                    for d in range(len(self._kind)) if self._alive[d]]
+            counts, touched, pending = self._place_count, self._touched, self._place_pending
+            self._clear()
+            self._place_count, self._touched, self._place_pending = counts, touched, pending
+            for doc in docs:
+                self._add(*doc)
+
+    # ---------- build dari DB ----------
+    def build(self, conn=None, batch=5000, progress=None):
+        """Scan streaming semua sumber; progress(n_dokumen) dipanggil per batch."""
+        if conn is None:
+            with connection(read_only=True) as own:
+                return self.build(own, batch, progress)
+
+        with self._lock:
+            self._clear()
+            self.ready = False
+            self.building = True
+        try:
+            for table, (query, key_col, fields) in ENTITY_SOURCES.items():
+                headers, rows = stream_query(conn, query, batch=batch)
+                key_i = headers.index(key_col)
+                field_i = [(f, headers.index(f)) for f in fields]
+                self._scan(rows, batch, progress, lambda row: [
+                    (table, row[key_i], f, row[i]) for f, i in field_i
+                ])
+
+            with self._lock:
+                self._place_pending = {}
+            _, rows = stream_query(conn, PLACES_QUERY, batch=batch)
+            for chunk in _chunks(rows, batch):
+                with self._lock:
+                    for place, n in chunk:
+                        place = (place or "").strip()
+                        if place:
+                            # jumlah dari scan (bukan ditambah), plus tulisan sesudah scan dimulai
+                            self._place_set(place, int(n) + self._place_pending.pop(place, 0))
+                if progress:
+                    progress(len(self))
+            with self._lock:
+                # tempat baru yang belum ada di snapshot scan
+                for place, delta in self._place_pending.items():
+                    self._place_delta(place, delta)
+        finally:
+            with self._lock:
+                self.building = False
+                self._touched.clear()
+                self._place_pending = None
+        self.ready = True
+        return len(self)
+
+    def _scan(self, rows, batch, progress, docs_of):
+        for chunk in _chunks(rows, batch):
+            with self._lock:
+                for row in chunk:
+                    for kind, key, field, text in docs_of(row):
+                        # baris yang sudah ditulis aplikasi selama build lebih baru dari hasil scan
+                        if (kind, key) in self._touched:
+                            continue
+                        text = "" if text is None else str(text).strip()
+                        if text:
+                            self._add(kind, key, field, text)
+            if progress:
+                progress(len(self))
+
+    # ---------- cari ----------
+    def search(self, text, limit=20, min_score=0.5):
+        """
+        list[dict(kind, key, field, text, score)] urut skor tertinggi,
+        lalu teks terpendek. Untuk tempat, "count" = jumlah pesanan.
+        """
+        grams = query_trigrams(text)
+        if not grams:
+            return []
+        with self._lock:
+            n_docs = len(self._kind)
+            lists = [np.frombuffer(self._post[g], dtype=np.int32) for g in grams if g in self._post]
+            if not lists:
+                return []
+            counts = np.bincount(np.concatenate(lists), minlength=n_docs)
+            alive = np.frombuffer(self._alive, dtype=np.uint8)
+            need = max(1, ceil(min_score * len(grams)))
+            cand = np.flatnonzero((counts >= need) & (alive == 1))
+            del lists, alive
+            if not cand.size:
+                return []
+
+            # satu kunci urut: skor lebih tinggi dulu, lalu teks lebih pendek
+            lengths = np.frombuffer(self._len, dtype=np.uint16)[cand].astype(np.int64)
+            rank = counts[cand].astype(np.int64) * 65536 - lengths
+            if cand.size > limit:
+                top = np.argpartition(-rank, limit - 1)[:limit]
+                cand, rank = cand[top], rank[top]
+            order = np.argsort(-rank, kind="stable")
+
+            out = []
+            for d in cand[order].tolist():
+                hit = {
+                    "kind": self._kind[d],
+                    "key": self._key[d],
+                    "field": self._field[d],
+                    "text": self._text[d],
+                    "score": float(counts[d]) / len(grams),
+                }
+                if hit["kind"] == "places":
+                    hit["count"] = self._place_count.get(hit["key"], 0)
+                out.append(hit)
+            return out
+
+
+def _chunks(rows, size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_index = None
+
+
+def quick_index() -> TrigramIndex:
+    global _index
+    if _index is None:
+        _index = TrigramIndex()
+    return _index
@@ -0,0 +1,136 @@
+"""
+File .ui yang sudah dikompilasi ke Python (pyside6-uic), supaya startup
+tidak perlu mem-parse XML .ui dengan QUiLoader setiap kali aplikasi dibuka.
+
+- Dashboard_form.ui -> ui_Dashboard_form.py (di folder yang sama)
+- hasil kompilasi dipakai jika lebih baru dari .ui, atau isi .ui-nya sama
+  (hash dicatat di baris pertama; mtime berubah saat checkout git)
+- kalau .ui lebih baru / belum dikompilasi: pakai QUiLoader, lalu
+  kompilasi ulang di background untuk startup berikutnya
+
+Pemakaian:
+    python ui_cache.py          # kompilasi semua *.ui di folder ini
+"""
+import glob
+import hashlib
+import importlib.util
+import os
+import re
+import shutil
+import subprocess
+import sys
+import threading
+
+from PySide6 import QtWidgets
+
+HEADER = "# ui-source: sha1={sha1} class={cls}\n"
+_HEADER_RE = re.compile(r"# ui-source: sha1=(\w+) class=(\w+)")
+_TOP_CLASS = re.compile(rb'<widget class="(\w+)"')
+
+
+def compiled_path(ui_path: str) -> str:
+    folder, name = os.path.split(ui_path)
+    return os.path.join(folder, f"ui_{os.path.splitext(name)[0]}.py")
+
+
+def _sha1(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def _header(py_path):
+    try:
+        with open(py_path, encoding="utf-8") as f:
+            m = _HEADER_RE.match(f.readline())
+    except OSError:
+        return None
+    return m.groups() if m else None
+
+
+def is_fresh(ui_path: str) -> bool:
+    py_path = compiled_path(ui_path)
+    header = _header(py_path)
+    if header is None:
+        return False
+    if os.path.getmtime(py_path) >= os.path.getmtime(ui_path):
+        return True
+    # .py lebih tua (mis. setelah checkout): masih sah kalau isi .ui sama
+    return header[0] == _sha1(ui_path)
+
+
+def _uic_command():
+    exe = shutil.which("pyside6-uic")
+    if exe:
+        return [exe]
+    return [sys.executable, "-m", "PySide6.scripts.pyside_tool", "uic"]
+
+
+def compile_ui(ui_path: str) -> str:
+    """Kompilasi satu .ui; return path .py. RuntimeError jika uic gagal."""
+    py_path = compiled_path(ui_path)
+    with open(ui_path, "rb") as f:
+        data = f.read()
+    m = _TOP_CLASS.search(data)
+    cls = m.group(1).decode() if m else "QWidget"
+    result = subprocess.run(_uic_command() + [ui_path], capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"pyside6-uic gagal untuk {ui_path}:\n{result.stderr}")
+    tmp = py_path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(HEADER.format(sha1=hashlib.sha1(data).hexdigest(), cls=cls))
+        f.write(result.stdout)
+    os.replace(tmp, py_path)
+    return py_path
+
+
+def _compile_quietly(ui_path):
+    try:
+        compile_ui(ui_path)
+    except (OSError, RuntimeError):
+        pass   # tetap jalan dengan QUiLoader
+
+
+def load_compiled(ui_path: str, parent=None):
+    py_path = compiled_path(ui_path)
+    _, cls = _header(py_path)
+    name = os.path.splitext(os.path.basename(py_path))[0]
+    spec = importlib.util.spec_from_file_location(name, py_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    form_class = next(v for k, v in vars(module).items() if k.startswith("Ui_"))
+
+    w = getattr(QtWidgets, cls)(parent)
+    ui = form_class()
+    ui.setupUi(w)
+    w.ui = ui   # simpan referensi supaya atribut form tetap bisa dipakai
+    return w
+
+
+def load_with_uiloader(ui_path: str, parent=None):
+    from PySide6.QtCore import QFile
+    from PySide6.QtUiTools import QUiLoader   # hanya dimuat kalau memang perlu
+
+    loader = QUiLoader()
+    f = QFile(ui_path)
+    if not f.open(QFile.ReadOnly):
+        raise RuntimeError(f"Gagal buka UI: {ui_path}")
+    w = loader.load(f, parent)
+    f.close()
+    if w is None:
+        raise RuntimeError(f"Gagal load UI: {ui_path}")
+    return w
+
+
+def load_ui(ui_path: str, parent=None):
+    """Widget dari .ui: versi terkompilasi jika masih sesuai, selain itu QUiLoader."""
+    if is_fresh(ui_path):
+        return load_compiled(ui_path, parent)
+    w = load_with_uiloader(ui_path, parent)
+    threading.Thread(target=_compile_quietly, args=(ui_path,), daemon=True).start()
+    return w
+
+
+if __name__ == "__main__":
+    folder = os.path.dirname(os.path.abspath(__file__))
+    for path in sorted(glob.glob(os.path.join(folder, "*.ui"))):
+        print(f"{os.path.basename(path)} -> {os.path.basename(compile_ui(path))}")